@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from users.models import User
+        from .instrumentation import install_query_recorder
+        from .signals import user_changed
+
+        connection_created.connect(install_query_recorder)
+        post_save.connect(user_changed, sender=User,
+                          dispatch_uid='auth_cache_user_saved')
+        post_delete.connect(user_changed, sender=User,
+                            dispatch_uid='auth_cache_user_deleted')
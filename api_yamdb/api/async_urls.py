@@ -0,0 +1,23 @@
+from django.urls import re_path
+
+from .async_views import async_read_view
+from .views import CategoryViewSet, GenreViewSet, ReviewViewSet, TitleViewSet
+
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {'get': 'retrieve', 'put': 'update',
+                  'patch': 'partial_update', 'delete': 'destroy'}
+
+async_urlpatterns = [
+    re_path(r'^titles/$',
+            async_read_view(TitleViewSet, LIST_ACTIONS)),
+    re_path(r'^titles/(?P<pk>\d+)/$',
+            async_read_view(TitleViewSet, DETAIL_ACTIONS)),
+    re_path(r'^genres/$',
+            async_read_view(GenreViewSet, LIST_ACTIONS)),
+    re_path(r'^categories/$',
+            async_read_view(CategoryViewSet, LIST_ACTIONS)),
+    re_path(r'^titles/(?P<title_id>\d+)/reviews/$',
+            async_read_view(ReviewViewSet, LIST_ACTIONS)),
+    re_path(r'^titles/(?P<title_id>\d+)/reviews/(?P<pk>[^/.]+)/$',
+            async_read_view(ReviewViewSet, DETAIL_ACTIONS)),
+]
@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+
+from api_yamdb.routers import use_replicas
+from .cache import AsyncSingleFlight, get_data_version
+from .renderers import TimedJSONRenderer
+
+READ_METHODS = ('GET', 'HEAD')
+
+read_flight = AsyncSingleFlight()
+
+
+def render(response):
+    http_response = HttpResponse(TimedJSONRenderer().render(response.data),
+                                 status=response.status_code,
+                                 content_type='application/json')
+    if response.has_header('WWW-Authenticate'):
+        http_response['WWW-Authenticate'] = response['WWW-Authenticate']
+    return http_response
+
+
+def copy_response(response):
+    """Отдельный ответ для каждого запроса: middleware изменяют заголовки."""
+    http_response = HttpResponse(response.content,
+                                 status=response.status_code,
+                                 content_type=response['Content-Type'])
+    if response.has_header('WWW-Authenticate'):
+        http_response['WWW-Authenticate'] = response['WWW-Authenticate']
+    return http_response
+
+
+def initial(viewset_class, action, request, kwargs):
+    """Представление действия вьюсета после проверок запроса.
+
+    Как в dispatch DRF, выполняется initial: аутентификация, проверка
+    прав и лимитов частоты вьюсета. Возвращает представление и ответ
+    с ошибкой, если проверки не пройдены.
+    """
+    view = viewset_class(action_map=dict.fromkeys(('get', 'head'), action),
+                         args=(), kwargs=kwargs, headers={},
+                         format_kwarg=None)
+    view.request = view.initialize_request(request)
+    try:
+        view.initial(view.request)
+    except Exception as exc:
+        return view, render(view.handle_exception(exc))
+    return view, None
+
+
+def run_action(view, action, kwargs):
+    try:
+        response = getattr(view, action)(view.request, **kwargs)
+    except Exception as exc:
+        response = view.handle_exception(exc)
+    return render(response)
+
+
+def read(viewset_class, action, request, kwargs):
+    """Чтение через действие вьюсета за один переход в синхронный поток."""
+    view, error = initial(viewset_class, action, request, kwargs)
+    if error is not None:
+        return error
+    return run_action(view, action, kwargs)
+
+
+def async_read_view(viewset_class, actions):
+    """Асинхронная вьюха: чтение в async-пути, запись через вьюсет DRF.
+
+    Одновременные чтения одного URL и одной версии данных при
+    READ_COALESCING ждут одного вычисления в синхронном потоке и получают
+    копии его ответа: запрос после своей записи не получит прежний ответ.
+    Аутентификация, права и лимиты проверяются для каждого запроса до
+    ожидания, общим остается только чтение и сериализация: ответы list
+    и retrieve каталога не зависят от пользователя.
+    """
+    action = actions['get']
+    sync_view = sync_to_async(viewset_class.as_view(actions))
+    read_action = sync_to_async(read)
+    check_request = sync_to_async(initial)
+    shared_action = sync_to_async(run_action)
+    # Версия читается из общего кеша вне основного синхронного потока
+    data_version = sync_to_async(get_data_version, thread_sensitive=False)
+
+    async def view(request, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_view(request, **kwargs)
+        if not settings.READ_COALESCING:
+            return await read_action(viewset_class, action, request, kwargs)
+        checked_view, error = await check_request(viewset_class, action,
+                                                  request, kwargs)
+        if error is not None:
+            return error
+        return copy_response(await read_flight.do(
+            (await data_version(), use_replicas.get(),
+             request.build_absolute_uri()),
+            lambda: shared_action(checked_view, action, kwargs)))
+
+    view.csrf_exempt = True
+    # Как у as_view DRF: по классу ReadReplicaMiddleware выбирает базу
+    view.cls = viewset_class
+    return view
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import User
+from .cache import cache_layer, get_token_version_key, get_user_key
+from .instrumentation import timed
+
+ROLE_CLAIM = 'role'
+SUPERUSER_CLAIM = 'is_superuser'
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+def get_user_claims(user):
+    """Утверждения JWT, по которым проверяются права без запроса к базе."""
+    return {ROLE_CLAIM: user.role,
+            SUPERUSER_CLAIM: user.is_superuser,
+            TOKEN_VERSION_CLAIM: user.token_version}
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя, None — пользователь недоступен."""
+    def load():
+        return (User.objects
+                .filter(pk=user_id, is_active=True, deleted_at__isnull=True)
+                .values_list('token_version', flat=True).first())
+
+    if not settings.AUTH_CACHE_TIMEOUT:
+        return load()
+    return cache_layer.get_or_set(get_token_version_key(user_id), load,
+                                  settings.AUTH_CACHE_TIMEOUT)
+
+
+class TokenUser(SimpleLazyObject):
+    """Пользователь из утверждений JWT.
+
+    id, роль и флаг суперпользователя читаются из токена, остальные
+    атрибуты загружают пользователя из кеша или базы при первом обращении.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    is_admin = User.is_admin
+    is_moderate = User.is_moderate
+
+    def __init__(self, validated_token, load):
+        super().__init__(load)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        self.__dict__.update(
+            pk=user_id, id=user_id, role=validated_token[ROLE_CLAIM],
+            is_superuser=validated_token[SUPERUSER_CLAIM])
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация с учетом времени в метриках запроса."""
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        """Пользователь из утверждений токена с проверкой его версии.
+
+        Токены без версии (выданные до появления утверждений о роли)
+        аутентифицируются пользователем из кеша или базы.
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or TOKEN_VERSION_CLAIM not in validated_token:
+            return self.get_cached_user(validated_token)
+        if validated_token[TOKEN_VERSION_CLAIM] != get_token_version(user_id):
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return TokenUser(validated_token,
+                         lambda: self.get_cached_user(validated_token))
+
+    def get_cached_user(self, validated_token):
+        """Пользователь из кеша на AUTH_CACHE_TIMEOUT секунд."""
+        get_user = super().get_user
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not settings.AUTH_CACHE_TIMEOUT or user_id is None:
+            return get_user(validated_token)
+        return cache_layer.get_or_set(
+            get_user_key(user_id), lambda: get_user(validated_token),
+            settings.AUTH_CACHE_TIMEOUT)
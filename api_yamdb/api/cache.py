@@ -0,0 +1,272 @@
+"""Двухуровневый кеш API.
+
+L2 — кеш Django 'default', общий для процессов (по умолчанию файловый).
+L1 — словарь в памяти процесса: значения хранятся без сериализации не
+дольше CACHE_L1_TIMEOUT секунд, поэтому изменять их нельзя. Одновременные
+промахи по ключу вычисляются один раз: в процессе — через SingleFlight,
+между процессами — под блокировкой cache.add в L2 (add должен быть
+атомарным: файловый кеш по умолчанию — api_yamdb.backends.filebased).
+"""
+import asyncio
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from api_yamdb.routers import use_replicas
+from reviews.catalogue import get_versions
+
+MISSING = object()
+
+# Пауза между проверками L2, пока значение вычисляет другой процесс
+LOCK_POLL_INTERVAL = 0.05
+
+
+class Call:
+    """Вычисление, результат которого ждут остальные вызовы."""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Одно вычисление на ключ для одновременных вызовов в процессе.
+
+    Остальные вызовы ждут первого и получают его результат; исключение
+    первого вызова получают все ожидающие.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.shared = 0
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+            else:
+                self.shared += 1
+        if not leader:
+            return call.wait()
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """SingleFlight для корутин одного цикла событий."""
+
+    def __init__(self):
+        self.calls = {}
+        self.shared = 0
+
+    async def do(self, key, func):
+        future = self.calls.get(key)
+        if future is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            # Первый вызов отменен: вычисление начинается заново
+            return await self.do(key, func)
+        future = self.calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Ошибку получает первый вызов, ожидающих может и не быть
+            future.exception()
+            raise
+        finally:
+            del self.calls[key]
+        future.set_result(result)
+        return result
+
+
+class TieredCache:
+    """Кеш L1 в памяти процесса поверх общего кеша L2."""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.lock = threading.Lock()
+        self.local = {}
+        self.flight = SingleFlight()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get_local(self, key):
+        with self.lock:
+            item = self.local.get(key)
+            if item is None:
+                return MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self.local[key]
+                return MISSING
+        return value
+
+    def set_local(self, key, value, timeout=None):
+        if timeout is None or timeout > settings.CACHE_L1_TIMEOUT:
+            timeout = settings.CACHE_L1_TIMEOUT
+        if timeout <= 0:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if len(self.local) >= settings.CACHE_L1_MAX_ENTRIES:
+                self.evict(now)
+            self.local[key] = (now + timeout, value)
+
+    def evict(self, now):
+        """Удаление устаревших записей L1, а если их нет — старшей половины."""
+        expired = [key for key, (expires, _) in self.local.items()
+                   if expires < now]
+        if not expired:
+            expired = list(self.local)[:len(self.local) // 2 + 1]
+        for key in expired:
+            del self.local[key]
+
+    def get(self, key, default=None):
+        value = self.get_local(key)
+        if value is MISSING:
+            value = self.shared.get(key, MISSING)
+            if value is MISSING:
+                return default
+            self.set_local(key, value)
+        return value
+
+    def set(self, key, value, timeout):
+        self.shared.set(key, value, timeout)
+        self.set_local(key, value, timeout)
+
+    def delete(self, key):
+        self.shared.delete(key)
+        with self.lock:
+            self.local.pop(key, None)
+
+    def clear(self):
+        self.shared.clear()
+        with self.lock:
+            self.local.clear()
+
+    def get_or_set(self, key, func, timeout):
+        """Значение из кеша или func(), вычисленное один раз на промах."""
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        return self.flight.do(key, lambda: self.compute(key, func, timeout))
+
+    def compute(self, key, func, timeout):
+        lock_key = f'{key}:lock'
+        locked = self.shared.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT)
+        try:
+            if not locked:
+                value = self.wait_shared(key)
+                if value is not MISSING:
+                    self.set_local(key, value, timeout)
+                    return value
+            value = func()
+            self.set(key, value, timeout)
+            return value
+        finally:
+            if locked:
+                self.shared.delete(lock_key)
+
+    def wait_shared(self, key):
+        """Ожидание значения, которое вычисляет другой процесс."""
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            value = self.shared.get(key, MISSING)
+            if value is not MISSING:
+                return value
+            time.sleep(LOCK_POLL_INTERVAL)
+        return MISSING
+
+
+cache_layer = TieredCache()
+
+
+def make_key(prefix, *parts):
+    """Ключ с хешем частей: длина не зависит от URL и SQL."""
+    digest = hashlib.md5(
+        '\n'.join(map(str, parts)).encode()).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def get_data_version():
+    """Версия данных каталога: меняется при любой записи в ChangeLog."""
+    return '{}.{}'.format(*get_versions())
+
+
+def get_user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def get_token_version_key(user_id):
+    return f'auth-token-version:{user_id}'
+
+
+class CachedReadMixin:
+    """list и retrieve из кеша ответов на RESPONSE_CACHE_TIMEOUT секунд.
+
+    Ключ — версия данных, чтение из реплик и абсолютный URL запроса:
+    ссылки next и previous в ответе содержат схему и хост. Ответы не
+    зависят от пользователя, а аутентификация и права проверяются до
+    обращения к кешу. Ответ из отстающей реплики не достается клиенту,
+    закрепленному за основной базой после своей записи. Без кеша
+    одновременные одинаковые запросы при READ_COALESCING ждут одного
+    вычисления.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().retrieve, *args, **kwargs)
+
+    def get_cached_response(self, request, handler, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout and not settings.READ_COALESCING:
+            return handler(request, *args, **kwargs)
+        key = make_key('response', get_data_version(), use_replicas.get(),
+                       request.build_absolute_uri())
+
+        def get_data():
+            return handler(request, *args, **kwargs).data
+
+        if timeout:
+            data = cache_layer.get_or_set(key, get_data, timeout)
+        else:
+            data = cache_layer.flight.do(key, get_data)
+        return Response(data)
@@ -0,0 +1,67 @@
+import csv
+import json
+from datetime import datetime
+
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre)
+from users.models import User
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+
+EXPORTS = {
+    'users': ('users', User, ['id', 'username', 'email', 'role', 'bio',
+                              'first_name', 'last_name']),
+    'categories': ('category', Category, ['id', 'name', 'slug']),
+    'genres': ('genre', Genre, ['id', 'name', 'slug']),
+    'titles': ('titles', Title, ['id', 'name', 'year', 'category_id']),
+    'genre_title': ('genre_title', TitleGenre, ['id', 'title_id',
+                                                'genre_id']),
+    'reviews': ('review', Review, ['id', 'title_id', 'text', 'author_id',
+                                   'score', 'pub_date']),
+    'comments': ('comments', Comment, ['id', 'review_id', 'text',
+                                       'author_id', 'pub_date']),
+}
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat().replace('+00:00', 'Z')
+    if value is None:
+        return ''
+    return value
+
+
+def iter_rows(resource, chunk_size):
+    """Строки выгрузки с серверной итерацией по chunk_size записей."""
+    _, model, fields = EXPORTS[resource]
+    rows = (model.objects.order_by('id')
+            .values_list(*fields)
+            .iterator(chunk_size=chunk_size))
+    for row in rows:
+        yield [format_value(value) for value in row]
+
+
+def iter_export(resource, export_format, chunk_size):
+    """Выгрузка в формате CSV (как static/data/*.csv) или NDJSON."""
+    _, _, fields = EXPORTS[resource]
+    if export_format == CSV:
+        writer = csv.writer(Echo(), lineterminator='\n')
+        yield writer.writerow(fields)
+        for row in iter_rows(resource, chunk_size):
+            yield writer.writerow(row)
+    else:
+        for row in iter_rows(resource, chunk_size):
+            yield json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n'
+
+
+def get_filename(resource, export_format):
+    return f'{EXPORTS[resource][0]}.{export_format}'
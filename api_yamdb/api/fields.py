@@ -0,0 +1,47 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class CachedManyRelatedField(serializers.ManyRelatedField):
+    """Список slug, проверяемый одним обращением к SlugMap."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.resolve(list(data))
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, возвращающий id из словаря slug → id.
+
+    Вместо запроса на каждый slug используется SlugMap, объекты
+    модели не загружаются.
+    """
+
+    def __init__(self, slug_map, **kwargs):
+        self.slug_map = slug_map
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedManyRelatedField(**list_kwargs)
+
+    def resolve(self, data):
+        try:
+            ids = self.slug_map.resolve(data)
+        except TypeError:
+            self.fail('invalid')
+        for slug, pk in zip(data, ids):
+            if pk is None:
+                self.fail('does_not_exist', slug_name=self.slug_field,
+                          value=slug)
+        return ids
+
+    def to_internal_value(self, data):
+        return self.resolve([data])[0]
@@ -11,3 +11,14 @@ class TitleFilter(django_filters.FilterSet):
     class Meta:
         model = Title
         fields = ['category__slug', 'genre__slug', 'name', 'year']
+
+
+# Поля TitleFilter и соответствующие им поля снимка каталога
+SNAPSHOT_FIELDS = {
+    'genre': 'genre',
+    'genre__slug': 'genre',
+    'category': 'category',
+    'category__slug': 'category',
+    'name': 'name',
+    'year': 'year',
+}
@@ -0,0 +1,86 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+IN_PARAMS_RE = re.compile(r'IN \((?:%s(?:, )?)+\)')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def get_query_shape(sql):
+    """Форма запроса: SQL без различий в длине списков IN (...)."""
+    return IN_PARAMS_RE.sub('IN (...)', sql)
+
+
+class RequestMetrics:
+    """Счетчики одного запроса: SQL-запросы и время по этапам."""
+    __slots__ = ('started', 'queries', 'db_time', 'timings', 'sql',
+                 'max_sql', 'shapes')
+
+    def __init__(self, max_sql=100, track_shapes=False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = {}
+        self.sql = []
+        self.max_sql = max_sql
+        self.shapes = Counter() if track_shapes else None
+
+    def add_timing(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if len(self.sql) < self.max_sql:
+            self.sql.append((sql, duration))
+        if self.shapes is not None:
+            self.shapes[get_query_shape(sql)] += 1
+
+    def get_repeated_queries(self, threshold):
+        """Формы запросов, повторенные больше threshold раз (N+1)."""
+        if self.shapes is None:
+            return []
+        return [(shape, count) for shape, count in self.shapes.items()
+                if count > threshold]
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def timed(name):
+    """Учет времени блока в метриках текущего запроса."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_timing(name, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Подключение учета SQL-запросов к каждому новому соединению."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
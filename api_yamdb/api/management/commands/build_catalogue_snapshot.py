@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from reviews.catalogue import (CatalogueSnapshot, get_versions,
+                               write_catalogue)
+from reviews.models import ChangeLog
+
+
+class Command(BaseCommand):
+    help = ('Write the catalogue snapshot file that workers share '
+            'through mmap')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=(settings.CATALOGUE_SNAPSHOT_FILE
+                     or settings.BASE_DIR / 'catalogue.snapshot'))
+        parser.add_argument('--watch', action='store_true',
+                            help='Rebuild whenever the catalogue changes')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds between checks with --watch')
+
+    def handle(self, *args, **options):
+        built = None
+        while True:
+            version = (ChangeLog.objects.aggregate(last=Max('id'))['last'],
+                       get_versions()[1])
+            if version != built:
+                self.build(options['output'])
+                built = version
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+
+    def build(self, path):
+        started = time.perf_counter()
+        snapshot = CatalogueSnapshot()
+        snapshot.load()
+        write_catalogue(snapshot, path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(snapshot.ids)} titles (version {snapshot.cursor}) '
+            f'to {path} in {time.perf_counter() - started:.2f}s'))
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.similarity import iter_similar_titles
+from reviews.models import Review, Title, TitleSimilarity
+
+
+class Command(BaseCommand):
+    help = 'Build top-K similar titles from co-rated reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int,
+                            default=settings.SIMILAR_TITLES_TOP_K)
+        parser.add_argument('--chunk-size', type=int,
+                            default=settings.SIMILARITY_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        ratings = (Review.objects
+                   .values_list('author_id', 'title_id', 'score')
+                   .iterator(chunk_size=options['chunk_size']))
+        # Расчет идет вне транзакции: блокировка записи держится только
+        # на время замены строк, а не всего расчета.
+        rows = [
+            (title_id, similar_id, score)
+            for chunk in iter_similar_titles(ratings, options['top_k'],
+                                             options['chunk_size'])
+            for title_id, neighbours in chunk
+            for similar_id, score in neighbours
+        ]
+        with transaction.atomic():
+            # Произведения, удаленные во время расчета, пропускаются.
+            title_ids = set(Title.objects.values_list('id', flat=True))
+            objs = [
+                TitleSimilarity(title_id=title_id, similar_id=similar_id,
+                                score=score)
+                for title_id, similar_id, score in rows
+                if title_id in title_ids and similar_id in title_ids
+            ]
+            TitleSimilarity.objects.all().delete()
+            TitleSimilarity.objects.bulk_create(
+                objs, batch_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully built {len(objs)} title similarity rows'))
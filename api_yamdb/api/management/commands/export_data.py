@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exporters import EXPORTS, FORMATS, CSV, get_filename, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Export data into CSV files (static/data layout) or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resources', nargs='*',
+                            help='Resources to export, all by default: '
+                                 f'{", ".join(EXPORTS)}')
+        parser.add_argument('--format', choices=FORMATS, default=CSV)
+        parser.add_argument('--output', default='export',
+                            help='Directory for exported files')
+        parser.add_argument('--chunk-size', type=int,
+                            default=settings.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        unknown = set(options['resources']) - set(EXPORTS)
+        if unknown:
+            raise CommandError(f'Unknown resources: {", ".join(unknown)}')
+        output_dir = Path(options['output'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for resource in options['resources'] or EXPORTS:
+            file_path = output_dir / get_filename(resource, options['format'])
+            with open(file_path, 'w', encoding='utf-8', newline='') as file:
+                for chunk in iter_export(resource, options['format'],
+                                         options['chunk_size']):
+                    file.write(chunk)
+            self.stdout.write(self.style.SUCCESS(
+                f'Successfully exported {resource} to {file_path}'))
@@ -0,0 +1,260 @@
+import csv
+import math
+import random
+from array import array
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone as django_timezone
+
+from api.exporters import EXPORTS, format_value
+from reviews.slugs import SLUG_MAPS
+
+RESOURCES = ('users', 'categories', 'genres', 'titles', 'genre_title',
+             'reviews', 'comments')
+
+CATEGORIES = (('Фильм', 'movie'), ('Книга', 'book'), ('Музыка', 'music'),
+              ('Сериал', 'series'), ('Игра', 'game'))
+
+GENRES = (('Драма', 'drama'), ('Комедия', 'comedy'),
+          ('Вестерн', 'western'), ('Фэнтези', 'fantasy'),
+          ('Фантастика', 'sci-fi'), ('Детектив', 'detective'),
+          ('Триллер', 'thriller'), ('Сказка', 'tale'), ('Гонзо', 'gonzo'),
+          ('Ужасы', 'horror'), ('Роман', 'roman'), ('Баллада', 'ballad'),
+          ('Рок-н-ролл', 'rock-n-roll'), ('Классика', 'classical'),
+          ('Рок', 'rock'), ('Шансон', 'chanson'))
+
+WORDS = ('фильм', 'книга', 'сюжет', 'герой', 'финал', 'актер', 'музыка',
+         'история', 'автор', 'сцена', 'смысл', 'время', 'мир', 'жизнь',
+         'очень', 'совсем', 'снова', 'отлично', 'скучно', 'сильно',
+         'красиво', 'неожиданно', 'рекомендую', 'понравился', 'ожидал',
+         'посмотрел', 'прочитал', 'запомнился', 'лучший', 'слабый',
+         'главный', 'новый', 'старый', 'долгий', 'яркий', 'не', 'и', 'но')
+
+SITE_STARTED = datetime(2005, 1, 1, tzinfo=timezone.utc).timestamp()
+GENERATED_UNTIL = datetime(2023, 12, 31, tzinfo=timezone.utc).timestamp()
+FIRST_YEAR = 1900
+LAST_YEAR = 2023
+
+
+class Generator:
+    """Детерминированный по seed генератор строк каталога.
+
+    Строки выдаются в порядке колонок EXPORTS. Популярность произведений
+    распределена по Парето, оценки — вокруг средней оценки произведения,
+    число комментариев к отзыву — геометрически.
+    """
+
+    def __init__(self, seed, counts):
+        self.rnd = random.Random(seed)
+        self.counts = counts
+        self.title_years = array('H')
+        self.review_dates = array('d')
+
+    def rows(self, resource):
+        return getattr(self, f'{resource}_rows')()
+
+    def text(self, low, high):
+        words = self.rnd.choices(WORDS, k=self.rnd.randint(low, high))
+        return ' '.join(words).capitalize() + '.'
+
+    @staticmethod
+    def date(timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc)
+
+    def users_rows(self):
+        for user_id in range(1, self.counts['users'] + 1):
+            chance = self.rnd.random()
+            role = ('admin' if chance < 0.001
+                    else 'moderator' if chance < 0.01 else 'user')
+            yield (user_id, f'user{user_id}', f'user{user_id}@yamdb.fake',
+                   role, '', '', '')
+
+    def named_rows(self, names, count):
+        for number in range(count):
+            name, slug = names[number % len(names)]
+            if number >= len(names):
+                name = f'{name} {number // len(names) + 1}'
+                slug = f'{slug}-{number // len(names) + 1}'
+            yield (number + 1, name, slug)
+
+    def categories_rows(self):
+        return self.named_rows(CATEGORIES, self.counts['categories'])
+
+    def genres_rows(self):
+        return self.named_rows(GENRES, self.counts['genres'])
+
+    def titles_rows(self):
+        for title_id in range(1, self.counts['titles'] + 1):
+            year = max(FIRST_YEAR,
+                       LAST_YEAR - int(self.rnd.expovariate(1 / 15)))
+            self.title_years.append(year)
+            yield (title_id, self.text(1, 4)[:-1], year,
+                   self.rnd.randint(1, self.counts['categories']))
+
+    def genre_title_rows(self):
+        row_id = 0
+        genre_ids = range(1, self.counts['genres'] + 1)
+        for title_id in range(1, self.counts['titles'] + 1):
+            count = min(len(genre_ids), self.rnd.choice((1, 1, 2, 3)))
+            for genre_id in self.rnd.sample(genre_ids, count):
+                row_id += 1
+                yield (row_id, title_id, genre_id)
+
+    def reviews_rows(self):
+        rnd = self.rnd
+        users = self.counts['users']
+        weights = [rnd.paretovariate(1.16)
+                   for _ in range(self.counts['titles'])]
+        total = sum(weights)
+        review_id = 0
+        for title_id, weight in enumerate(weights, 1):
+            count = min(users,
+                        round(self.counts['reviews'] * weight / total))
+            mean = min(9.5, max(2.0, rnd.gauss(7, 1.5)))
+            started = max(SITE_STARTED, datetime(
+                self.title_years[title_id - 1], 1, 1,
+                tzinfo=timezone.utc).timestamp())
+            for author_id in rnd.sample(range(1, users + 1), count):
+                review_id += 1
+                timestamp = rnd.uniform(started, GENERATED_UNTIL)
+                self.review_dates.append(timestamp)
+                score = min(10, max(1, round(rnd.gauss(mean, 1.8))))
+                yield (review_id, title_id, self.text(5, 30), author_id,
+                       score, self.date(timestamp))
+
+    def comments_rows(self):
+        rnd = self.rnd
+        mean = self.counts['comments'] / max(len(self.review_dates), 1)
+        if not mean:
+            return
+        log_failure = math.log(1 - 1 / (mean + 1))
+        comment_id = 0
+        for review_id, reviewed in enumerate(self.review_dates, 1):
+            count = int(math.log(1.0 - rnd.random()) / log_failure)
+            for _ in range(count):
+                comment_id += 1
+                timestamp = min(GENERATED_UNTIL,
+                                reviewed + rnd.expovariate(1 / 259200))
+                yield (comment_id, review_id, self.text(3, 15),
+                       rnd.randint(1, self.counts['users']),
+                       self.date(timestamp))
+
+
+class Command(BaseCommand):
+    help = ('Generate a synthetic catalogue for load testing: bulk insert '
+            'it into an empty database or write CSV files compatible with '
+            'import_csv_data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000,
+                            help='Target number of reviews')
+        parser.add_argument('--comments', type=int, default=20000,
+                            help='Target number of comments')
+        parser.add_argument('--genres', type=int, default=len(GENRES))
+        parser.add_argument('--categories', type=int,
+                            default=len(CATEGORIES))
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output-dir',
+                            help='Write CSV files instead of the database')
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        counts = {resource: options[resource] for resource in
+                  ('users', 'titles', 'reviews', 'comments', 'genres',
+                   'categories')}
+        for resource in ('users', 'titles', 'genres', 'categories'):
+            if counts[resource] < 1:
+                raise CommandError(f'--{resource} must be positive')
+        generator = Generator(options['seed'], counts)
+        self.batch_size = options['batch_size']
+        if options['output_dir']:
+            output_dir = Path(options['output_dir'])
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for resource in RESOURCES:
+                self.report(resource,
+                            self.write_csv(output_dir, resource,
+                                           generator.rows(resource)))
+            return
+
+        for resource in RESOURCES:
+            if EXPORTS[resource][1].objects.exists():
+                raise CommandError(
+                    f'Table for {resource} is not empty, use --output-dir '
+                    'or an empty database')
+        with transaction.atomic():
+            for resource in RESOURCES:
+                self.report(resource,
+                            self.insert(resource, generator.rows(resource)))
+        for slug_map in SLUG_MAPS:
+            slug_map.invalidate()
+        call_command('rebuild_counters', stdout=self.stdout)
+
+    def report(self, resource, count):
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully generated {count} rows for {resource}'))
+
+    def write_csv(self, output_dir, resource, rows):
+        file_name, _, fields = EXPORTS[resource]
+        count = 0
+        with open(output_dir / f'{file_name}.csv', 'w', encoding='utf-8',
+                  newline='') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(fields)
+            for row in rows:
+                writer.writerow([format_value(value) for value in row])
+                count += 1
+        return count
+
+    def insert(self, resource, rows):
+        """Вставка через executemany, минуя создание объектов моделей.
+
+        Колонки, которых нет в выгрузке, заполняются значениями по
+        умолчанию, поля auto_now и auto_now_add — текущим временем.
+        """
+        _, model, fields = EXPORTS[resource]
+        model_fields = {field.attname: field
+                        for field in model._meta.concrete_fields}
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+        converters = [
+            adapt_datetime
+            if isinstance(model_fields[name], models.DateTimeField) else None
+            for name in fields
+        ]
+        now = django_timezone.now()
+        defaults = []
+        for name, field in model_fields.items():
+            if name in fields:
+                continue
+            value = (now if getattr(field, 'auto_now', False)
+                     or getattr(field, 'auto_now_add', False)
+                     else field.get_default())
+            defaults.append((field.column,
+                             field.get_db_prep_save(value, connection)))
+        columns = ([model_fields[name].column for name in fields]
+                   + [column for column, _ in defaults])
+        defaults = tuple(value for _, value in defaults)
+        quote_name = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote_name(model._meta.db_table),
+            ', '.join(quote_name(column) for column in columns),
+            ', '.join(['%s'] * len(columns)))
+        count = 0
+        with connection.cursor() as cursor:
+            while True:
+                batch = [tuple(value if convert is None else convert(value)
+                               for convert, value in zip(converters, row))
+                         + defaults
+                         for row in islice(rows, self.batch_size)]
+                if not batch:
+                    return count
+                cursor.executemany(sql, batch)
+                count += len(batch)
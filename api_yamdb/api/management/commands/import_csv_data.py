@@ -1,7 +1,13 @@
 import csv
+import hashlib
+import json
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 
 from reviews.models import (Category,
                             Genre,
@@ -10,60 +16,225 @@ from reviews.models import (Category,
                             Comment,
                             TitleGenre,
                             User)
+from reviews.signals import record_changes
+from reviews.slugs import SLUG_MAPS
+
+IMPORTS = (
+    ('users.csv', User, ['id', 'username', 'email', 'role']),
+    ('category.csv', Category, ['id', 'name', 'slug']),
+    ('genre.csv', Genre, ['id', 'name', 'slug']),
+    ('titles.csv', Title, ['id', 'name', 'year', 'category_id']),
+    ('review.csv', Review, ['id', 'text', 'author_id', 'score',
+                            'title_id', 'pub_date']),
+    ('comments.csv', Comment, ['id', 'text', 'author_id', 'review_id',
+                               'pub_date']),
+    ('genre_title.csv', TitleGenre, ['id', 'genre_id', 'title_id']),
+)
 
 
 class Command(BaseCommand):
-    help = 'Import data from CSV files into the database'
-
-    def handle(self, *args, **kwargs):
-
-        data_dir = settings.BASE_DIR / 'static' / 'data'
-
-        self.import_data(data_dir / 'users.csv', User, ['id',
-                                                        'username',
-                                                        'email',
-                                                        'role'])
-        self.import_data(data_dir / 'category.csv', Category, ['id',
-                                                               'name',
-                                                               'slug'])
-        self.import_data(data_dir / 'genre.csv', Genre, ['id',
-                                                         'name',
-                                                         'slug'])
-        self.import_data(data_dir / 'titles.csv', Title, ['id',
-                                                          'name',
-                                                          'year',
-                                                          'category_id'])
-        self.import_data(data_dir / 'review.csv', Review, ['id',
-                                                           'text',
-                                                           'author_id',
-                                                           'score',
-                                                           'title_id',
-                                                           'pub_date'])
-        self.import_data(data_dir / 'comments.csv', Comment, ['id',
-                                                              'text',
-                                                              'author_id',
-                                                              'review_id',
-                                                              'pub_date'])
-        self.import_genre_title(data_dir / 'genre_title.csv')
-
-    def import_data(self, file_path, model, fields):
-        with open(file_path, encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                data = {field: row[field] for field in fields}
-                model.objects.get_or_create(**data)
-        self.stdout.write(self.style.SUCCESS('Successfully loaded'
-                                             f'data from {file_path}'))
-
-    def import_genre_title(self, file_path):
+    help = ('Import data from CSV files into the database, applying only '
+            'rows changed since the previous import')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir',
+                            default=settings.BASE_DIR / 'static' / 'data')
+        parser.add_argument('--manifest-dir',
+                            default=settings.IMPORT_MANIFEST_DIR)
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore manifests and upsert every row')
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        data_dir = Path(options['data_dir'])
+        manifest_dir = Path(options['manifest_dir'])
+        self.batch_size = options['batch_size']
+
+        plans = []
+        for file_name, model, fields in IMPORTS:
+            manifest_path = manifest_dir / f'{file_name}.json'
+            manifest = ({} if options['full']
+                        else self.load_manifest(manifest_path, model, fields))
+            rows = self.read_rows(data_dir / file_name, fields)
+            plans.append((file_name, model, fields, manifest_path, rows,
+                          self.diff(rows, manifest)))
+
+        with transaction.atomic():
+            title_ids, user_ids = self.get_counter_owners(plans)
+            genre_title_ids = self.get_genre_titles(plans)
+            for _, model, _, _, _, diff in reversed(plans):
+                self.delete(model, diff['deleted'])
+            for _, model, fields, _, rows, diff in plans:
+                self.upsert(model, fields,
+                            [rows[row_id] for row_id in diff['changed']])
+            self.record_changes(plans, genre_title_ids)
+            self.rebuild_counters(title_ids, user_ids)
+
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+        for file_name, _, fields, manifest_path, _, diff in plans:
+            self.save_manifest(manifest_path, fields, diff['hashes'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Successfully loaded data from {file_name}: '
+                f'{diff["inserted"]} inserted, {diff["updated"]} updated, '
+                f'{len(diff["deleted"])} deleted'))
+
+    @staticmethod
+    def fingerprint(row):
+        return hashlib.sha1('\x1f'.join(row.values()).encode()).hexdigest()
+
+    def read_rows(self, file_path, fields):
         with open(file_path, encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                TitleGenre.objects.get_or_create(
-                    id=row['id'],
-                    genre_id=row['genre_id'],
-                    title_id=row['title_id']
-                )
-        self.stdout.write(self.style.SUCCESS(
-            'Successfully loaded genre-title'
-            f'relationships from {file_path}'))
+            return {row['id']: {field: row[field] for field in fields}
+                    for row in csv.DictReader(file)}
+
+    def load_manifest(self, manifest_path, model, fields):
+        """Хеши строк предыдущего импорта.
+
+        Пустые при смене колонок и если строк манифеста нет в базе:
+        после очистки базы или подмены ее файла импорт снова полный.
+        """
+        if not manifest_path.exists():
+            return {}
+        with open(manifest_path, encoding='utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('fields') != fields:
+            return {}
+        rows = manifest['rows']
+        if self.count_existing(model, list(rows)) != len(rows):
+            return {}
+        return rows
+
+    def count_existing(self, model, row_ids):
+        return sum(
+            model.objects.filter(
+                pk__in=row_ids[start:start + self.batch_size]).count()
+            for start in range(0, len(row_ids), self.batch_size))
+
+    def save_manifest(self, manifest_path, fields, hashes):
+        tmp_path = manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'fields': fields, 'rows': hashes}, file)
+        tmp_path.replace(manifest_path)
+
+    def diff(self, rows, manifest):
+        """Разделение строк на новые, измененные и удаленные по хешам."""
+        hashes = {}
+        changed = []
+        inserted = updated = 0
+        for row_id, row in rows.items():
+            hashes[row_id] = self.fingerprint(row)
+            previous = manifest.get(row_id)
+            if previous != hashes[row_id]:
+                changed.append(row_id)
+                if previous is None:
+                    inserted += 1
+                else:
+                    updated += 1
+        deleted = [row_id for row_id in manifest if row_id not in rows]
+        return {'hashes': hashes, 'changed': changed, 'deleted': deleted,
+                'inserted': inserted, 'updated': updated}
+
+    def build(self, model, row):
+        return model(**{field: (value or None) if field.endswith('_id')
+                        else value
+                        for field, value in row.items()})
+
+    def upsert(self, model, fields, rows):
+        update_fields = [field for field in fields if field != 'id']
+        has_updated_at = any(field.name == 'updated_at'
+                             for field in model._meta.fields)
+        if has_updated_at:
+            update_fields.append('updated_at')
+        for start in range(0, len(rows), self.batch_size):
+            objs = [self.build(model, row)
+                    for row in rows[start:start + self.batch_size]]
+            existing = set(model.objects.filter(
+                pk__in=[int(obj.pk) for obj in objs]
+            ).values_list('pk', flat=True))
+            new_objs = [obj for obj in objs if int(obj.pk) not in existing]
+            old_objs = [obj for obj in objs if int(obj.pk) in existing]
+            model.objects.bulk_create(new_objs)
+            if old_objs:
+                if has_updated_at:
+                    now = timezone.now()
+                    for obj in old_objs:
+                        obj.updated_at = now
+                model.objects.bulk_update(old_objs, update_fields)
+
+    def delete(self, model, row_ids):
+        for start in range(0, len(row_ids), self.batch_size):
+            model.objects.filter(
+                pk__in=row_ids[start:start + self.batch_size]).delete()
+
+    def get_counter_owners(self, plans):
+        """id произведений и авторов, чьи счетчики меняет импорт.
+
+        Учитываются значения строк и в базе до импорта, и в файлах:
+        отзыв мог перейти к другому произведению или автору.
+        """
+        title_ids = set()
+        user_ids = set()
+        for _, model, _, _, rows, diff in plans:
+            if model not in (Review, Comment):
+                continue
+            fields = (('author_id', 'title_id') if model is Review
+                      else ('author_id',))
+            owners = [rows[row_id] for row_id in diff['changed']]
+            owners.extend(self.get_db_values(
+                model, diff['changed'] + diff['deleted'], fields))
+            for owner in owners:
+                if owner['author_id']:
+                    user_ids.add(int(owner['author_id']))
+                if owner.get('title_id'):
+                    title_ids.add(int(owner['title_id']))
+        return title_ids, user_ids
+
+    def get_genre_titles(self, plans):
+        """id произведений, чьи жанры меняет импорт.
+
+        Связи удаляются запросом без сигналов, поэтому произведения
+        удаляемых и перенесенных связей читаются из базы до импорта.
+        """
+        for _, model, _, _, rows, diff in plans:
+            if model is TitleGenre:
+                return (
+                    {int(rows[row_id]['title_id'])
+                     for row_id in diff['changed']}
+                    | {int(value['title_id']) for value in self.get_db_values(
+                        model, diff['changed'] + diff['deleted'],
+                        ('title_id',))})
+        return set()
+
+    def get_db_values(self, model, row_ids, fields):
+        """Значения полей строк в базе до импорта."""
+        values = []
+        for start in range(0, len(row_ids), self.batch_size):
+            values.extend(model.objects.filter(
+                pk__in=row_ids[start:start + self.batch_size]
+            ).values(*fields))
+        return values
+
+    def rebuild_counters(self, title_ids, user_ids):
+        """Пересчет счетчиков затронутых строк, при множестве — всех."""
+        if not title_ids and not user_ids:
+            return
+        if len(title_ids) + len(user_ids) > self.batch_size:
+            call_command('rebuild_counters', stdout=self.stdout)
+            return
+        call_command('rebuild_counters', title_ids=sorted(title_ids),
+                     user_ids=sorted(user_ids), stdout=self.stdout)
+
+    def record_changes(self, plans, genre_title_ids):
+        """Журнал синхронизации для строк, минующих сигналы."""
+        record_changes(Title._meta.model_name, genre_title_ids)
+        for _, model, _, _, rows, diff in plans:
+            if model in (TitleGenre, User):
+                continue
+            record_changes(model._meta.model_name, diff['changed'])
+            if model is Review:
+                record_changes(Title._meta.model_name,
+                               {rows[row_id]['title_id']
+                                for row_id in diff['changed']})
+        for slug_map in SLUG_MAPS:
+            slug_map.invalidate()
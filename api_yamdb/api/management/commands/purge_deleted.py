@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.deletion import iter_purge
+from reviews.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = ('Delete reviews and comments of soft-deleted titles and users '
+            'in small batches')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.PURGE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new deletion jobs')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            jobs = list(DeletionJob.objects.exclude(status=DeletionJob.DONE))
+            for job in jobs:
+                self.purge(job, options['batch_size'], options['pause'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def purge(self, job, batch_size, pause):
+        deleted = 0
+        for count in iter_purge(job, batch_size):
+            deleted += count
+            if pause:
+                time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {job.model_name} {job.object_id}: '
+            f'{deleted} dependent rows deleted'))
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from reviews.catalogue import catalogue
+from reviews.models import Comment, Review, TitleScoreCount
+from users.models import UserStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild score histograms and user activity counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title-ids', type=int, nargs='*',
+                            help='Rebuild score counters of these titles only')
+        parser.add_argument('--user-ids', type=int, nargs='*',
+                            help='Rebuild stats of these users only')
+
+    def handle(self, *args, title_ids=None, user_ids=None, **kwargs):
+        full = title_ids is None and user_ids is None
+        with transaction.atomic():
+            if full or title_ids:
+                self.rebuild_score_counts(title_ids)
+            if full or user_ids:
+                self.rebuild_user_stats(user_ids)
+        if full:
+            catalogue.invalidate()
+
+    def rebuild_score_counts(self, title_ids=None):
+        """Счетчики оценок всех произведений или только title_ids."""
+        reviews = Review.objects.order_by()
+        score_counts = TitleScoreCount.objects.all()
+        if title_ids is not None:
+            reviews = reviews.filter(title_id__in=title_ids)
+            score_counts = score_counts.filter(title_id__in=title_ids)
+        rows = (reviews.values('title_id', 'score')
+                .annotate(count=Count('id')))
+        score_counts.delete()
+        counters = TitleScoreCount.objects.bulk_create(
+            TitleScoreCount(**row) for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully rebuilt {len(counters)} score counters'))
+
+    def rebuild_user_stats(self, user_ids=None):
+        """Статистика всех пользователей или только user_ids."""
+        stats = {}
+        reviews = Review.objects.order_by()
+        comments = Comment.objects.order_by()
+        user_stats = UserStats.objects.all()
+        if user_ids is not None:
+            reviews = reviews.filter(author_id__in=user_ids)
+            comments = comments.filter(author_id__in=user_ids)
+            user_stats = user_stats.filter(user_id__in=user_ids)
+        reviews = (reviews.values('author_id')
+                   .annotate(review_count=Count('id'),
+                             score_sum=Sum('score')))
+        for row in reviews:
+            stats[row['author_id']] = UserStats(
+                user_id=row['author_id'],
+                review_count=row['review_count'],
+                score_sum=row['score_sum'])
+        comments = (comments.values('author_id')
+                    .annotate(comment_count=Count('id')))
+        for row in comments:
+            stats.setdefault(row['author_id'],
+                             UserStats(user_id=row['author_id']))
+            stats[row['author_id']].comment_count = row['comment_count']
+        user_stats.delete()
+        UserStats.objects.bulk_create(stats.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully rebuilt stats for {len(stats)} users'))
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from api_yamdb.routers import use_replicas
+from .instrumentation import NPlusOneError, RequestMetrics, current_metrics
+
+logger = logging.getLogger('api.requests')
+
+
+def to_ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class AsyncCapableMiddleware:
+    """Middleware для синхронной и асинхронной цепочки.
+
+    Под ASGI обработчик вызывается без перехода в синхронный поток,
+    как MiddlewareMixin Django: __call__ возвращает корутину __acall__.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Метка, по которой Django считает экземпляр корутиной
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class QueryInstrumentationMiddleware(AsyncCapableMiddleware):
+    """Метрики запроса в заголовке Server-Timing и в журнале api.requests.
+
+    Учитываются число и время SQL-запросов, время аутентификации,
+    сериализации ответа в JSON и общее время. Запросы дольше
+    SLOW_REQUEST_THRESHOLD_MS журналируются вместе с их SQL.
+
+    При NPLUSONE_DETECTION = 'log' или 'raise' одинаковые по форме
+    SQL-запросы, повторенные больше NPLUSONE_THRESHOLD раз за запрос,
+    журналируются или приводят к NPlusOneError.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = self.get_metrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.get_metrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    @staticmethod
+    def get_metrics():
+        return RequestMetrics(
+            settings.SLOW_REQUEST_MAX_QUERIES,
+            track_shapes=bool(settings.NPLUSONE_DETECTION))
+
+    def finish(self, request, response, metrics):
+        total = metrics.total
+        response['Server-Timing'] = self.get_server_timing(metrics, total)
+        self.log(request, response, metrics, total)
+        self.check_repeated_queries(request, metrics)
+        return response
+
+    @staticmethod
+    def check_repeated_queries(request, metrics):
+        repeated = metrics.get_repeated_queries(settings.NPLUSONE_THRESHOLD)
+        if not repeated:
+            return
+        message = (f'N+1 queries in {request.method} {request.path}: '
+                   + '; '.join(f'{count} x {shape}'
+                               for shape, count in repeated))
+        if settings.NPLUSONE_DETECTION == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+    @staticmethod
+    def get_server_timing(metrics, total):
+        timings = [f'db;dur={to_ms(metrics.db_time)};'
+                   f'desc="{metrics.queries} queries"']
+        timings.extend(f'{name};dur={to_ms(duration)}'
+                       for name, duration in metrics.timings.items())
+        timings.append(f'total;dur={to_ms(total)}')
+        return ', '.join(timings)
+
+    @staticmethod
+    def log(request, response, metrics, total):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': to_ms(metrics.db_time),
+            **{f'{name}_ms': to_ms(duration)
+               for name, duration in metrics.timings.items()},
+            'total_ms': to_ms(total),
+        }
+        if to_ms(total) < settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.info(json.dumps(record))
+            return
+        record['sql'] = [{'sql': sql, 'ms': to_ms(duration)}
+                         for sql, duration in metrics.sql]
+        logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+class ReadReplicaMiddleware(AsyncCapableMiddleware):
+    """Направляет безопасные запросы к API в реплики.
+
+    После изменяющего запроса клиент на READ_REPLICA_STICKY_SECONDS
+    закрепляется за основной базой, чтобы видеть свои изменения.
+    Закрепление хранится в общем кеше CACHES['default'] и действует во
+    всех процессах; с кешем в памяти процесса (locmem) — только в том,
+    что выполнил запись. Вьюхи API — классы из api.views и асинхронные
+    вьюхи чтения с атрибутом cls.
+    """
+
+    @staticmethod
+    def get_pin_key(request):
+        client = (request.META.get('HTTP_AUTHORIZATION')
+                  or request.META.get('REMOTE_ADDR', ''))
+        return 'replica-pin:' + hashlib.sha1(client.encode()).hexdigest()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = use_replicas.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replicas.reset(token)
+        if self.should_pin(request, response):
+            self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        token = use_replicas.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            use_replicas.reset(token)
+        if self.should_pin(request, response):
+            await sync_to_async(self.pin)(request)
+        return response
+
+    @staticmethod
+    def should_pin(request, response):
+        return (request.method not in SAFE_METHODS
+                and response.status_code < 400)
+
+    def pin(self, request):
+        cache.set(self.get_pin_key(request), True,
+                  settings.READ_REPLICA_STICKY_SECONDS)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (request.method in ('GET', 'HEAD')
+                and view_class is not None
+                and view_class.__module__ == 'api.views'
+                and not cache.get(self.get_pin_key(request))):
+            use_replicas.set(True)
@@ -1,7 +1,40 @@
 from django.conf import settings
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 
+from api_yamdb.routers import use_replicas
+from .cache import cache_layer, get_data_version, make_key
 
-class DefaultPagination(PageNumberPagination):
+
+class CachedCountPaginator(Paginator):
+    """Paginator с COUNT из кеша на COUNT_CACHE_TIMEOUT секунд.
+
+    Ключ — версия данных каталога, чтение из реплик и SQL запроса
+    с параметрами, поэтому пагинатор годится только для моделей из
+    журнала изменений каталога: записи пользователей версию не меняют.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if not settings.COUNT_CACHE_TIMEOUT or query is None:
+            return super().count
+        try:
+            sql, params = query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        return cache_layer.get_or_set(
+            make_key('count', get_data_version(), use_replicas.get(), sql,
+                     params),
+            lambda: Paginator.count.func(self), settings.COUNT_CACHE_TIMEOUT)
+
+
+class CachedCountPagination(PageNumberPagination):
+    django_paginator_class = CachedCountPaginator
+
+
+class DefaultPagination(CachedCountPagination):
     page_size = settings.PAGE_SIZE_PAGINATION
     order_by = ('id', )
@@ -35,7 +35,7 @@ class AdminModeratorAuthorOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return (
-            obj.author == request.user
+            obj.author_id == request.user.pk
             or request.user.is_admin
             or request.user.is_moderate
             or request.user.is_superuser
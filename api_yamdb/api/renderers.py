@@ -0,0 +1,12 @@
+from rest_framework.renderers import JSONRenderer
+
+from .instrumentation import timed
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSON-рендерер с учетом времени сериализации в метриках запроса."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
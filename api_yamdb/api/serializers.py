@@ -2,10 +2,16 @@ from datetime import date
 
 from django.conf import settings
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import connection, transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from reviews.models import Title, Genre, Category, Review, Comment
-from users.models import User
+from reviews.models import Title, Genre, Category, Review, Comment, TitleGenre
+from reviews.signals import record_changes
+from reviews.slugs import category_slugs, genre_slugs
+from users.models import User, UserStats
+from .fields import CachedSlugRelatedField
+from .utils import get_expand_fields
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -22,17 +28,124 @@ class CategorySerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
+class TitleListSerializer(serializers.ListSerializer):
+    """Создание и замена произведений списком через bulk-операции.
+
+    Элементы с id полностью заменяют данные существующих произведений,
+    остальные создаются. Произведения и их связи с жанрами записываются
+    несколькими bulk-запросами в одной транзакции.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            if len(data) > settings.TITLES_BULK_MAX_SIZE:
+                raise serializers.ValidationError({
+                    'non_field_errors': [
+                        'Можно передать не больше '
+                        f'{settings.TITLES_BULK_MAX_SIZE} произведений.']})
+            self.preload_slugs(data)
+        items = super().to_internal_value(data)
+        ids = [item.get('id') if isinstance(item, dict) else None
+               for item in data]
+        self.validate_ids(ids)
+        for item, title_id in zip(items, ids):
+            item['id'] = title_id
+        return items
+
+    @staticmethod
+    def preload_slugs(data):
+        """Все slug запроса проверяются заранее одним запросом на модель."""
+        genres = set()
+        categories = set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get('genre'), list):
+                genres.update(slug for slug in item['genre']
+                              if isinstance(slug, str))
+            if isinstance(item.get('category'), str):
+                categories.add(item['category'])
+        genre_slugs.resolve(list(genres))
+        category_slugs.resolve(list(categories))
+
+    @staticmethod
+    def validate_ids(ids):
+        ids = [title_id for title_id in ids if title_id is not None]
+        if not all(isinstance(title_id, int) for title_id in ids):
+            raise serializers.ValidationError(
+                {'id': ['id произведения должен быть целым числом.']})
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                {'id': ['id произведений не должны повторяться.']})
+        existing = set(Title.objects.filter(id__in=ids,
+                                            deleted_at__isnull=True)
+                       .values_list('id', flat=True))
+        missing = [title_id for title_id in ids if title_id not in existing]
+        if missing:
+            raise serializers.ValidationError(
+                {'id': [f'Произведения не найдены: {missing}.']})
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            titles = [Title(id=item['id'],
+                            name=item['name'],
+                            year=item['year'],
+                            description=item.get('description', ''),
+                            category_id=item['category_id'])
+                      for item in validated_data]
+            new_titles = [title for title in titles if title.id is None]
+            old_titles = [title for title in titles if title.id is not None]
+            self.insert(new_titles)
+            if old_titles:
+                now = timezone.now()
+                for title in old_titles:
+                    title.updated_at = now
+                Title.objects.bulk_update(
+                    old_titles, ['name', 'year', 'description',
+                                 'category_id', 'updated_at'])
+                TitleGenre.objects.filter(
+                    title_id__in=[title.id for title in old_titles]).delete()
+            TitleGenre.objects.bulk_create(
+                TitleGenre(title_id=title.id, genre_id=genre_id)
+                for title, item in zip(titles, validated_data)
+                for genre_id in dict.fromkeys(item['genre']))
+            record_changes(Title._meta.model_name,
+                           [title.id for title in titles])
+        return titles
+
+    @staticmethod
+    def insert(titles):
+        """bulk_create с чтением id, если база не возвращает их сама.
+
+        Вставка идет в транзакции create: до ее конца других вставок нет,
+        а id с AUTOINCREMENT растут, поэтому последние len(titles) id —
+        новые записи в порядке вставки.
+        """
+        if not titles:
+            return
+        Title.objects.bulk_create(titles)
+        if connection.features.can_return_rows_from_bulk_insert:
+            return
+        ids = (Title.objects.order_by('-id')
+               .values_list('id', flat=True)[:len(titles)])
+        for title, title_id in zip(titles, reversed(ids)):
+            title.id = title_id
+
+
 class TitleSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
+        slug_map=genre_slugs,
         many=True,
         queryset=Genre.objects.all(),
         slug_field='slug'
     )
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
+        slug_map=category_slugs,
         queryset=Category.objects.all(),
         slug_field='slug'
     )
     rating = serializers.IntegerField(source='average_rating', read_only=True)
+    score_histogram = serializers.SerializerMethodField()
 
     def validate_year(self, data):
         if data > date.today().year:
@@ -47,15 +160,31 @@ class TitleSerializer(serializers.ModelSerializer):
                                               'для произведения')
         return data
 
+    def validate(self, data):
+        if 'category' in data:
+            data['category_id'] = data.pop('category')
+        return data
+
+    def get_score_histogram(self, obj):
+        histogram = dict.fromkeys(
+            range(settings.MIN_RATING, settings.MAX_RATING + 1), 0)
+        for counter in obj.score_counts.all():
+            histogram[counter.score] = counter.count
+        return histogram
+
     def to_representation(self, instance):
         self.fields['genre'] = GenreSerializer(many=True, read_only=True)
         self.fields['category'] = CategorySerializer(read_only=True)
+        if ('score_histogram'
+                not in get_expand_fields(self.context.get('request'))):
+            self.fields.pop('score_histogram', None)
         return super().to_representation(instance)
 
     class Meta:
         model = Title
         fields = ['id', 'name', 'year', 'rating',
-                  'description', 'genre', 'category']
+                  'description', 'genre', 'category', 'score_histogram']
+        list_serializer_class = TitleListSerializer
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -113,6 +242,14 @@ class SelfUserSerializer(serializers.ModelSerializer, BaseUserSerializer):
         lookup_field = 'username'
 
 
+class UserStatsSerializer(serializers.ModelSerializer):
+    average_score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = UserStats
+        fields = ('review_count', 'comment_count', 'average_score')
+
+
 class RegisterSerializer(serializers.Serializer, BaseUserSerializer):
     email = serializers.EmailField(max_length=settings.MAX_LENGTH_EMAIL,
                                    required=True)
@@ -0,0 +1,14 @@
+from django.db import transaction
+
+from .cache import cache_layer, get_token_version_key, get_user_key
+
+
+def user_changed(sender, instance, **kwargs):
+    """Сброс пользователя и версии его токенов в кеше после фиксации."""
+    keys = (get_user_key(instance.pk), get_token_version_key(instance.pk))
+
+    def delete_keys():
+        for key in keys:
+            cache_layer.delete(key)
+
+    transaction.on_commit(delete_keys)
@@ -0,0 +1,51 @@
+import heapq
+import math
+from collections import defaultdict
+
+
+def build_score_matrix(ratings):
+    """Строит разреженную матрицу оценок по столбцам и по строкам.
+
+    Столбец — оценки произведения {user_id: score},
+    строка — оценки пользователя [(title_id, score), ...].
+    """
+    columns = defaultdict(dict)
+    rows = defaultdict(list)
+    for user_id, title_id, score in ratings:
+        columns[title_id][user_id] = score
+        rows[user_id].append((title_id, score))
+    return columns, rows
+
+
+def iter_similar_titles(ratings, top_k, chunk_size):
+    """Косинусное сходство произведений, рассчитанное пачками.
+
+    Для каждой пачки из chunk_size произведений считается произведение
+    строк разреженной матрицы A^T·A только по ненулевым элементам,
+    поэтому в памяти одновременно находятся скалярные произведения
+    лишь одной пачки. Возвращает пачки вида
+    [(title_id, [(similar_id, score), ...]), ...].
+    """
+    columns, rows = build_score_matrix(ratings)
+    norms = {
+        title_id: math.sqrt(sum(score * score for score in column.values()))
+        for title_id, column in columns.items()
+    }
+    title_ids = sorted(columns)
+    for start in range(0, len(title_ids), chunk_size):
+        chunk = []
+        for title_id in title_ids[start:start + chunk_size]:
+            dots = defaultdict(float)
+            for user_id, score in columns[title_id].items():
+                for other_id, other_score in rows[user_id]:
+                    dots[other_id] += score * other_score
+            dots.pop(title_id, None)
+            norm = norms[title_id]
+            neighbours = heapq.nlargest(
+                top_k,
+                ((other_id, dot / (norm * norms[other_id]))
+                 for other_id, dot in dots.items()),
+                key=lambda item: (item[1], -item[0])
+            )
+            chunk.append((title_id, neighbours))
+        yield chunk
@@ -0,0 +1,83 @@
+from functools import partial
+
+from django.db.models import Avg
+
+from reviews.models import Category, ChangeLog, Comment, Genre, Review, Title
+from .serializers import CommentSerializer, ReviewSerializer, TitleSerializer
+
+
+def serialize_genres_categories(model, ids):
+    return {obj['id']: obj
+            for obj in model.objects.filter(id__in=ids)
+            .values('id', 'name', 'slug')}
+
+
+def serialize_titles(ids):
+    titles = (Title.objects.filter(id__in=ids, deleted_at__isnull=True)
+              .annotate(average_rating=Avg('reviews__score'))
+              .select_related('category')
+              .prefetch_related('genre'))
+    return {title.id: TitleSerializer(title).data for title in titles}
+
+
+def serialize_reviews(ids):
+    return {review.id: {**ReviewSerializer(review).data,
+                        'title': review.title_id}
+            for review in (Review.objects.filter(id__in=ids)
+                           .select_related('author'))}
+
+
+def serialize_comments(ids):
+    return {comment.id: {**CommentSerializer(comment).data,
+                         'review': comment.review_id}
+            for comment in (Comment.objects.filter(id__in=ids)
+                            .select_related('author'))}
+
+
+SERIALIZERS = {
+    Genre._meta.model_name: partial(serialize_genres_categories, Genre),
+    Category._meta.model_name: partial(serialize_genres_categories, Category),
+    Title._meta.model_name: serialize_titles,
+    Review._meta.model_name: serialize_reviews,
+    Comment._meta.model_name: serialize_comments,
+}
+
+
+def get_changes(since, limit):
+    """Изменения после курсора since в порядке записи в журнал.
+
+    Повторные изменения одного объекта внутри страницы схлопываются
+    в последнее, данные объектов загружаются одним запросом на модель.
+    Возвращает (изменения, следующий курсор, есть ли еще изменения).
+    """
+    entries = list(ChangeLog.objects.filter(id__gt=since)
+                   .order_by('id')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    next_cursor = entries[-1].id if entries else since
+
+    latest = {}
+    for entry in entries:
+        key = (entry.model_name, entry.object_id)
+        latest.pop(key, None)
+        latest[key] = entry
+    to_load = {}
+    for (model_name, object_id), entry in latest.items():
+        if entry.action == ChangeLog.UPDATE:
+            to_load.setdefault(model_name, set()).add(object_id)
+    data = {model_name: SERIALIZERS[model_name](ids)
+            for model_name, ids in to_load.items()}
+
+    changes = []
+    for (model_name, object_id), entry in latest.items():
+        obj = data.get(model_name, {}).get(object_id)
+        action = entry.action if obj is not None else ChangeLog.DELETE
+        changes.append({
+            'cursor': entry.id,
+            'model': model_name,
+            'id': object_id,
+            'action': action,
+            'changed_at': entry.changed_at,
+            'data': obj,
+        })
+    return changes, next_cursor, has_more
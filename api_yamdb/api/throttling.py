@@ -0,0 +1,142 @@
+"""Ограничение частоты запросов к регистрации и получению токена.
+
+Счетчики — скользящее окно из двух фиксированных окон в общем кеше:
+запросы прошлого окна учитываются с весом оставшейся доли окна. Проверка
+стоит одного get_many и одного add или incr в кеше независимо от лимита
+и не обращается к базе данных, в отличие от списка отметок времени
+SimpleRateThrottle.
+
+Точность счетчиков зависит от кеша: в файловом кеше incr — это get и set,
+и одновременные запросы теряют приращения, так что лимит приблизителен
+и может быть превышен. Для точного лимита нужен кеш с атомарным incr
+(Memcached, Redis).
+"""
+import hashlib
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Скользящее окно по ключу get_ident для области scope.
+
+    Лимиты берутся из AUTH_THROTTLE_RATES, None — без ограничения.
+    Счетчики раздельные для каждого эндпоинта.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(view)s:%(ident)s'
+
+    def get_rate(self):
+        return settings.AUTH_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident(request)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope,
+                                    'view': type(view).__name__,
+                                    'ident': ident}
+
+    def allow_request(self, request, view):
+        if not self.check(request, view):
+            return False
+        self.hit()
+        return True
+
+    def check(self, request, view):
+        """Проверка лимита без учета запроса в счетчике."""
+        self.current_key = None
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        self.current_key = f'{self.key}:{int(window)}'
+        previous_key = f'{self.key}:{int(window) - 1}'
+        counts = self.cache.get_many((previous_key, self.current_key))
+        self.previous = counts.get(previous_key, 0)
+        self.current = counts.get(self.current_key, 0)
+        self.offset = offset
+        return self.get_count(offset) < self.num_requests
+
+    def hit(self):
+        """Учет запроса, прошедшего check."""
+        if self.current_key is None:
+            return
+        if not self.cache.add(self.current_key, 1, self.duration * 2):
+            try:
+                self.cache.incr(self.current_key)
+            except ValueError:
+                self.cache.set(self.current_key, 1, self.duration * 2)
+
+    def get_count(self, offset):
+        """Оценка числа запросов за последние duration секунд."""
+        weight = 1 - offset / self.duration
+        return self.previous * weight + self.current
+
+    def wait(self):
+        remaining = self.duration - self.offset
+        if self.current >= self.num_requests or not self.previous:
+            return remaining
+        # Вес прошлого окна падает линейно до конца текущего окна
+        needed = 1 - (self.num_requests - self.current) / self.previous
+        return max(needed * self.duration - self.offset, 0)
+
+
+class AuthUserThrottle(SlidingWindowThrottle):
+    """Лимит на пользователя: на аккаунт из запроса или на токен."""
+
+    scope = 'auth_user'
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        if not isinstance(request.data, dict):
+            # Тело-список отклонит сериализатор с ответом 400
+            return None
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        # Имя из тела запроса еще не проверено: в ключ идет его хеш
+        return hashlib.md5(username.lower().encode()).hexdigest()
+
+
+class AuthIPThrottle(SlidingWindowThrottle):
+    """Лимит на IP-адрес клиента."""
+
+    scope = 'auth_ip'
+
+
+class AuthEndpointThrottle(SlidingWindowThrottle):
+    """Общий лимит эндпоинта для всех клиентов."""
+
+    scope = 'auth_endpoint'
+
+    def get_ident(self, request):
+        return 'all'
+
+
+AUTH_THROTTLES = (AuthEndpointThrottle, AuthIPThrottle, AuthUserThrottle)
+
+
+class AuthThrottleMixin:
+    """Лимиты AUTH_THROTTLES: запрос учитывается, только если прошел все.
+
+    Иначе отклоненные по IP запросы расходовали бы общий лимит
+    эндпоинта, и один клиент блокировал бы всех.
+    """
+
+    throttle_classes = AUTH_THROTTLES
+
+    def check_throttles(self, request):
+        throttles = self.get_throttles()
+        durations = [throttle.wait() for throttle in throttles
+                     if not throttle.check(request, self)]
+        if durations:
+            self.throttled(request, max(
+                (duration for duration in durations if duration is not None),
+                default=None))
+        for throttle in throttles:
+            throttle.hit()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
@@ -8,7 +9,10 @@ from .views import (GenreViewSet,
                     CommentViewSet,
                     GetTokenUser,
                     UserViewSet,
-                    RegisterUser)
+                    RegisterUser,
+                    SyncView,
+                    ExportView,
+                    MetricsView)
 
 router = DefaultRouter()
 
@@ -34,4 +38,12 @@ urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', RegisterUser.as_view()),
     path('v1/auth/token/', GetTokenUser.as_view()),
+    path('v1/sync/', SyncView.as_view()),
+    path('v1/export/<str:resource>/', ExportView.as_view()),
+    path('v1/metrics/', MetricsView.as_view()),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_urls import async_urlpatterns
+
+    urlpatterns.insert(0, path('v1/', include(async_urlpatterns)))
@@ -1,17 +1,55 @@
+import hmac
+import secrets
 from smtplib import SMTPException
 
 from django.conf import settings
+from django.core.cache import caches
 from django.core.mail import BadHeaderError, send_mail
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import get_user_claims
 
-def send_code(data):
+
+def get_code_key(user_id):
+    return f'confirmation-code:{user_id}'
+
+
+def make_confirmation_code(user_id):
+    """Новый код подтверждения на CONFIRMATION_CODE_TIMEOUT секунд.
+
+    Код хранится в кеше 'codes', а не в строке пользователя: повторная
+    регистрация не пишет в базу.
+    """
+    confirmation_code = secrets.token_hex(8)
+    caches['codes'].set(get_code_key(user_id), confirmation_code,
+                        settings.CONFIRMATION_CODE_TIMEOUT)
+    return confirmation_code
+
+
+def check_confirmation_code(user_id, confirmation_code):
+    """Сравнение с выданным кодом за постоянное время."""
+    expected = caches['codes'].get(get_code_key(user_id))
+    if expected is None:
+        return False
+    return hmac.compare_digest(expected.encode(),
+                               confirmation_code.encode())
+
+
+def delete_confirmation_code(user_id):
+    """Удаление кода после выдачи токена.
+
+    False — код уже удален: одновременный запрос с тем же кодом
+    получил токен первым.
+    """
+    return caches['codes'].delete(get_code_key(user_id))
+
+
+def send_code(data, confirmation_code):
     """Функция отправки письма с кодом регистрации."""
     user = data.username
     email = data.email
-    confirmation_code = data.confirmation_code
     subject = 'Welcome to YaMDb'
     message = (
         f'{user}, добро пожаловать на сайт YaMDb! Для получения '
@@ -28,9 +66,21 @@ def send_code(data):
 
 
 def get_tokens_for_user(user):
-    """Функция для выдачи токена пользователю."""
-    refresh = RefreshToken.for_user(user)
+    """Функция для выдачи токена пользователю.
 
+    Токен содержит роль и версию токенов: права проверяются без запроса
+    к базе, а смена роли отзывает выданные токены.
+    """
+    access_token = RefreshToken.for_user(user).access_token
+    for claim, value in get_user_claims(user).items():
+        access_token[claim] = value
     return {
-        'token': str(refresh.access_token),
+        'token': str(access_token),
     }
+
+
+def get_expand_fields(request):
+    """Функция для получения дополнительных полей из параметра ?expand=."""
+    if request is None:
+        return set()
+    return set(filter(None, request.query_params.get('expand', '').split(',')))
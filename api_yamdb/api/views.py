@@ -1,38 +1,49 @@
-import uuid
-
 from django.conf import settings
 from django.db import IntegrityError
 from django.db.models import Avg
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.views.generic import TemplateView
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import (ValidationError, NotFound,
                                        MethodNotAllowed)
 
+from api_yamdb.backends.pool import get_pool_stats
+from reviews.catalogue import get_catalogue
+from reviews.deletion import delete_object
 from reviews.models import Genre, Title, Category, Review
-from users.models import User
+from users.models import User, UserStats
 from .serializers import (GenreSerializer, TitleSerializer, CategorySerializer,
                           ReviewSerializer, CommentSerializer, UserSerializer,
                           RegisterSerializer, TokenSerializer,
-                          SelfUserSerializer)
-from .utils import send_code, get_tokens_for_user
-from .paginations import DefaultPagination
+                          SelfUserSerializer, UserStatsSerializer)
+from .cache import CachedReadMixin, cache_layer
+from .utils import (send_code, get_tokens_for_user, get_expand_fields,
+                    make_confirmation_code, check_confirmation_code,
+                    delete_confirmation_code)
+from .paginations import CachedCountPagination, DefaultPagination
 from .permissions import AdminOnly, SelfUserOnly, AdminModeratorAuthorOnly
-from .filters import TitleFilter
+from .filters import SNAPSHOT_FIELDS, TitleFilter
+from .sync import get_changes
+from .throttling import AuthThrottleMixin
+from .exporters import EXPORTS, FORMATS, CSV, get_filename, iter_export
 
 
 class RedocView(TemplateView):
     template_name = 'redoc.html'
 
 
-class BaseViewSet(viewsets.ModelViewSet):
+class BaseViewSet(CachedReadMixin, viewsets.ModelViewSet):
     pagination_class = DefaultPagination
+    safe_actions = ('list', 'retrieve')
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in self.safe_actions:
             return [permissions.AllowAny()]
         return [AdminOnly()]
 
@@ -66,14 +77,71 @@ class TitleViewSet(BaseViewSet):
     filterset_class = TitleFilter
     http_method_names = ['get', 'post', 'patch', 'delete']
     order_by = ('id', 'name')
+    safe_actions = ('list', 'retrieve', 'similar')
 
     def get_queryset(self):
-        return (self.queryset.annotate(average_rating=Avg('reviews__score'))
-                .order_by('id', 'name'))
+        queryset = (self.queryset
+                    .filter(deleted_at__isnull=True)
+                    .select_related('category')
+                    .prefetch_related('genre')
+                    .annotate(average_rating=Avg('reviews__score'))
+                    .order_by('id', 'name'))
+        if 'score_histogram' in get_expand_fields(self.request):
+            queryset = queryset.prefetch_related('score_counts')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        snapshot = None
+        if settings.CATALOGUE_SNAPSHOT and not get_expand_fields(request):
+            snapshot = get_catalogue()
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        return self.list_snapshot(request, snapshot)
+
+    def list_snapshot(self, request, snapshot):
+        """Фильтрация и пагинация по снимку каталога без запросов к базе."""
+        filterset = TitleFilter(request.query_params,
+                                queryset=Title.objects.none(),
+                                request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        conditions = [(SNAPSHOT_FIELDS[name], value) for name, value
+                      in filterset.form.cleaned_data.items()
+                      if value not in (None, '')]
+        page = self.paginate_queryset(snapshot.filter(conditions))
+        serializer = self.get_serializer(snapshot.get_titles(page),
+                                         many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def perform_destroy(self, instance):
+        delete_object(instance)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Создание и замена произведений списком (только администратор)."""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        ids = [title.id for title in serializer.save()]
+        titles = self.get_queryset().in_bulk(ids)
+        return Response(
+            self.get_serializer([titles[pk] for pk in ids], many=True).data,
+            status=status.HTTP_201_CREATED)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Похожие произведения из заранее рассчитанной таблицы."""
+        title = self.get_object()
+        similar_ids = list(title.similarities.order_by('-score')
+                           .values_list('similar_id', flat=True))
+        titles = self.get_queryset().in_bulk(similar_ids)
+        serializer = self.get_serializer(
+            [titles[pk] for pk in similar_ids if pk in titles], many=True)
+        return Response(serializer.data)
 
 
-class CommentReviewBaseViewSet(viewsets.ModelViewSet):
+class CommentReviewBaseViewSet(CachedReadMixin, viewsets.ModelViewSet):
     permission_classes = (AdminModeratorAuthorOnly,)
+    pagination_class = CachedCountPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
 
@@ -82,17 +150,22 @@ class ReviewViewSet(CommentReviewBaseViewSet):
 
     def get_queryset(self):
         title_id = self.kwargs.get('title_id')
-        return Review.objects.filter(title_id=title_id)
+        return Review.objects.filter(
+            title_id=title_id, title__deleted_at__isnull=True,
+            author__deleted_at__isnull=True).select_related('author')
 
     def perform_create(self, serializer):
         title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
+        title = get_object_or_404(Title, id=title_id, deleted_at__isnull=True)
         if Review.objects.filter(title=title,
                                  author=self.request.user).exists():
             raise ValidationError(
                 'Вы уже оставляли отзыв на данное произведение.')
         serializer.save(author=self.request.user, title=title)
 
+    def perform_destroy(self, instance):
+        delete_object(instance)
+
 
 class CommentViewSet(CommentReviewBaseViewSet):
     serializer_class = CommentSerializer
@@ -101,15 +174,17 @@ class CommentViewSet(CommentReviewBaseViewSet):
         """Проверка и возвращение отзыва при его наличии."""
         review_id = self.kwargs.get('review_id')
         title_id = self.kwargs.get('title_id')
-        review = get_object_or_404(Review, id=review_id)
-        title = get_object_or_404(Title, id=title_id)
+        review = get_object_or_404(Review, id=review_id,
+                                   author__deleted_at__isnull=True)
+        title = get_object_or_404(Title, id=title_id, deleted_at__isnull=True)
         if review.title != title:
             raise NotFound('Данного ревью не существует.')
         return review
 
     def get_queryset(self):
         review = self.get_review()
-        return review.comments.all()
+        return review.comments.filter(
+            author__deleted_at__isnull=True).select_related('author')
 
     def perform_create(self, serializer):
         review = self.get_review()
@@ -122,7 +197,7 @@ class UserViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username', )
     permission_classes = (AdminOnly,)
-    queryset = User.objects.all()
+    queryset = User.objects.filter(deleted_at__isnull=True)
     lookup_field = 'username'
     http_method_names = ['get', 'post', 'patch', 'delete']
 
@@ -132,16 +207,19 @@ class UserViewSet(viewsets.ModelViewSet):
         elif (self.action == 'destroy'
               and self.kwargs['username'] == settings.USER_SELF_IDENTIFIER):
             raise MethodNotAllowed('DELETE')
-        elif (self.action in ['retrieve', 'partial_update']
+        elif (self.action in ['retrieve', 'partial_update', 'stats']
               and self.kwargs['username'] == settings.USER_SELF_IDENTIFIER):
             return (SelfUserOnly(),)
         return super().get_permissions()
 
     def get_user(self):
         if self.kwargs['username'] == settings.USER_SELF_IDENTIFIER:
-            return User.objects.get(username=self.request.user.username)
+            return User.objects.get(pk=self.request.user.pk)
         return self.get_object()
 
+    def perform_destroy(self, instance):
+        delete_object(instance)
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_user()
         serializer = self.get_serializer(instance)
@@ -156,6 +234,14 @@ class UserViewSet(viewsets.ModelViewSet):
         self.perform_update(serializer)
         return Response(serializer.data)
 
+    @action(detail=True)
+    def stats(self, request, username=None):
+        """Статистика активности пользователя из счетчиков."""
+        user = self.get_user()
+        stats = (UserStats.objects.filter(user=user).first()
+                 or UserStats(user=user))
+        return Response(UserStatsSerializer(stats).data)
+
     def get_serializer_class(self):
         if not (self.request.user.is_superuser
                 or self.request.user.is_admin):
@@ -163,35 +249,99 @@ class UserViewSet(viewsets.ModelViewSet):
         return super().get_serializer_class()
 
 
-class RegisterUser(APIView):
+class RegisterUser(AuthThrottleMixin, APIView):
     permission_classes = (permissions.AllowAny,)
+    user_fields = ('id', 'username', 'email')
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         try:
-            user, create = User.objects.get_or_create(
+            user, create = User.objects.only(*self.user_fields).get_or_create(
                 **serializer.validated_data)
         except IntegrityError:
             UserSerializer(data=request.data).is_valid(
                 raise_exception=True)
             return Response(serializer.errors,
                             status=status.HTTP_400_BAD_REQUEST)
-        user.confirmation_code = uuid.uuid4().hex[-16:]
-        user.save()
-        send_code(user)
+        send_code(user, make_confirmation_code(user.pk))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class GetTokenUser(APIView):
+class GetTokenUser(AuthThrottleMixin, APIView):
+    # Поля для get_tokens_for_user
+    user_fields = ('id', 'role', 'is_superuser', 'is_active',
+                   'token_version')
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = get_object_or_404(User, username=request.data['username'])
-        if request.data['confirmation_code'] == user.confirmation_code:
+        user = get_object_or_404(
+            User.objects.only(*self.user_fields),
+            username=serializer.validated_data['username'],
+            deleted_at__isnull=True)
+        if (check_confirmation_code(
+                user.pk, serializer.validated_data['confirmation_code'])
+                and delete_confirmation_code(user.pk)):
             token = get_tokens_for_user(user)
             return Response(token, status=status.HTTP_200_OK)
         return Response(
             {'confirmation_code': 'Неправильный код доступа'},
             status=status.HTTP_400_BAD_REQUEST)
+
+
+class SyncView(APIView):
+    """Лента изменений каталога после курсора ?since=."""
+    permission_classes = (AdminOnly,)
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(
+                int(request.query_params.get('limit',
+                                             settings.SYNC_PAGE_SIZE)),
+                settings.SYNC_MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError('Параметры since и limit должны быть '
+                                  'целыми числами.')
+        if since < 0 or limit < 1:
+            raise ValidationError('Параметры since и limit должны быть '
+                                  'положительными.')
+        changes, next_cursor, has_more = get_changes(since, limit)
+        return Response({'next': next_cursor,
+                         'has_more': has_more,
+                         'results': changes})
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка данных в CSV или NDJSON (?fmt=ndjson)."""
+    permission_classes = (AdminOnly,)
+    content_types = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+    def get(self, request, resource):
+        if resource not in EXPORTS:
+            raise NotFound('Неизвестный тип выгрузки.')
+        export_format = request.query_params.get('fmt', CSV)
+        if export_format not in FORMATS:
+            raise ValidationError(
+                f'Формат выгрузки должен быть одним из: {", ".join(FORMATS)}')
+        response = StreamingHttpResponse(
+            iter_export(resource, export_format, settings.EXPORT_CHUNK_SIZE),
+            content_type=self.content_types[export_format])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{get_filename(resource, export_format)}"')
+        return response
+
+
+class MetricsView(APIView):
+    """Метрики процесса: пулы соединений и снимок каталога."""
+    permission_classes = (AdminOnly,)
+
+    def get(self, request):
+        metrics = {'db_pools': get_pool_stats(),
+                   'cache': {'local_entries': len(cache_layer.local),
+                             'coalesced': cache_layer.flight.shared}}
+        snapshot = get_catalogue() if settings.CATALOGUE_SNAPSHOT else None
+        if snapshot is not None:
+            metrics['catalogue'] = snapshot.memory_usage()
+        return Response(metrics)
@@ -0,0 +1,163 @@
+import threading
+import time
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Пул соединений с проверкой здоровья, max-idle и max-lifetime.
+
+    connect — функция открытия нового соединения. Соединения,
+    простоявшие дольше max_idle или прожившие дольше max_lifetime
+    секунд, закрываются вместо выдачи.
+    """
+
+    def __init__(self, connect, max_size=10, max_idle=300,
+                 max_lifetime=3600, timeout=10, health_check=True):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check = health_check
+        self.condition = threading.Condition()
+        self.idle = []
+        self.created_at = {}
+        self.size = 0
+        self.in_use = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.opened = 0
+        self.closed = 0
+
+    def acquire(self):
+        started = time.monotonic()
+        waited = False
+        with self.condition:
+            while True:
+                conn = self._take_idle()
+                if conn is not None:
+                    break
+                if self.size < self.max_size:
+                    self.size += 1
+                    break
+                if not waited:
+                    waited = True
+                    self.waits += 1
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    self.timeouts += 1
+                    self.wait_time += time.monotonic() - started
+                    raise PoolTimeout(
+                        f'No free connection in {self.timeout} seconds')
+            if waited:
+                self.wait_time += time.monotonic() - started
+            self.in_use += 1
+        if conn is None:
+            try:
+                conn = self.connect()
+            except Exception:
+                with self.condition:
+                    self.size -= 1
+                    self.in_use -= 1
+                    self.condition.notify()
+                raise
+            with self.condition:
+                self.created_at[id(conn)] = time.monotonic()
+                self.opened += 1
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self.condition:
+            self.in_use -= 1
+            if self._expired(conn, time.monotonic()):
+                self._discard(conn)
+            else:
+                self.idle.append((conn, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, conn):
+        """Закрытие выданного соединения без возврата в пул."""
+        with self.condition:
+            self.in_use -= 1
+            self._discard(conn)
+            self.condition.notify()
+
+    def close_all(self):
+        with self.condition:
+            while self.idle:
+                self._discard(self.idle.pop()[0])
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 6),
+                'timeouts': self.timeouts,
+                'opened': self.opened,
+                'closed': self.closed,
+            }
+
+    def _take_idle(self):
+        now = time.monotonic()
+        while self.idle:
+            conn, released_at = self.idle.pop()
+            if (now - released_at > self.max_idle
+                    or self._expired(conn, now)
+                    or not self._healthy(conn)):
+                self._discard(conn)
+                continue
+            return conn
+        return None
+
+    def _expired(self, conn, now):
+        return now - self.created_at.get(id(conn), now) > self.max_lifetime
+
+    def _healthy(self, conn):
+        if not self.health_check:
+            return True
+        try:
+            conn.execute('SELECT 1')
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, conn):
+        self.created_at.pop(id(conn), None)
+        self.size -= 1
+        self.closed += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def get_pool(alias, connect, options):
+    """Пул соединений для алиаса базы, создается при первом обращении."""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                connect,
+                max_size=options.get('MAX_SIZE', 10),
+                max_idle=options.get('MAX_IDLE', 300),
+                max_lifetime=options.get('MAX_LIFETIME', 3600),
+                timeout=options.get('TIMEOUT', 10),
+                health_check=options.get('HEALTH_CHECK', True),
+            )
+        return _pools[alias]
+
+
+def get_pool_stats():
+    with _pools_lock:
+        return {alias: pool.stats() for alias, pool in _pools.items()}
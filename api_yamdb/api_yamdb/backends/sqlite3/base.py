@@ -0,0 +1,43 @@
+from functools import partial
+
+from django.db.backends.sqlite3 import base
+
+from ..pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с настройкой PRAGMA и необязательным пулом соединений.
+
+    PRAGMA из DATABASES[...]['PRAGMAS'] действуют на соединение, поэтому
+    применяются сразу после его открытия. При DATABASES[...]['POOL']
+    ['ENABLED'] соединения берутся из пула и возвращаются в него
+    вместо закрытия.
+    """
+
+    @property
+    def pool_options(self):
+        return self.settings_dict.get('POOL', {})
+
+    def open_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options.get('ENABLED'):
+            return self.open_connection(conn_params)
+        pool = get_pool(self.alias,
+                        partial(self.open_connection, conn_params),
+                        self.pool_options)
+        return pool.acquire()
+
+    def _close(self):
+        if self.connection is None or not self.pool_options.get('ENABLED'):
+            return super()._close()
+        pool = get_pool(self.alias, None, self.pool_options)
+        with self.wrap_database_errors:
+            if self.is_usable():
+                pool.release(self.connection)
+            else:
+                pool.discard(self.connection)
@@ -0,0 +1,25 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+use_replicas = ContextVar('use_replicas', default=False)
+
+
+class ReplicaRouter:
+    """Чтение из реплик для запросов, отмеченных ReadReplicaMiddleware.
+
+    Запись и чтение вне таких запросов всегда идут в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.REPLICA_DATABASES and use_replicas.get():
+            return random.choice(settings.REPLICA_DATABASES)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -31,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,6 +40,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -61,16 +64,136 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Асинхронные вьюхи чтения каталога, по умолчанию включены в asgi.py
+
+ASYNC_READ_VIEWS = os.environ.get('YAMDB_ASYNC_READS', '') == '1'
+
+# Список произведений из снимка каталога в памяти процесса
+
+CATALOGUE_SNAPSHOT = os.environ.get('YAMDB_CATALOGUE_SNAPSHOT', '') == '1'
+
+# Файл снимка из build_catalogue_snapshot, общий для процессов через mmap;
+# пустое значение — снимок в памяти каждого процесса
+
+CATALOGUE_SNAPSHOT_FILE = os.environ.get('YAMDB_CATALOGUE_FILE', '')
+
 
 # Database
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,  # 64 МБ
+    'mmap_size': 268435456,  # 256 МБ
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'api_yamdb.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'CONN_MAX_AGE': int(os.environ.get('YAMDB_CONN_MAX_AGE', 60)),
+        'POOL': {
+            'ENABLED': os.environ.get('YAMDB_DB_POOL', '') == '1',
+            'MAX_SIZE': 10,
+            'MAX_IDLE': 300,
+            'MAX_LIFETIME': 3600,
+            'TIMEOUT': 10,
+            'HEALTH_CHECK': True,
+        },
     }
 }
 
+# Реплики для чтения: YAMDB_DB_REPLICAS=replica1.sqlite3,replica2.sqlite3
+
+REPLICA_DATABASES = []
+
+for number, name in enumerate(
+        filter(None, os.environ.get('YAMDB_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['api_yamdb.routers.ReplicaRouter']
+
+READ_REPLICA_STICKY_SECONDS = 5
+
+# Общий для процессов кеш (L2): по умолчанию файловый с атомарным add,
+# в продакшене —
+# YAMDB_CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# и YAMDB_CACHE_LOCATION=host:port
+
+CACHE_BACKEND = os.environ.get(
+    'YAMDB_CACHE_BACKEND',
+    'api_yamdb.backends.filebased.FileBasedCache')
+
+CACHE_LOCATION = os.environ.get('YAMDB_CACHE_LOCATION',
+                                str(BASE_DIR / '.cache'))
+
+# Коды подтверждения живут CONFIRMATION_CODE_TIMEOUT секунд в отдельном
+# кеше 'codes', чтобы вытеснение ответов API не удаляло коды
+
+CONFIRMATION_CODE_TIMEOUT = 3600
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    'codes': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get(
+            'YAMDB_CODES_CACHE_LOCATION',
+            os.path.join(CACHE_LOCATION, 'codes')
+            if CACHE_BACKEND.endswith('FileBasedCache') else CACHE_LOCATION),
+        'KEY_PREFIX': 'codes',
+        'TIMEOUT': CONFIRMATION_CODE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+# Кеш в памяти процесса (L1) поверх CACHES: время жизни записи и размер
+
+CACHE_L1_TIMEOUT = 2
+
+CACHE_L1_MAX_ENTRIES = 10000
+
+# Сколько ждать значение, которое вычисляет другой процесс
+
+CACHE_LOCK_TIMEOUT = 10
+
+# Время жизни ответов list/retrieve, пользователей из JWT и COUNT пагинации;
+# 0 — без кеша
+
+RESPONSE_CACHE_TIMEOUT = 60
+
+AUTH_CACHE_TIMEOUT = 60
+
+COUNT_CACHE_TIMEOUT = 300
+
+# Лимиты регистрации и получения токена на аккаунт, IP и весь эндпоинт:
+# 'число/период', период — s, m, h или d; None — без ограничения
+
+AUTH_THROTTLE_RATES = {
+    'auth_user': os.environ.get('YAMDB_AUTH_RATE_USER', '10/m'),
+    'auth_ip': os.environ.get('YAMDB_AUTH_RATE_IP', '60/m'),
+    'auth_endpoint': os.environ.get('YAMDB_AUTH_RATE_ENDPOINT', '3000/m'),
+}
+
+# Одновременные одинаковые запросы чтения ждут одного вычисления ответа
+
+READ_COALESCING = True
+
 
 # Password validation
 
@@ -113,10 +236,17 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.TimedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # Число прокси перед приложением: IP клиента для лимитов берется
+    # из X-Forwarded-For только от них, 0 — из REMOTE_ADDR
+    'NUM_PROXIES': int(os.environ.get('YAMDB_NUM_PROXIES', 0)),
 }
 
 SIMPLE_JWT = {
@@ -157,3 +287,54 @@ MAX_LENGHT_NAME = 256
 MAX_LENGHT_SLUG = 50
 
 PAGE_SIZE_PAGINATION = 10
+
+SIMILAR_TITLES_TOP_K = 10
+
+SIMILARITY_CHUNK_SIZE = 500
+
+SYNC_PAGE_SIZE = 500
+
+SYNC_MAX_PAGE_SIZE = 5000
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Наибольшее число произведений в одном запросе /titles/bulk/
+
+TITLES_BULK_MAX_SIZE = 5000
+
+# Удаление произведений и пользователей: 'immediate' — каскадом сразу,
+# 'deferred' — скрыть и удалить зависимые записи командой purge_deleted
+
+DELETION_MODE = os.environ.get('YAMDB_DELETION_MODE', 'immediate')
+
+PURGE_BATCH_SIZE = 500
+
+IMPORT_MANIFEST_DIR = BASE_DIR / '.import_manifest'
+
+IMPORT_BATCH_SIZE = 1000
+
+SLOW_REQUEST_THRESHOLD_MS = 500
+
+SLOW_REQUEST_MAX_QUERIES = 100
+
+# Поиск N+1: '' — выключен, 'log' — журналировать, 'raise' — исключение
+
+NPLUSONE_DETECTION = os.environ.get('YAMDB_NPLUSONE', '')
+
+NPLUSONE_THRESHOLD = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('YAMDB_REQUEST_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
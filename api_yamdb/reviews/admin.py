@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Genre, Title, Category, Review, Comment, TitleGenre
+from .models import (Genre, Title, Category, Review, Comment, TitleGenre,
+                     DeletionJob)
 
 
 class TitleGenreInline(admin.TabularInline):
@@ -37,8 +38,15 @@ class ReviewAdmin(admin.ModelAdmin):
     search_fields = ('title', 'author')
 
 
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('model_name', 'object_id', 'status', 'deleted_count',
+                    'created_at', 'finished_at')
+    list_filter = ('model_name', 'status')
+
+
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment)
+admin.site.register(DeletionJob, DeletionJobAdmin)
@@ -0,0 +1,556 @@
+"""Снимок каталога произведений в памяти процесса или в общем файле.
+
+Включается настройкой CATALOGUE_SNAPSHOT. Поля произведений хранятся
+по столбцам в array, названия — в списке строк, наборы жанров —
+в общих кортежах: одинаковые наборы у разных произведений хранятся
+один раз. Запись в журнал изменений увеличивает счетчик в кеше, и снимок
+догружает из ChangeLog только измененные произведения.
+
+С CATALOGUE_SNAPSHOT_FILE снимок читается из файла, собранного командой
+build_catalogue_snapshot: процессы отображают его через mmap, и страницы
+файла в памяти общие для всех процессов. Файл обновляется только
+пересборкой, процессы подменяют его при появлении новой версии.
+"""
+import abc
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Sum
+
+from .models import (Category, ChangeLog, Genre, Title, TitleGenre,
+                     TitleScoreCount)
+
+VERSION_KEY = 'catalogue-version'
+GENERATION_KEY = 'catalogue-generation'
+
+# При большем числе изменений снимок загружается заново целиком.
+FULL_RELOAD_CHANGES = 1000
+
+NO_CATEGORY = 0
+
+FILE_MAGIC = b'YAMDBCAT'
+FILE_FORMAT = 1
+# Магия, формат, версия (курсор журнала), число произведений, число
+# связей с жанрами, размеры названий и справочника жанров и категорий.
+FILE_HEADER = struct.Struct('<8sIIqqqqq')
+FILE_ALIGN = 8
+
+
+def bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def new_generation():
+    return uuid.uuid4().hex
+
+
+def get_versions():
+    """Счетчик изменений и поколение каталога из кеша.
+
+    Поколение — случайная строка, а не счетчик: после очистки кеша
+    появляется новое поколение, и счетчик, начатый заново, не совпадет
+    со старыми версиями в процессах. Поколение создается через add,
+    и одновременные первые запросы получают одно и то же значение.
+    """
+    versions = cache.get_many((VERSION_KEY, GENERATION_KEY))
+    if GENERATION_KEY not in versions:
+        cache.add(GENERATION_KEY, new_generation(), None)
+        versions = cache.get_many((VERSION_KEY, GENERATION_KEY))
+    return versions.get(VERSION_KEY, 0), versions.get(GENERATION_KEY)
+
+
+def notify_changed():
+    """Увеличение счетчика изменений после фиксации транзакции."""
+    transaction.on_commit(lambda: bump(VERSION_KEY))
+
+
+class TitleRow:
+    """Произведение из снимка для TitleSerializer."""
+
+    __slots__ = ('id', 'name', 'year', 'description', 'category', 'genre',
+                 'average_rating')
+
+    def __init__(self, id, name, year, description, category, genre,
+                 average_rating):
+        self.id = id
+        self.name = name
+        self.year = year
+        self.description = description
+        self.category = category
+        self.genre = genre
+        self.average_rating = average_rating
+
+
+class BaseCatalogue(abc.ABC):
+    """Фильтрация и выдача произведений по столбцам снимка.
+
+    Наследники задают столбцы ids, years, category_ids, score_sums,
+    review_counts, словари genres, categories, genre_slugs,
+    category_slugs и доступ к названиям и наборам жанров.
+    """
+
+    @abc.abstractmethod
+    def get_name(self, position):
+        """Название произведения в позиции position."""
+
+    @abc.abstractmethod
+    def get_genre_ids(self, position):
+        """Кортеж id жанров произведения в позиции position."""
+
+    @abc.abstractmethod
+    def memory_usage(self):
+        """Размер снимка для метрик, см. get_usage."""
+
+    def filter_genre(self, positions, genre_id):
+        return [position for position in positions
+                if genre_id in self.get_genre_ids(position)]
+
+    def filter_name(self, positions, name):
+        return [position for position in positions
+                if self.get_name(position) == name]
+
+    def filter(self, conditions):
+        """id произведений по условиям [(поле, значение)] TitleFilter.
+
+        Поля: name, year, genre и category (по slug). Позиции меняются
+        при обновлении снимка, поэтому за пределы блокировки выходят id.
+        """
+        with self.lock:
+            if not conditions:
+                return self.ids[:]
+            positions = range(len(self.ids))
+            for field, value in conditions:
+                if field == 'genre':
+                    positions = self.filter_genre(
+                        positions, self.genre_slugs.get(value))
+                elif field == 'name':
+                    positions = self.filter_name(positions, value)
+                else:
+                    if field == 'year':
+                        column = self.years
+                    else:
+                        column = self.category_ids
+                        value = self.category_slugs.get(value)
+                    positions = [position for position in positions
+                                 if column[position] == value]
+            return [self.ids[position] for position in positions]
+
+    def get_titles(self, title_ids):
+        """Произведения по id; описания читаются одним запросом.
+
+        Удаленные после filter произведения пропускаются.
+        """
+        with self.lock:
+            rows = []
+            for title_id in title_ids:
+                position = bisect_left(self.ids, title_id)
+                if (position == len(self.ids)
+                        or self.ids[position] != title_id):
+                    continue
+                rows.append((title_id, self.get_name(position),
+                             self.years[position],
+                             self.category_ids[position],
+                             self.get_genre_ids(position),
+                             self.score_sums[position],
+                             self.review_counts[position]))
+            genres = self.genres
+            categories = self.categories
+        descriptions = dict(Title.objects.filter(
+            id__in=[row[0] for row in rows]).values_list('id', 'description'))
+        ranks = {genre_id: rank for rank, genre_id in enumerate(genres)}
+        return [
+            TitleRow(title_id, name, year, descriptions.get(title_id, ''),
+                     categories.get(category_id),
+                     [genres[genre_id] for genre_id in sorted(
+                         (genre_id for genre_id in genre_ids
+                          if genre_id in genres), key=ranks.__getitem__)],
+                     score_sum / review_count if review_count else None)
+            for (title_id, name, year, category_id, genre_ids, score_sum,
+                 review_count) in rows]
+
+    def get_usage(self, size):
+        titles = len(self.ids)
+        return {
+            'titles': titles,
+            'bytes': size,
+            'bytes_per_100k_titles': (round(size * 100000 / titles)
+                                      if titles else 0),
+        }
+
+
+class CatalogueSnapshot(BaseCatalogue):
+    """Произведения без описаний, жанры и категории одного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.generation = None
+        self.clear()
+
+    def clear(self):
+        self.cursor = 0
+        self.ids = array('q')
+        self.names = []
+        self.years = array('i')
+        self.category_ids = array('q')
+        self.genre_sets = []
+        self.score_sums = array('q')
+        self.review_counts = array('q')
+        self.shared_genre_sets = {}
+        self.genres = {}
+        self.categories = {}
+        self.genre_slugs = {}
+        self.category_slugs = {}
+
+    def invalidate(self):
+        """Полная перезагрузка снимка во всех процессах."""
+        cache.set(GENERATION_KEY, new_generation(), None)
+
+    def refresh(self):
+        version, generation = get_versions()
+        with self.lock:
+            if self.generation != generation:
+                self.load()
+            elif self.version != version:
+                self.apply_changes()
+            self.version = version
+            self.generation = generation
+        return self
+
+    def load(self):
+        self.clear()
+        self.cursor = (ChangeLog.objects.aggregate(last=Max('id'))['last']
+                       or 0)
+        self.load_taxonomy()
+        for row in self.fetch_rows():
+            self.append(*row)
+
+    def load_taxonomy(self):
+        self.genres = {genre.id: genre for genre in Genre.objects.all()}
+        self.categories = {category.id: category
+                           for category in Category.objects.all()}
+        self.genre_slugs = {genre.slug: genre.id
+                            for genre in self.genres.values()}
+        self.category_slugs = {category.slug: category.id
+                               for category in self.categories.values()}
+
+    def apply_changes(self):
+        entries = list(ChangeLog.objects.filter(id__gt=self.cursor)
+                       .order_by('id')
+                       .values_list('id', 'model_name', 'object_id')
+                       [:FULL_RELOAD_CHANGES + 1])
+        if len(entries) > FULL_RELOAD_CHANGES:
+            self.load()
+            return
+        if not entries:
+            return
+        models = {model_name for _, model_name, _ in entries}
+        if {Genre._meta.model_name, Category._meta.model_name} & models:
+            self.load_taxonomy()
+        title_ids = {object_id for _, model_name, object_id in entries
+                     if model_name == Title._meta.model_name}
+        if title_ids:
+            for row in self.fetch_rows(title_ids):
+                title_ids.discard(row[0])
+                self.set(*row)
+            for title_id in title_ids:
+                self.remove(title_id)
+        self.cursor = entries[-1][0]
+
+    def fetch_rows(self, title_ids=None):
+        """Строки произведений с жанрами и суммами оценок по возрастанию id.
+
+        Без title_ids загружается весь каталог.
+        """
+        titles = Title.objects.filter(deleted_at__isnull=True)
+        links = TitleGenre.objects.all()
+        counts = TitleScoreCount.objects.all()
+        if title_ids is not None:
+            titles = titles.filter(id__in=title_ids)
+            links = links.filter(title_id__in=title_ids)
+            counts = counts.filter(title_id__in=title_ids)
+        genre_sets = defaultdict(list)
+        for title_id, genre_id in links.values_list('title_id', 'genre_id'):
+            genre_sets[title_id].append(genre_id)
+        scores = {
+            row['title_id']: (row['score_sum'], row['review_count'])
+            for row in counts.order_by().values('title_id').annotate(
+                score_sum=Sum(F('score') * F('count')),
+                review_count=Sum('count'))}
+        rows = (titles.order_by('id')
+                .values_list('id', 'name', 'year', 'category_id')
+                .iterator())
+        for title_id, name, year, category_id in rows:
+            yield (title_id, name, year, category_id,
+                   genre_sets.get(title_id, ()),
+                   *scores.get(title_id, (0, 0)))
+
+    def share_genre_set(self, genre_ids):
+        genre_ids = tuple(sorted(set(genre_ids)))
+        return self.shared_genre_sets.setdefault(genre_ids, genre_ids)
+
+    def append(self, title_id, name, year, category_id, genre_ids,
+               score_sum, review_count):
+        self.ids.append(title_id)
+        self.names.append(name)
+        self.years.append(year)
+        self.category_ids.append(category_id or NO_CATEGORY)
+        self.genre_sets.append(self.share_genre_set(genre_ids))
+        self.score_sums.append(score_sum or 0)
+        self.review_counts.append(review_count or 0)
+
+    def set(self, title_id, name, year, category_id, genre_ids,
+            score_sum, review_count):
+        position = bisect_left(self.ids, title_id)
+        if position == len(self.ids) or self.ids[position] != title_id:
+            self.ids.insert(position, title_id)
+            self.names.insert(position, name)
+            self.years.insert(position, year)
+            self.category_ids.insert(position, NO_CATEGORY)
+            self.genre_sets.insert(position, ())
+            self.score_sums.insert(position, 0)
+            self.review_counts.insert(position, 0)
+        self.names[position] = name
+        self.years[position] = year
+        self.category_ids[position] = category_id or NO_CATEGORY
+        self.genre_sets[position] = self.share_genre_set(genre_ids)
+        self.score_sums[position] = score_sum or 0
+        self.review_counts[position] = review_count or 0
+
+    def get_name(self, position):
+        return self.names[position]
+
+    def get_genre_ids(self, position):
+        return self.genre_sets[position]
+
+    def remove(self, title_id):
+        position = bisect_left(self.ids, title_id)
+        if position == len(self.ids) or self.ids[position] != title_id:
+            return
+        for column in (self.ids, self.names, self.years, self.category_ids,
+                       self.genre_sets, self.score_sums, self.review_counts):
+            del column[position]
+
+    def memory_usage(self):
+        """Память под снимок в байтах, в том числе на 100 тысяч произведений.
+
+        Учитываются столбцы, строки названий и общие наборы жанров;
+        жанры и категории — небольшие таблицы — не учитываются.
+        """
+        with self.lock:
+            size = sum(sys.getsizeof(column) for column in (
+                self.ids, self.names, self.years, self.category_ids,
+                self.genre_sets, self.score_sums, self.review_counts))
+            size += sum(sys.getsizeof(name) for name in self.names)
+            size += sys.getsizeof(self.shared_genre_sets)
+            size += sum(sys.getsizeof(genre_ids)
+                        for genre_ids in self.shared_genre_sets)
+            return self.get_usage(size)
+
+
+def get_file_sections(titles, genre_links, names_size, taxonomy_size):
+    """Разделы файла снимка по порядку: (имя, typecode, длина)."""
+    return (
+        ('ids', 'q', titles),
+        ('category_ids', 'q', titles),
+        ('score_sums', 'q', titles),
+        ('review_counts', 'q', titles),
+        ('years', 'i', titles),
+        ('genre_offsets', 'q', titles + 1),
+        ('genre_ids', 'q', genre_links),
+        ('name_offsets', 'q', titles + 1),
+        ('names', 'B', names_size),
+        ('taxonomy', 'B', taxonomy_size),
+    )
+
+
+def get_padding(size):
+    return -size % FILE_ALIGN
+
+
+def write_catalogue(snapshot, path):
+    """Запись снимка в файл для mmap с атомарной подменой старого.
+
+    Заголовок записывается в порядке байтов little-endian (FILE_HEADER),
+    столбцы — в порядке байтов этой машины, поэтому файл читается только
+    на машинах с тем же порядком байтов.
+    """
+    path = Path(path)
+    genre_offsets = array('q', [0])
+    genre_ids = array('q')
+    for genre_set in snapshot.genre_sets:
+        genre_ids.extend(genre_set)
+        genre_offsets.append(len(genre_ids))
+    name_offsets = array('q', [0])
+    names = bytearray()
+    for name in snapshot.names:
+        names += name.encode()
+        name_offsets.append(len(names))
+    taxonomy = json.dumps({
+        'genres': [(genre.id, genre.name, genre.slug)
+                   for genre in snapshot.genres.values()],
+        'categories': [(category.id, category.name, category.slug)
+                       for category in snapshot.categories.values()],
+    }, ensure_ascii=False).encode()
+    columns = {
+        'ids': snapshot.ids,
+        'category_ids': snapshot.category_ids,
+        'score_sums': snapshot.score_sums,
+        'review_counts': snapshot.review_counts,
+        'years': snapshot.years,
+        'genre_offsets': genre_offsets,
+        'genre_ids': genre_ids,
+        'name_offsets': name_offsets,
+        'names': names,
+        'taxonomy': taxonomy,
+    }
+    header = FILE_HEADER.pack(FILE_MAGIC, FILE_FORMAT, 0, snapshot.cursor,
+                              len(snapshot.ids), len(genre_ids), len(names),
+                              len(taxonomy))
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name,
+                                     suffix='.tmp', delete=False) as file:
+        try:
+            file.write(header + bytes(get_padding(len(header))))
+            for name, _, _ in get_file_sections(
+                    len(snapshot.ids), len(genre_ids), len(names),
+                    len(taxonomy)):
+                data = bytes(columns[name])
+                file.write(data + bytes(get_padding(len(data))))
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+class MappedCatalogue(BaseCatalogue):
+    """Неизменяемый снимок каталога из файла, отображенного через mmap.
+
+    Столбцы — memoryview поверх отображения, без копирования; названия
+    декодируются только для произведений страницы.
+    """
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, file_format, _, self.cursor, titles, genre_links,
+         names_size, taxonomy_size) = FILE_HEADER.unpack_from(self.mmap)
+        if magic != FILE_MAGIC or file_format != FILE_FORMAT:
+            raise ValueError(f'{path} is not a catalogue snapshot file')
+        self.size = len(self.mmap)
+        view = memoryview(self.mmap)
+        offset = FILE_HEADER.size + get_padding(FILE_HEADER.size)
+        for name, typecode, length in get_file_sections(
+                titles, genre_links, names_size, taxonomy_size):
+            size = length * struct.calcsize(typecode)
+            setattr(self, name, view[offset:offset + size].cast(typecode))
+            if name == 'names':
+                self.names_start = offset
+            offset += size + get_padding(size)
+        taxonomy = json.loads(bytes(self.taxonomy))
+        self.genres = {genre_id: Genre(id=genre_id, name=name, slug=slug)
+                       for genre_id, name, slug in taxonomy['genres']}
+        self.categories = {
+            category_id: Category(id=category_id, name=name, slug=slug)
+            for category_id, name, slug in taxonomy['categories']}
+        self.genre_slugs = {genre.slug: genre.id
+                            for genre in self.genres.values()}
+        self.category_slugs = {category.slug: category.id
+                               for category in self.categories.values()}
+
+    def get_name(self, position):
+        return bytes(self.names[self.name_offsets[position]:
+                                self.name_offsets[position + 1]]).decode()
+
+    def get_genre_ids(self, position):
+        return tuple(self.genre_ids[self.genre_offsets[position]:
+                                    self.genre_offsets[position + 1]])
+
+    def filter_positions(self, positions, found):
+        if len(positions) == len(self.ids):
+            return found
+        positions = set(positions)
+        return [position for position in found if position in positions]
+
+    def filter_genre(self, positions, genre_id):
+        """Поиск по плоскому списку жанров без сборки наборов."""
+        offsets = self.genre_offsets
+        found = sorted({bisect_right(offsets, index) - 1
+                        for index, value in enumerate(self.genre_ids)
+                        if value == genre_id})
+        return self.filter_positions(positions, found)
+
+    def filter_name(self, positions, name):
+        """Поиск вхождений названия в файле через mmap.find."""
+        encoded = name.encode()
+        offsets = self.name_offsets
+        start = self.names_start
+        end = start + len(self.names)
+        found = []
+        index = self.mmap.find(encoded, start, end)
+        while index != -1:
+            position = bisect_left(offsets, index - start)
+            if (position < len(self.ids)
+                    and offsets[position] == index - start
+                    and offsets[position + 1] == index - start + len(
+                        encoded)):
+                found.append(position)
+            index = self.mmap.find(encoded, index + 1, end)
+        return self.filter_positions(positions, found)
+
+    def memory_usage(self):
+        """Размер файла: страницы отображения общие для всех процессов."""
+        return {**self.get_usage(self.size), 'version': self.cursor,
+                'shared': True}
+
+
+class CatalogueFile:
+    """Текущий снимок из файла; подменяется, когда файл пересобран."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.path = None
+        self.stat = None
+        self.current = None
+
+    def refresh(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if (path, key) != (self.path, self.stat):
+            with self.lock:
+                if (path, key) != (self.path, self.stat):
+                    self.current = MappedCatalogue(path)
+                    self.path, self.stat = path, key
+        return self.current
+
+
+catalogue = CatalogueSnapshot()
+catalogue_file = CatalogueFile()
+
+
+def get_catalogue():
+    """Актуальный снимок каталога; None, если файла снимка еще нет."""
+    if settings.CATALOGUE_SNAPSHOT_FILE:
+        return catalogue_file.refresh(settings.CATALOGUE_SNAPSHOT_FILE)
+    return catalogue.refresh()
@@ -1,15 +1,22 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
 class BaseModel(models.Model):
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True,
+                                      db_index=True)
+
     class Meta:
         abstract = True
         app_label = 'api_yamdb'
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class GenreCategoryBaseModel(BaseModel):
     name = models.CharField('Название', max_length=settings.MAX_LENGHT_NAME)
@@ -50,6 +57,8 @@ class Title(BaseModel):
                                  verbose_name='Категория')
     genre = models.ManyToManyField(Genre, through='TitleGenre',
                                    verbose_name='Жанр')
+    deleted_at = models.DateTimeField('Дата удаления', null=True,
+                                      blank=True, db_index=True)
 
     class Meta:
         default_related_name = 'titles'
@@ -93,6 +102,37 @@ class Review(BaseModel):
     def __str__(self):
         return f'Review by {self.author} on {self.title}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_score = self.score
+
+
+class TitleScoreCount(models.Model):
+    """Счетчик оценок произведения, обновляется вместе с отзывами."""
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              verbose_name='Произведение')
+    score = models.IntegerField('Оценка')
+    count = models.PositiveIntegerField('Количество', default=0)
+
+    class Meta:
+        default_related_name = 'score_counts'
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'score'],
+                                    name='unique_title_score_count')
+        ]
+        ordering = ('title', 'score')
+        verbose_name = 'счетчик оценок'
+        verbose_name_plural = 'Счетчики оценок'
+
+    def __str__(self):
+        return f'{self.title}: {self.score} x {self.count}'
+
 
 class Comment(BaseModel):
     review = models.ForeignKey(Review, on_delete=models.CASCADE,
@@ -110,3 +150,77 @@ class Comment(BaseModel):
 
     def __str__(self):
         return f'Comment by {self.author} on review {self.review.id}'
+
+
+class TitleSimilarity(models.Model):
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              related_name='similarities',
+                              verbose_name='Произведение')
+    similar = models.ForeignKey(Title, on_delete=models.CASCADE,
+                                related_name='similar_to',
+                                verbose_name='Похожее произведение')
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'similar'],
+                                    name='unique_title_similarity')
+        ]
+        ordering = ('title', '-score')
+        verbose_name = 'похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+
+    def __str__(self):
+        return f'{self.title} ~ {self.similar}'
+
+
+class ChangeLog(models.Model):
+    """Журнал изменений каталога для инкрементальной синхронизации."""
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = (
+        (UPDATE, 'изменение'),
+        (DELETE, 'удаление'),
+    )
+    model_name = models.CharField('Модель', max_length=20)
+    object_id = models.BigIntegerField('ID объекта')
+    action = models.CharField('Действие', max_length=10, choices=ACTIONS)
+    changed_at = models.DateTimeField('Дата изменения', auto_now_add=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'изменение'
+        verbose_name_plural = 'Журнал изменений'
+
+    def __str__(self):
+        return f'{self.action} {self.model_name} {self.object_id}'
+
+
+class DeletionJob(models.Model):
+    """Очистка зависимых записей отложенно удаленного объекта."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUSES = (
+        (PENDING, 'ожидает'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'завершено'),
+    )
+    model_name = models.CharField('Модель', max_length=20)
+    object_id = models.BigIntegerField('ID объекта')
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=PENDING, db_index=True)
+    deleted_count = models.PositiveIntegerField('Удалено записей',
+                                                default=0)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    finished_at = models.DateTimeField('Дата завершения', null=True,
+                                       blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+    def __str__(self):
+        return f'{self.model_name} {self.object_id}: {self.status}'
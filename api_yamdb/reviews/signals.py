@@ -0,0 +1,158 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete,
+                                      post_migrate, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from users.models import User, UserStats
+from .models import (Category, ChangeLog, Comment, Genre, Review, Title,
+                     TitleScoreCount)
+from .catalogue import notify_changed
+from .slugs import SLUG_MAPS
+
+SYNC_MODELS = (Genre, Category, Title, Review, Comment)
+
+
+def change_counters(model, lookup, **deltas):
+    """Изменение счетчиков записи одним UPDATE с созданием при отсутствии."""
+    expressions = {field: F(field) + delta for field, delta in deltas.items()}
+    updated = model.objects.filter(**lookup).update(**expressions)
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        counter, created = model.objects.get_or_create(**lookup,
+                                                       defaults=deltas)
+        if not created:
+            model.objects.filter(**lookup).update(**expressions)
+
+
+def change_score_count(title_id, score, delta):
+    """Изменение счетчика оценок произведения на delta."""
+    change_counters(TitleScoreCount, {'title_id': title_id, 'score': score},
+                    count=delta)
+
+
+@receiver(pre_save, sender=Review)
+def review_pre_save(sender, instance, **kwargs):
+    if (not instance._state.adding
+            and getattr(instance, '_loaded_score', None) is None):
+        instance._loaded_score = (Review.objects.filter(pk=instance.pk)
+                                  .values_list('score', flat=True).first())
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    previous_score = getattr(instance, '_loaded_score', None)
+    if created:
+        change_score_count(instance.title_id, instance.score, 1)
+        change_counters(UserStats, {'user_id': instance.author_id},
+                        review_count=1, score_sum=instance.score)
+    elif previous_score != instance.score:
+        if previous_score is not None:
+            change_score_count(instance.title_id, previous_score, -1)
+        change_score_count(instance.title_id, instance.score, 1)
+        change_counters(UserStats, {'user_id': instance.author_id},
+                        score_sum=instance.score - (previous_score or 0))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    change_score_count(instance.title_id, instance.score, -1)
+    change_counters(UserStats, {'user_id': instance.author_id},
+                    review_count=-1, score_sum=-instance.score)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counters(UserStats, {'user_id': instance.author_id},
+                        comment_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_counters(UserStats, {'user_id': instance.author_id},
+                    comment_count=-1)
+
+
+@receiver(pre_save, sender=User)
+def user_pre_save(sender, instance, **kwargs):
+    if (not instance._state.adding
+            and getattr(instance, '_loaded_username', None) is None):
+        instance._loaded_username = (User.objects.filter(pk=instance.pk)
+                                     .values_list('username', flat=True)
+                                     .first())
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Смена версии данных при смене имени автора отзывов и комментариев."""
+    if not created and instance._loaded_username != instance.username:
+        notify_changed()
+    instance._loaded_username = instance.username
+
+
+def record_change(model_name, object_id, action=ChangeLog.UPDATE):
+    """Запись изменения объекта в журнал синхронизации."""
+    ChangeLog.objects.create(model_name=model_name, object_id=object_id,
+                             action=action)
+    notify_changed()
+
+
+def record_changes(model_name, object_ids, action=ChangeLog.UPDATE):
+    """Запись изменений нескольких объектов одним запросом."""
+    ChangeLog.objects.bulk_create(
+        ChangeLog(model_name=model_name, object_id=object_id, action=action)
+        for object_id in object_ids)
+    notify_changed()
+
+
+def sync_saved(sender, instance, **kwargs):
+    record_change(sender._meta.model_name, instance.pk)
+    if sender is Review:
+        record_change(Title._meta.model_name, instance.title_id)
+
+
+def sync_deleted(sender, instance, **kwargs):
+    record_change(sender._meta.model_name, instance.pk, ChangeLog.DELETE)
+    if sender is Review:
+        record_change(Title._meta.model_name, instance.title_id)
+
+
+for model in SYNC_MODELS:
+    post_save.connect(sync_saved, sender=model,
+                      dispatch_uid=f'sync_saved_{model._meta.model_name}')
+    post_delete.connect(sync_deleted, sender=model,
+                        dispatch_uid=f'sync_deleted_{model._meta.model_name}')
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def taxonomy_pre_delete(sender, instance, **kwargs):
+    """Изменение произведений удаляемого жанра или категории.
+
+    Каскад удаляет связи с жанром, а категория обнуляется через
+    SET_NULL без сигналов произведений.
+    """
+    title_ids = list(instance.titles.values_list('id', flat=True))
+    if title_ids:
+        record_changes(Title._meta.model_name, title_ids)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genre_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        record_change(Title._meta.model_name, instance.pk)
+    else:
+        for title_id in pk_set or ():
+            record_change(Title._meta.model_name, title_id)
+
+
+for slug_map in SLUG_MAPS:
+    label = slug_map.model._meta.model_name
+    post_save.connect(slug_map.invalidate, sender=slug_map.model,
+                      dispatch_uid=f'slug_map_saved_{label}')
+    post_delete.connect(slug_map.invalidate, sender=slug_map.model,
+                        dispatch_uid=f'slug_map_deleted_{label}')
+    post_migrate.connect(slug_map.invalidate,
+                         dispatch_uid=f'slug_map_migrate_{label}')
@@ -0,0 +1,72 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category, Genre
+
+
+class SlugMap:
+    """Словарь slug → id небольшой таблицы в памяти процесса.
+
+    Сбрасывается сигналами при изменении таблицы: сразу в текущем потоке
+    и еще раз после фиксации транзакции, иначе другой поток успел бы
+    загрузить словарь до фиксации под новой версией. Версия словаря хранится
+    в кеше CACHES['default']: сброс виден другим процессам, только если
+    этот кеш общий (файловый, Memcached), а с locmem — лишь в текущем.
+    Версия — случайная строка: в файловом кеше incr не атомарен, и два
+    одновременных сброса дали бы одну версию.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'slug-map-version:{model._meta.label_lower}'
+        self.lock = threading.Lock()
+        self.slugs = None
+        self.version = None
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов копируются для каждого экземпляра,
+        # словарь остается общим для процесса.
+        return self
+
+    def invalidate(self, **kwargs):
+        self.clear()
+        transaction.on_commit(self.bump)
+
+    def clear(self):
+        with self.lock:
+            self.slugs = None
+
+    def bump(self):
+        self.clear()
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+
+    def get_map(self):
+        version = cache.get(self.version_key)
+        with self.lock:
+            if self.slugs is None or self.version != version:
+                self.slugs = dict(self.model.objects
+                                  .values_list('slug', 'id'))
+                self.version = version
+            return self.slugs
+
+    def resolve(self, slugs):
+        """id по списку slug; отсутствующие в словаре ищутся одним IN.
+
+        Для неизвестных slug возвращается None.
+        """
+        slugs_map = self.get_map()
+        missing = {slug for slug in slugs if slug not in slugs_map}
+        if missing:
+            found = dict(self.model.objects.filter(slug__in=missing)
+                         .values_list('slug', 'id'))
+            with self.lock:
+                slugs_map.update(found)
+        return [slugs_map.get(slug) for slug in slugs]
+
+
+genre_slugs = SlugMap(Genre)
+category_slugs = SlugMap(Category)
+SLUG_MAPS = (genre_slugs, category_slugs)
@@ -19,12 +19,35 @@ class User(AbstractUser):
         default=settings.ROLE_USERS[0][0], auto_created=True)
     email = models.CharField(
         'email', max_length=settings.MAX_LENGTH_EMAIL, unique=True)
-    confirmation_code = models.CharField(
-        'Код подтверждения', max_length=settings.MAX_LENGTH_CONFIRMATION_CODE,
-        blank=True)
+    deleted_at = models.DateTimeField('Дата удаления', null=True,
+                                      blank=True, db_index=True)
+    token_version = models.PositiveIntegerField('Версия токенов', default=0)
 
     objects = UserManager()
 
+    # Изменение этих полей отзывает выданные токены
+    TOKEN_FIELDS = ('role', 'is_superuser', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_token_fields = instance.get_token_fields()
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+    def get_token_fields(self):
+        return tuple(self.__dict__.get(field) for field in self.TOKEN_FIELDS)
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_token_fields', None)
+        if loaded is not None and loaded != self.get_token_fields():
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'],
+                                           'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_token_fields = self.get_token_fields()
+
     @property
     def is_admin(self):
         return self.role == settings.ROLE_USERS[2][0]
@@ -37,3 +60,26 @@ class User(AbstractUser):
         ordering = ('username', 'id')
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
+
+
+class UserStats(models.Model):
+    """Счетчики активности пользователя, обновляются вместе с отзывами."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats',
+                                verbose_name='Пользователь')
+    review_count = models.PositiveIntegerField('Отзывов', default=0)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0)
+    score_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+
+    class Meta:
+        verbose_name = 'статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'Stats of {self.user_id}'
+
+    @property
+    def average_score(self):
+        if not self.review_count:
+            return None
+        return self.score_sum / self.review_count
@@ -0,0 +1,292 @@
+"""Задержки и число SQL-запросов на основных эндпоинтах API.
+
+Каталог заполняется командой generate_data в заданном масштабе, затем
+каждый сценарий выполняется --requests раз через django.test.Client.
+Результаты (p50/p95/p99, среднее и число запросов к базе) сохраняются
+в JSON и сравниваются с сохраненным базовым прогоном: регрессией
+считается рост p95 больше чем на --tolerance процентов или рост числа
+SQL-запросов.
+
+Кеш ответов и COUNT пагинации отключен, чтобы сценарии чтения измеряли
+обработку запроса, а не попадания в кеш; --response-cache его оставляет.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_api --scale 1k --save-baseline
+    python -m benchmarks.bench_api --scale 1k
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import platform
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utils import create_schema, percentile, setup_django
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+SCALES = {
+    '1k': {'users': 100, 'titles': 100, 'reviews': 1000, 'comments': 1000},
+    '100k': {'users': 2000, 'titles': 2000, 'reviews': 100000,
+             'comments': 100000},
+    '1m': {'users': 10000, 'titles': 10000, 'reviews': 1000000,
+           'comments': 1000000},
+}
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+CODE_RE = re.compile(r'<(\w+)>')
+
+WARMUP = 5
+
+
+class Scenario:
+    """Сценарий: функция, выполняющая i-й запрос и возвращающая ответ.
+
+    prepare, если задана, вызывается перед i-м запросом вне замера.
+    """
+
+    def __init__(self, name, request, expected_status=200, prepare=None):
+        self.name = name
+        self.request = request
+        self.expected_status = expected_status
+        self.prepare = prepare
+
+
+def get_scenarios(client, admin_client, author_clients, data):
+    from django.core import mail
+
+    title_ids = data['title_ids']
+    review = data['review']
+    genre_slugs = data['genre_slugs']
+    title_pages = data['title_pages']
+    user_pages = data['user_pages']
+
+    def pick(number, values):
+        return values[number % len(values)]
+
+    def signup(number):
+        return client.post('/api/v1/auth/signup/', {
+            'username': f'bench{number}',
+            'email': f'bench{number}@yamdb.fake',
+        })
+
+    def get_code(number):
+        mail.outbox.clear()
+        signup(number)
+        data['codes'][number] = CODE_RE.search(mail.outbox[-1].body).group(1)
+
+    def token(number):
+        return client.post('/api/v1/auth/token/', {
+            'username': f'bench{number}',
+            'confirmation_code': data['codes'][number]})
+
+    return [
+        Scenario('titles_list', lambda number: client.get(
+            '/api/v1/titles/', {'page': pick(number, title_pages)})),
+        Scenario('titles_filter', lambda number: client.get(
+            '/api/v1/titles/', {'genre': pick(number, genre_slugs),
+                                'year': 1900 + number % 120})),
+        Scenario('reviews_list', lambda number: client.get(
+            f'/api/v1/titles/{pick(number, title_ids)}/reviews/')),
+        # Автор пишет один отзыв на произведение: после последнего
+        # произведения отзывы пишет следующий автор
+        Scenario('review_create', lambda number: author_clients[
+            number // len(title_ids)].post(
+            f'/api/v1/titles/{pick(number, title_ids)}/reviews/',
+            {'text': 'Отзыв', 'score': number % 10 + 1},
+            content_type='application/json'), 201),
+        Scenario('comments_list', lambda number: client.get(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+            '/comments/')),
+        Scenario('comment_create', lambda number: author_clients[0].post(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+            '/comments/', {'text': 'Комментарий'},
+            content_type='application/json'), 201),
+        Scenario('signup', signup),
+        Scenario('token', token, prepare=get_code),
+        Scenario('users_list', lambda number: admin_client.get(
+            '/api/v1/users/', {'page': pick(number, user_pages)})),
+    ]
+
+
+def get_pages(count, page_size):
+    return range(1, max(math.ceil(count / page_size), 1) + 1)
+
+
+def prepare(scale, requests):
+    """Администратор, авторы без отзывов и опорные данные сценариев.
+
+    Авторов столько, чтобы каждый запрос review_create писал новый отзыв.
+    """
+    from django.conf import settings
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from reviews.models import Genre, Review, Title
+    from users.models import User
+
+    call_command('generate_data', **SCALES[scale], stdout=io.StringIO())
+    title_ids = list(Title.objects.order_by('id')
+                     .values_list('id', flat=True))
+    admin = User.objects.create_user(username='bench-admin',
+                                     email='bench-admin@yamdb.fake',
+                                     role='admin')
+    authors = [
+        User.objects.create_user(username=f'bench-author{number}',
+                                 email=f'bench-author{number}@yamdb.fake')
+        for number in range(math.ceil((requests + WARMUP) / len(title_ids)))]
+    data = {
+        'title_ids': title_ids,
+        'review': Review.objects.order_by('id').first(),
+        'genre_slugs': list(Genre.objects.values_list('slug', flat=True)),
+        'title_pages': get_pages(len(title_ids),
+                                 settings.PAGE_SIZE_PAGINATION),
+        'user_pages': get_pages(User.objects.count(),
+                                settings.REST_FRAMEWORK['PAGE_SIZE']),
+        'codes': {},
+    }
+    return data, AccessToken.for_user(admin), [
+        AccessToken.for_user(author) for author in authors]
+
+
+def run_scenario(scenario, requests):
+    latencies = []
+    queries = []
+    for number in range(requests + WARMUP):
+        if scenario.prepare is not None:
+            scenario.prepare(number)
+        started = time.perf_counter()
+        response = scenario.request(number)
+        elapsed = time.perf_counter() - started
+        if response.status_code != scenario.expected_status:
+            raise RuntimeError(
+                f'{scenario.name}: status {response.status_code}, '
+                f'expected {scenario.expected_status}')
+        if number < WARMUP:
+            continue
+        latencies.append(elapsed)
+        match = QUERIES_RE.search(response.get('Server-Timing', ''))
+        queries.append(int(match.group(1)) if match else 0)
+    return {
+        'requests': len(latencies),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries': max(queries),
+    }
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        setup_django(Path(tmp_dir) / 'bench.sqlite3')
+        create_schema()
+        from django.conf import settings
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        settings.DEBUG = False
+        # Сценарии регистрации измеряют эндпоинт, а не лимиты частоты
+        settings.AUTH_THROTTLE_RATES = {}
+        if not args.response_cache:
+            settings.RESPONSE_CACHE_TIMEOUT = 0
+            settings.COUNT_CACHE_TIMEOUT = 0
+        logging.getLogger('api.requests').setLevel(logging.WARNING)
+        requests = args.requests
+        data, admin_token, author_tokens = prepare(args.scale, requests)
+        client = Client()
+        admin_client = Client(HTTP_AUTHORIZATION=f'Bearer {admin_token}')
+        author_clients = [Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+                          for token in author_tokens]
+        scenarios = get_scenarios(client, admin_client, author_clients, data)
+        results = {}
+        for scenario in scenarios:
+            if args.only and scenario.name not in args.only:
+                continue
+            results[scenario.name] = run_scenario(scenario, requests)
+    return {
+        'scale': args.scale,
+        'requests': requests,
+        'response_cache': args.response_cache,
+        'python': platform.python_version(),
+        'scenarios': results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Строки отчета и признак регрессии относительно базового прогона."""
+    lines = []
+    regressed = False
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            lines.append(f'{name:15} new')
+            continue
+        change = ((current['p95_ms'] - previous['p95_ms'])
+                  / previous['p95_ms'] * 100 if previous['p95_ms'] else 0.0)
+        status = 'ok'
+        if change > tolerance or current['queries'] > previous['queries']:
+            status = 'REGRESSION'
+            regressed = True
+        lines.append(f'{name:15} p95 {previous["p95_ms"]:8.2f} -> '
+                     f'{current["p95_ms"]:8.2f}ms ({change:+6.1f}%) '
+                     f'queries {previous["queries"]} -> '
+                     f'{current["queries"]}  {status}')
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--only', nargs='*',
+                        help='Run only the given scenarios')
+    parser.add_argument('--response-cache', action='store_true',
+                        help='Keep the response and COUNT caches enabled')
+    parser.add_argument('--output', type=Path,
+                        help='Default: benchmarks/results/<scale>.json')
+    parser.add_argument('--baseline', type=Path,
+                        help='Default: benchmarks/results/'
+                             'baseline-<scale>.json')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=20.0,
+                        help='Allowed p95 growth, percent')
+    args = parser.parse_args()
+
+    output = args.output or RESULTS_DIR / f'{args.scale}.json'
+    baseline_path = (args.baseline
+                     or RESULTS_DIR / f'baseline-{args.scale}.json')
+    results = run(args)
+    for name, result in results['scenarios'].items():
+        print(f'{name:15} p50={result["p50_ms"]:8.2f}ms '
+              f'p95={result["p95_ms"]:8.2f}ms '
+              f'p99={result["p99_ms"]:8.2f}ms '
+              f'queries={result["queries"]}')
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2))
+        return
+    if not baseline_path.exists():
+        print(f'No baseline at {baseline_path}, use --save-baseline')
+        return
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get('response_cache', True) != results['response_cache']:
+        print('Baseline was recorded with response_cache='
+              f'{baseline.get("response_cache", True)}, '
+              'latencies are not comparable')
+    lines, regressed = compare(results, baseline, args.tolerance)
+    print('\n'.join(lines))
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
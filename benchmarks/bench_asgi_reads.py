@@ -0,0 +1,115 @@
+"""Сравнение синхронного (WSGI) и асинхронного (ASGI) пути чтения каталога.
+
+Каждый режим запускается в отдельном процессе на одной и той же
+временной базе: WSGI — django.test.Client в пуле потоков, ASGI —
+AsyncClient с асинхронными вьюхами чтения (YAMDB_ASYNC_READS=1).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_asgi_reads --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.utils import (create_schema, percentile, seed_catalogue,
+                              setup_django)
+
+
+def seed(db_path, titles):
+    setup_django(db_path)
+    create_schema()
+    seed_catalogue(titles, users=50, reviews_per_title=5)
+
+
+def get_urls(title_ids, count, seed_value=0):
+    rnd = random.Random(seed_value)
+    urls = []
+    for _ in range(count):
+        title_id = rnd.choice(title_ids)
+        urls.append(rnd.choice((
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            '/api/v1/genres/',
+        )))
+    return urls
+
+
+def run_wsgi(urls, concurrency):
+    from django.test import Client
+
+    def fetch(url):
+        started = time.perf_counter()
+        Client().get(url)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(fetch, urls))
+
+
+def run_asgi(urls, concurrency):
+    from django.test import AsyncClient
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient()
+
+        async def fetch(url):
+            async with semaphore:
+                started = time.perf_counter()
+                await client.get(url)
+                return time.perf_counter() - started
+
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
+    return asyncio.run(main())
+
+
+def worker(mode, db_path, args, results):
+    os.environ['YAMDB_ASYNC_READS'] = '1' if mode == 'asgi' else ''
+    setup_django(db_path)
+    from reviews.models import Title
+
+    urls = get_urls(list(Title.objects.values_list('id', flat=True)),
+                    args.requests)
+    runner = run_asgi if mode == 'asgi' else run_wsgi
+    started = time.perf_counter()
+    latencies = runner(urls, args.concurrency)
+    results.put((mode, time.perf_counter() - started, latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / 'bench.sqlite3'
+        process = context.Process(target=seed, args=(db_path, args.titles))
+        process.start()
+        process.join()
+        for mode in ('wsgi', 'asgi'):
+            results = context.Queue()
+            process = context.Process(target=worker,
+                                      args=(mode, db_path, args, results))
+            process.start()
+            mode, elapsed, latencies = results.get()
+            process.join()
+            print(f'{mode} requests={len(latencies)} '
+                  f'concurrency={args.concurrency} '
+                  f'rps={len(latencies) / elapsed:8.1f} '
+                  f'p50={percentile(latencies, 50) * 1000:7.2f}ms '
+                  f'p99={percentile(latencies, 99) * 1000:7.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
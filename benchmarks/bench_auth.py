@@ -0,0 +1,106 @@
+"""Регистрация и выдача токена под наплывом регистраций.
+
+--workers потоков одновременно регистрируют --users новых пользователей,
+затем повторно запрашивают код для тех же пользователей и получают
+токены. Для каждой фазы печатаются задержки p50/p99, пропускная
+способность и наибольшее число SQL-запросов на запрос (из Server-Timing).
+Лимиты частоты отключены, если не указан --throttle.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_auth --users 500 --workers 8
+"""
+import argparse
+import logging
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.utils import create_schema, percentile, setup_django
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+MESSAGE_RE = re.compile(r'^(\S+), .*<(\w+)>', re.S)
+
+
+def run_phase(name, request, count, workers):
+    from django.db import connections
+    from django.test import Client
+
+    local = threading.local()
+
+    def call(number):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        started = time.perf_counter()
+        response = request(local.client, number)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, (name, response.status_code)
+        match = QUERIES_RE.search(response.get('Server-Timing', ''))
+        return elapsed, int(match.group(1)) if match else 0
+
+    def call_and_close(numbers):
+        try:
+            return [call(number) for number in numbers]
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        results = [result for chunk in executor.map(
+            call_and_close, (range(worker, count, workers)
+                             for worker in range(workers)))
+                   for result in chunk]
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in results]
+    print(f'{name:14} requests={count} workers={workers} '
+          f'rps={count / elapsed:7.1f} '
+          f'p50={percentile(latencies, 50) * 1000:7.2f}ms '
+          f'p99={percentile(latencies, 99) * 1000:7.2f}ms '
+          f'queries={max(queries for _, queries in results)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--throttle', action='store_true',
+                        help='Keep AUTH_THROTTLE_RATES from settings')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        setup_django(Path(tmp_dir) / 'bench.sqlite3')
+        create_schema()
+        from django.conf import settings
+        from django.core import mail
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        settings.DEBUG = False
+        if not args.throttle:
+            settings.AUTH_THROTTLE_RATES = {}
+        logging.getLogger('api.requests').setLevel(logging.WARNING)
+
+        def signup(client, number):
+            return client.post('/api/v1/auth/signup/', {
+                'username': f'storm{number}',
+                'email': f'storm{number}@yamdb.fake'})
+
+        codes = {}
+
+        def token(client, number):
+            username = f'storm{number}'
+            return client.post('/api/v1/auth/token/', {
+                'username': username, 'confirmation_code': codes[username]})
+
+        run_phase('signup-new', signup, args.users, args.workers)
+        run_phase('signup-repeat', signup, args.users, args.workers)
+        for message in mail.outbox:
+            username, code = MESSAGE_RE.match(message.body).groups()
+            codes[username] = code
+        run_phase('token', token, args.users, args.workers)
+
+
+if __name__ == '__main__':
+    main()
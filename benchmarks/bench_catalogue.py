@@ -0,0 +1,105 @@
+"""Снимок каталога: размер и скорость списка произведений.
+
+На временной базе с --titles произведениями загружает снимок каталога
+в память и собирает файл снимка для mmap, печатает их размер (в том
+числе на 100 тысяч произведений) и сравнивает задержку /api/v1/titles/
+с фильтрами из базы, из снимка в памяти и из файла.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_catalogue --titles 100000 --requests 50
+"""
+import argparse
+import io
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utils import create_schema, percentile, setup_django
+
+
+def get_urls(genres, categories, count, seed=0):
+    rnd = random.Random(seed)
+    urls = []
+    for _ in range(count):
+        urls.append(rnd.choice((
+            f'/api/v1/titles/?page={rnd.randint(1, 50)}',
+            f'/api/v1/titles/?genre={rnd.choice(genres)}',
+            f'/api/v1/titles/?category={rnd.choice(categories)}'
+            f'&year={rnd.randint(1950, 2020)}',
+        )))
+    return urls
+
+
+def run(client, urls):
+    latencies = []
+    for url in urls:
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, (url, response.status_code)
+    return latencies
+
+
+def report(mode, usage, elapsed):
+    print(f'{mode:8} titles={usage["titles"]} bytes={usage["bytes"]} '
+          f'per_100k={usage["bytes_per_100k_titles"] / 2 ** 20:.1f}MiB '
+          f'build={elapsed * 1000:.0f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        setup_django(Path(tmp_dir) / 'bench.sqlite3')
+        create_schema()
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+
+        from reviews.catalogue import MappedCatalogue, catalogue
+        from reviews.models import Category, Genre
+
+        setup_test_environment()
+        settings.DEBUG = False
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        settings.COUNT_CACHE_TIMEOUT = 0
+        logging.getLogger('api.requests').setLevel(logging.WARNING)
+        call_command('generate_data', users=1000, titles=args.titles,
+                     reviews=args.titles * 2, comments=0,
+                     stdout=io.StringIO())
+        urls = get_urls(list(Genre.objects.values_list('slug', flat=True)),
+                        list(Category.objects.values_list('slug',
+                                                          flat=True)),
+                        args.requests)
+        client = Client()
+
+        started = time.perf_counter()
+        catalogue.refresh()
+        report('memory', catalogue.memory_usage(),
+               time.perf_counter() - started)
+        file_path = Path(tmp_dir) / 'catalogue.snapshot'
+        started = time.perf_counter()
+        call_command('build_catalogue_snapshot', output=file_path,
+                     stdout=io.StringIO())
+        report('file', MappedCatalogue(file_path).memory_usage(),
+               time.perf_counter() - started)
+
+        for mode in ('database', 'memory', 'file'):
+            settings.CATALOGUE_SNAPSHOT = mode != 'database'
+            settings.CATALOGUE_SNAPSHOT_FILE = (
+                str(file_path) if mode == 'file' else '')
+            run(client, urls[:5])
+            latencies = run(client, urls)
+            print(f'{mode:8} requests={len(latencies)} '
+                  f'p50={percentile(latencies, 50) * 1000:7.2f}ms '
+                  f'p99={percentile(latencies, 99) * 1000:7.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Пропускная способность SQLite на чтение и запись несколькими процессами.
+
+Сравнивает стандартные настройки SQLite (rollback journal) с профилем
+SQLITE_PRAGMAS из settings.py (WAL, mmap, synchronous=NORMAL и т.д.).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_sqlite_concurrency --readers 4 --writers 2
+"""
+import argparse
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utils import create_schema, percentile, setup_django
+
+SEED_TITLES = 2000
+
+
+def seed(db_path, pragmas):
+    setup_django(db_path, pragmas)
+    create_schema()
+    from reviews.models import Category, Title
+
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Title.objects.bulk_create(
+        Title(name=f'Title {number}', year=1900 + number % 120,
+              category=category)
+        for number in range(SEED_TITLES))
+
+
+def worker(role, db_path, pragmas, duration, seed_value, results):
+    setup_django(db_path, pragmas)
+    from django.db import OperationalError
+    from reviews.models import Title
+
+    rnd = random.Random(seed_value)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == 'read':
+                list(Title.objects.filter(year=1900 + rnd.randrange(120))
+                     .select_related('category')[:20])
+            else:
+                Title.objects.create(name='Benchmark', year=2000,
+                                     category_id=1)
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.put((role, latencies, errors))
+
+
+def run(mode, pragmas, args):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / 'bench.sqlite3'
+        process = context.Process(target=seed, args=(db_path, pragmas))
+        process.start()
+        process.join()
+
+        results = context.Queue()
+        roles = ['read'] * args.readers + ['write'] * args.writers
+        processes = [
+            context.Process(target=worker,
+                            args=(role, db_path, pragmas, args.duration,
+                                  number, results))
+            for number, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    for role in ('read', 'write'):
+        latencies = [value for item_role, item_latencies, _ in collected
+                     if item_role == role for value in item_latencies]
+        errors = sum(item_errors for item_role, _, item_errors in collected
+                     if item_role == role)
+        print(f'{mode:6} {role:5} ops/s={len(latencies) / args.duration:9.1f} '
+              f'p50={percentile(latencies, 50) * 1000:7.2f}ms '
+              f'p99={percentile(latencies, 99) * 1000:7.2f}ms '
+              f'errors={errors}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    run('stock', {}, args)
+    run('tuned', settings.SQLITE_PRAGMAS, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Стоимость проверки лимитов частоты запросов.
+
+Сравнивает время allow_request скользящего окна из api.throttling
+и SimpleRateThrottle DRF со списком отметок времени при лимите --limit
+запросов в минуту, а затем задержку /api/v1/auth/signup/ с лимитами
+и без них. Кеш — настроенный в CACHES (по умолчанию файловый).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_throttle --checks 1000 --limit 5000
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.utils import create_schema, percentile, setup_django
+
+
+def measure(check, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        check()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(name, latencies):
+    print(f'{name:14} checks={len(latencies)} '
+          f'p50={percentile(latencies, 50) * 1e6:8.1f}us '
+          f'p99={percentile(latencies, 99) * 1e6:8.1f}us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--checks', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        setup_django(Path(tmp_dir) / 'bench.sqlite3')
+        create_schema()
+        from django.conf import settings
+        from django.core.cache import cache
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from rest_framework.throttling import AnonRateThrottle
+
+        from api.throttling import AuthIPThrottle
+        from api.views import RegisterUser
+
+        setup_test_environment()
+        settings.DEBUG = False
+        logging.getLogger('api.requests').setLevel(logging.WARNING)
+        rate = f'{args.limit}/m'
+        settings.AUTH_THROTTLE_RATES = {'auth_ip': rate}
+        AnonRateThrottle.rate = rate
+        request = Request(APIRequestFactory().post('/'))
+        view = RegisterUser()
+
+        for name, throttle_class in (('sliding', AuthIPThrottle),
+                                     ('drf-history', AnonRateThrottle)):
+            cache.clear()
+            # Окно заполняется так, чтобы замеренные проверки проходили
+            # и записывали в кеш вплоть до лимита
+            measure(lambda: throttle_class().allow_request(request, view),
+                    max(args.limit - args.checks, 0))
+            report(name, measure(
+                lambda: throttle_class().allow_request(request, view),
+                args.checks))
+
+        client = Client()
+        for name, rates in (('no-throttle', {}),
+                            ('throttled', {'auth_user': rate,
+                                           'auth_ip': '1000000/m',
+                                           'auth_endpoint': '1000000/m'})):
+            cache.clear()
+            settings.AUTH_THROTTLE_RATES = rates
+            latencies = []
+            for number in range(args.requests):
+                started = time.perf_counter()
+                response = client.post('/api/v1/auth/signup/', {
+                    'username': f'{name}{number}',
+                    'email': f'{name}{number}@yamdb.fake'})
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.status_code
+            print(f'{"signup " + name:22} requests={len(latencies)} '
+                  f'p50={percentile(latencies, 50) * 1000:6.2f}ms '
+                  f'p99={percentile(latencies, 99) * 1000:6.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Бенчмарк расчета похожих произведений на синтетических оценках.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_title_similarity --users 50000 --titles 20000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'api_yamdb'))
+
+from api.similarity import iter_similar_titles  # noqa: E402
+
+
+def generate_ratings(users, titles, reviews_per_user, seed):
+    """Синтетические оценки: популярность произведений по закону Ципфа."""
+    rnd = random.Random(seed)
+    weights = [1 / rank for rank in range(1, titles + 1)]
+    for user_id in range(1, users + 1):
+        rated = set(rnd.choices(range(1, titles + 1), weights=weights,
+                                k=reviews_per_user))
+        for title_id in rated:
+            yield user_id, title_id, rnd.randint(1, 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--titles', type=int, default=5000)
+    parser.add_argument('--reviews-per-user', type=int, default=20)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ratings = list(generate_ratings(args.users, args.titles,
+                                    args.reviews_per_user, args.seed))
+    started = time.perf_counter()
+    rows = 0
+    for chunk in iter_similar_titles(ratings, args.top_k, args.chunk_size):
+        rows += sum(len(neighbours) for _, neighbours in chunk)
+    elapsed = time.perf_counter() - started
+    print(f'reviews={len(ratings)} titles={args.titles} '
+          f'users={args.users} rows={rows} build_time={elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
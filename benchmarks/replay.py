@@ -0,0 +1,314 @@
+"""Нагрузочное воспроизведение Postman-коллекции или журнала запросов.
+
+Коллекция postman_collection/Ymdb-collection.postman_collection.json
+сначала выполняется один раз по порядку: переменные коллекции
+заполняются из ответов так же, как в ее тестовых скриптах, а коды
+подтверждения для /auth/token/ читаются из писем в EMAIL_FILE_PATH.
+Затем полученные запросы воспроизводятся --concurrency потоками
+с ограничением --rate запросов в секунду.
+
+Журнал — NDJSON со строками {"method", "path", "body"}; подходят и
+записи журнала api.requests. С --users N перед нагрузкой регистрируются
+N пользователей, и их JWT подставляются в запросы по очереди.
+
+Сервер запускается отдельно (для коллекции — после set_up_data.sh):
+    python -m benchmarks.replay --collection \\
+        postman_collection/Ymdb-collection.postman_collection.json
+    python -m benchmarks.replay --log requests.ndjson --users 10 \\
+        --concurrency 20 --rate 200 --duration 30
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import quote, urlsplit
+from urllib.request import Request, urlopen
+
+from benchmarks.utils import API_DIR, percentile
+
+VARIABLE_RE = re.compile(r'{{(\w+)}}')
+CAPTURE_RE = re.compile(
+    r'const (\w+) = _\.get\(responseData, ["\'](\w+)["\']\)')
+SET_RE = re.compile(r'pm\.collectionVariables\.set\("(\w+)", (\w+)\)')
+CODE_RE = re.compile(r'<(\w+)>')
+ID_RE = re.compile(r'/\d+(?=/)')
+MESSAGE_SEPARATOR = '\n' + '-' * 79 + '\n'
+
+URL_SAFE = '/?&=%:+,@'
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class ReplayRequest:
+    """Запрос для воспроизведения; строки могут содержать {{переменные}}."""
+
+    __slots__ = ('method', 'url', 'body', 'token', 'captures')
+
+    def __init__(self, method, url, body=None, token=None, captures=None):
+        self.method = method
+        self.url = url
+        self.body = body
+        self.token = token
+        self.captures = captures or {}
+
+
+def iter_items(items):
+    for item in items:
+        if 'item' in item:
+            yield from iter_items(item['item'])
+        else:
+            yield item
+
+
+def get_captures(item):
+    """Переменные коллекции, которые тестовый скрипт берет из ответа."""
+    script = '\n'.join(line for event in item.get('event', ())
+                       if event.get('listen') == 'test'
+                       for line in event['script'].get('exec', ()))
+    fields = dict(CAPTURE_RE.findall(script))
+    return {variable: fields[local]
+            for variable, local in SET_RE.findall(script)
+            if local in fields}
+
+
+def load_collection(path):
+    collection = json.loads(Path(path).read_text(encoding='utf-8'))
+    variables = {variable['key']: str(variable.get('value', ''))
+                 for variable in collection.get('variable', ())}
+    requests = []
+    for item in iter_items(collection['item']):
+        request = item['request']
+        url = request['url']
+        parts = urlsplit(url['raw'] if isinstance(url, dict) else url)
+        token = None
+        auth = request.get('auth') or {}
+        if auth.get('type') == 'bearer':
+            token = next(value['value'] for value in auth['bearer']
+                         if value['key'] == 'token')
+        requests.append(ReplayRequest(
+            request['method'],
+            parts.path + (f'?{parts.query}' if parts.query else ''),
+            (request.get('body') or {}).get('raw') or None,
+            token, get_captures(item)))
+    return requests, variables
+
+
+def load_log(path):
+    requests = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            body = record.get('body')
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body)
+            requests.append(ReplayRequest(record['method'].upper(),
+                                          record['path'], body))
+    return requests
+
+
+def resolve(value, variables):
+    if value is None:
+        return None
+    return VARIABLE_RE.sub(
+        lambda match: variables.get(match.group(1), match.group(0)), value)
+
+
+def send(base_url, method, url, body=None, token=None, timeout=30):
+    """Статус, тело ответа и время выполнения запроса."""
+    headers = {'Accept': 'application/json'}
+    data = None
+    if body is not None:
+        data = body.encode()
+        headers['Content-Type'] = 'application/json'
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    request = Request(base_url + quote(url, safe=URL_SAFE), data=data,
+                      headers=headers, method=method)
+    started = time.perf_counter()
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            status, content = response.status, response.read()
+    except HTTPError as error:
+        status, content = error.code, error.read()
+    except OSError:
+        status, content = 0, b''
+    return status, content, time.perf_counter() - started
+
+
+def read_confirmation_code(email_dir, email):
+    """Код из последнего письма на адрес, сохраненного EmailBackend."""
+    files = sorted(Path(email_dir).glob('*.log'),
+                   key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in files:
+        messages = path.read_text(encoding='utf-8').split(MESSAGE_SEPARATOR)
+        for message in reversed(messages):
+            if f'To: {email}' in message:
+                match = CODE_RE.search(message)
+                if match:
+                    return match.group(1)
+    return None
+
+
+class Session:
+    """Переменные коллекции и коды подтверждения, полученные по ходу."""
+
+    def __init__(self, base_url, email_dir, variables=None):
+        self.base_url = base_url
+        self.email_dir = email_dir
+        self.variables = dict(variables or {})
+        self.codes = {}
+
+    def execute(self, request):
+        url = resolve(request.url, self.variables)
+        body = self.prepare_body(url, resolve(request.body, self.variables))
+        token = resolve(request.token, self.variables)
+        status, content, _ = send(self.base_url, request.method, url, body,
+                                  token)
+        data = self.parse(content)
+        if isinstance(data, dict) and 200 <= status < 300:
+            for variable, field in request.captures.items():
+                if data.get(field) not in (None, ''):
+                    self.variables[variable] = str(data[field])
+            if url.endswith('/auth/signup/') and status == 200:
+                code = read_confirmation_code(self.email_dir, data['email'])
+                if code is not None:
+                    self.codes[data['username']] = code
+        return ReplayRequest(request.method, url, body, token), status, data
+
+    def prepare_body(self, url, body):
+        if not url.endswith('/auth/token/') or body is None:
+            return body
+        data = self.parse(body.encode())
+        if isinstance(data, dict) and data.get('username') in self.codes:
+            data['confirmation_code'] = self.codes[data['username']]
+            return json.dumps(data)
+        return body
+
+    @staticmethod
+    def parse(content):
+        try:
+            return json.loads(content)
+        except ValueError:
+            return None
+
+    def get_token(self, username, email):
+        self.execute(ReplayRequest('POST', '/api/v1/auth/signup/',
+                                   json.dumps({'username': username,
+                                               'email': email})))
+        _, status, data = self.execute(ReplayRequest(
+            'POST', '/api/v1/auth/token/',
+            json.dumps({'username': username, 'confirmation_code': ''})))
+        if status != 200:
+            raise RuntimeError(f'Could not get a token for {username}: '
+                               f'{status} {data}')
+        return data['token']
+
+
+def replay(base_url, requests, tokens, args):
+    """Нагрузка: запросы по кругу, не быстрее args.rate в секунду."""
+    results = []
+    lock = threading.Lock()
+    counter = iter(range(args.requests or 10 ** 12))
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    def worker(number):
+        token = tokens[number % len(tokens)] if tokens else None
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None or time.perf_counter() >= deadline:
+                return
+            if args.rate:
+                delay = started + index / args.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            request = requests[index % len(requests)]
+            status, _, elapsed = send(base_url, request.method, request.url,
+                                      request.body, request.token or token)
+            with lock:
+                results.append((request.method, request.url, status,
+                                elapsed))
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(worker, range(args.concurrency)))
+    return results, time.perf_counter() - started
+
+
+def report(results, elapsed):
+    latencies = [result[3] for result in results]
+    statuses = Counter(result[2] for result in results)
+    print(f'requests={len(results)} elapsed={elapsed:.2f}s '
+          f'rps={len(results) / elapsed:.1f} '
+          f'p50={percentile(latencies, 50) * 1000:.2f}ms '
+          f'p90={percentile(latencies, 90) * 1000:.2f}ms '
+          f'p99={percentile(latencies, 99) * 1000:.2f}ms')
+    print('statuses: ' + ', '.join(f'{status}={count}' for status, count
+                                   in sorted(statuses.items())))
+    endpoints = defaultdict(list)
+    for method, url, _, latency in results:
+        endpoints[f'{method} {ID_RE.sub("/{id}", url.split("?")[0])}'].append(
+            latency)
+    for endpoint, values in sorted(endpoints.items()):
+        print(f'  {endpoint:60} n={len(values):6} '
+              f'p50={percentile(values, 50) * 1000:8.2f}ms '
+              f'p99={percentile(values, 99) * 1000:8.2f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--collection', type=Path)
+    source.add_argument('--log', type=Path)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--email-dir', type=Path,
+                        default=API_DIR / 'sent_emails')
+    parser.add_argument('--users', type=int, default=0,
+                        help='Sign up N users and send their JWTs')
+    parser.add_argument('--writes', action='store_true',
+                        help='Replay non-GET requests too')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Requests per second, 0 is unlimited')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--requests', type=int, default=0,
+                        help='Stop after N requests, 0 is unlimited')
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip('/')
+
+    if args.collection:
+        templates, variables = load_collection(args.collection)
+        session = Session(base_url, args.email_dir, variables)
+        requests = []
+        failed = 0
+        for template in templates:
+            request, status, _ = session.execute(template)
+            failed += status in (0, 500)
+            requests.append(request)
+        print(f'collection: {len(requests)} requests executed, '
+              f'{failed} failed')
+    else:
+        session = Session(base_url, args.email_dir)
+        requests = load_log(args.log)
+
+    tokens = [session.get_token(f'replay-{number}',
+                                f'replay-{number}@yamdb.fake')
+              for number in range(args.users)]
+    if not args.writes:
+        requests = [request for request in requests
+                    if request.method in READ_METHODS]
+    if not requests:
+        parser.error('Nothing to replay')
+    report(*replay(base_url, requests, tokens, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb'
+
+
+def setup_django(database_name=None, pragmas=None):
+    """Настройка Django для бенчмарка на отдельной базе данных."""
+    sys.path.insert(0, str(API_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    from django.conf import settings
+
+    if database_name is not None:
+        settings.DATABASES['default']['NAME'] = str(database_name)
+        settings.CACHES['default']['LOCATION'] = f'{database_name}.cache'
+        settings.CACHES['codes']['LOCATION'] = f'{database_name}.codes'
+    if pragmas is not None:
+        settings.DATABASES['default']['PRAGMAS'] = pragmas
+    django.setup()
+
+
+def create_schema():
+    from django.core.management import call_command
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def seed_catalogue(titles, users, reviews_per_title, seed=0):
+    """Небольшой синтетический каталог с отзывами через bulk_create."""
+    import random
+
+    from reviews.models import Category, Genre, Review, Title, TitleGenre
+    from users.models import User
+
+    rnd = random.Random(seed)
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(10))
+    genres = list(Genre.objects.all())
+    User.objects.bulk_create(
+        User(username=f'user{number}', email=f'user{number}@yamdb.fake')
+        for number in range(users))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    Title.objects.bulk_create(
+        Title(name=f'Title {number}', year=1900 + number % 120,
+              category=category)
+        for number in range(titles))
+    title_ids = list(Title.objects.values_list('id', flat=True))
+    TitleGenre.objects.bulk_create(
+        TitleGenre(title_id=title_id, genre=rnd.choice(genres))
+        for title_id in title_ids)
+    Review.objects.bulk_create(
+        (Review(title_id=title_id, author_id=author_id, text='text',
+                score=rnd.randint(1, 10))
+         for title_id in title_ids
+         for author_id in rnd.sample(user_ids,
+                                     min(reviews_per_title, len(user_ids)))),
+        batch_size=1000)
+    return title_ids
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,37 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def nplusone_detection(settings):
+    settings.NPLUSONE_DETECTION = 'raise'
+    settings.NPLUSONE_THRESHOLD = 2
+
+
+@pytest.fixture(autouse=True, scope='session')
+def cache_dir(tmp_path_factory):
+    """Файловые кеши тестов во временной папке, а не в папке проекта."""
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    location = tmp_path_factory.mktemp('cache')
+    with override_settings(CACHES={
+        alias: ({**config, 'LOCATION': str(location / alias)}
+                if config['BACKEND'].endswith('FileBasedCache') else config)
+        for alias, config in settings.CACHES.items()
+    }):
+        yield location
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import caches
+
+    from api.cache import cache_layer
+
+    cache_layer.clear()
+    caches['codes'].clear()
+    yield
+    cache_layer.clear()
+    caches['codes'].clear()
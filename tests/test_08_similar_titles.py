@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from api.management.commands import build_title_similarity
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08SimilarTitlesAPI:
+
+    SIMILAR_URL_TEMPLATE = '/api/v1/titles/{title_id}/similar/'
+
+    def test_01_similar_titles(self, client, admin_client, user_client,
+                               moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        for user_client_ in (user_client, moderator_client):
+            for title in titles:
+                create_single_review(user_client_, title['id'], 'text', 5)
+
+        response = client.get(
+            self.SIMILAR_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{self.SIMILAR_URL_TEMPLATE}` возвращает ответ со статусом 200.'
+        )
+        assert response.json() == [], (
+            'До расчета похожих произведений эндпоинт '
+            f'`{self.SIMILAR_URL_TEMPLATE}` должен возвращать пустой список.'
+        )
+
+        call_command('build_title_similarity')
+        response = client.get(
+            self.SIMILAR_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [titles[1]['id']], (
+            f'Проверьте, что эндпоинт `{self.SIMILAR_URL_TEMPLATE}` '
+            'возвращает произведения, оцененные теми же пользователями.'
+        )
+        assert data[0]['rating'] == 5, (
+            f'Проверьте, что эндпоинт `{self.SIMILAR_URL_TEMPLATE}` '
+            'возвращает рейтинг похожих произведений.'
+        )
+
+    def test_02_similar_titles_not_found(self, client):
+        response = client.get(self.SIMILAR_URL_TEMPLATE.format(title_id=999))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что запрос похожих произведений для '
+            'несуществующего произведения возвращает ответ со статусом 404.'
+        )
+
+    def test_03_build_outside_transaction(self, admin_client, user_client,
+                                          monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        for title in titles:
+            create_single_review(user_client, title['id'], 'text', 5)
+        in_transaction = []
+        iter_similar_titles = build_title_similarity.iter_similar_titles
+
+        def tracked(*args, **kwargs):
+            for chunk in iter_similar_titles(*args, **kwargs):
+                in_transaction.append(connection.in_atomic_block)
+                yield chunk
+
+        monkeypatch.setattr(build_title_similarity, 'iter_similar_titles',
+                            tracked)
+        call_command('build_title_similarity')
+        assert in_transaction and not any(in_transaction), (
+            'Проверьте, что команда `build_title_similarity` рассчитывает '
+            'похожие произведения вне транзакции записи.'
+        )
@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09ScoreHistogramAPI:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_histogram(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            {'expand': 'score_histogram'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('score_histogram')
+
+    def test_01_histogram_is_opt_in(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert 'score_histogram' not in response.json(), (
+            'Поле `score_histogram` должно возвращаться только при '
+            'передаче параметра `?expand=score_histogram`.'
+        )
+        histogram = self.get_histogram(client, titles[0]['id'])
+        assert histogram == {str(score): 0 for score in range(1, 11)}, (
+            'Для произведения без отзывов гистограмма оценок должна '
+            'содержать нули для всех оценок от 1 до 10.'
+        )
+
+    def test_02_histogram_follows_review_writes(self, client, admin_client,
+                                                user_client,
+                                                moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(user_client, title_id, 'text', 3)
+        create_single_review(moderator_client, title_id, 'text', 3)
+        create_single_review(admin_client, title_id, 'text', 9)
+        histogram = self.get_histogram(client, title_id)
+        assert (histogram['3'], histogram['9']) == (2, 1), (
+            'Проверьте, что гистограмма оценок учитывает новые отзывы.'
+        )
+
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review.json()['id']
+        )
+        user_client.patch(url, data={'score': 9})
+        histogram = self.get_histogram(client, title_id)
+        assert (histogram['3'], histogram['9']) == (1, 2), (
+            'Проверьте, что гистограмма оценок учитывает изменение оценки.'
+        )
+
+        user_client.delete(url)
+        histogram = self.get_histogram(client, title_id)
+        assert (histogram['3'], histogram['9']) == (1, 1), (
+            'Проверьте, что гистограмма оценок учитывает удаление отзыва.'
+        )
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10UserStatsAPI:
+
+    USER_STATS_URL_TEMPLATE = '/api/v1/users/{username}/stats/'
+    ME_STATS_URL = '/api/v1/users/me/stats/'
+
+    def test_01_stats_permissions(self, client, user_client, admin, user):
+        response = client.get(self.ME_STATS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{self.ME_STATS_URL}` возвращает ответ со статусом 401.'
+        )
+        response = user_client.get(
+            self.USER_STATS_URL_TEMPLATE.format(username=admin.username)
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что пользователь не может получить статистику '
+            'другого пользователя.'
+        )
+        response = user_client.get(self.ME_STATS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'review_count': 0, 'comment_count': 0, 'average_score': None
+        }, (
+            f'Проверьте, что `{self.ME_STATS_URL}` возвращает нулевую '
+            'статистику для пользователя без отзывов и комментариев.'
+        )
+
+    def test_02_stats_counters(self, admin_client, admin, user_client, user,
+                               moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        expected = {'review_count': 1, 'comment_count': 1,
+                    'average_score': 5.0}
+        response = user_client.get(self.ME_STATS_URL)
+        assert response.json() == expected, (
+            f'Проверьте, что `{self.ME_STATS_URL}` учитывает отзывы и '
+            'комментарии пользователя.'
+        )
+        response = admin_client.get(
+            self.USER_STATS_URL_TEMPLATE.format(username=user.username)
+        )
+        assert response.json() == expected, (
+            'Проверьте, что администратор может получить статистику '
+            'пользователя.'
+        )
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        )
+        response = user_client.get(self.ME_STATS_URL)
+        assert response.json()['review_count'] == 0, (
+            'Проверьте, что удаление отзыва уменьшает счетчик отзывов '
+            'пользователя.'
+        )
+
+        user.stats.delete()
+        call_command('rebuild_counters')
+        response = user_client.get(self.ME_STATS_URL)
+        assert response.json() == {
+            'review_count': 0, 'comment_count': 1, 'average_score': None
+        }, 'Проверьте, что команда `rebuild_counters` пересчитывает счетчики.'
@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11SyncAPI:
+
+    SYNC_URL = '/api/v1/sync/'
+
+    def test_01_sync_permissions(self, client, user_client):
+        response = client.get(self.SYNC_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{self.SYNC_URL}` возвращает ответ со статусом 401.'
+        )
+        response = user_client.get(self.SYNC_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{self.SYNC_URL}` доступен только '
+            'администратору.'
+        )
+
+    def test_02_sync_feed(self, admin_client, user_client):
+        response = admin_client.get(self.SYNC_URL, {'since': 'abc'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.get(self.SYNC_URL)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        changed = {(change['model'], change['action'])
+                   for change in data['results']}
+        assert changed == {('genre', 'update'), ('category', 'update'),
+                           ('title', 'update')}, (
+            f'Проверьте, что `{self.SYNC_URL}` возвращает созданные жанры, '
+            'категории и произведения.'
+        )
+        title = next(change['data'] for change in data['results']
+                     if change['id'] == titles[0]['id']
+                     and change['model'] == 'title')
+        assert title['name'] == titles[0]['name']
+        assert data['has_more'] is False
+
+        cursor = data['next']
+        response = admin_client.get(self.SYNC_URL, {'since': cursor})
+        assert response.json()['results'] == [], (
+            'Проверьте, что после курсора `next` без новых изменений лента '
+            'пуста.'
+        )
+
+        review = create_single_review(user_client, titles[0]['id'], 'text', 7)
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        response = admin_client.get(self.SYNC_URL,
+                                    {'since': cursor, 'limit': 1})
+        data = response.json()
+        assert len(data['results']) == 1 and data['has_more'] is True, (
+            f'Проверьте, что `{self.SYNC_URL}` учитывает параметр `limit`.'
+        )
+        response = admin_client.get(self.SYNC_URL, {'since': cursor})
+        results = response.json()['results']
+        assert [change['model'] for change in results] == [
+            'review', 'title', 'title', 'genre'
+        ], f'Проверьте, что `{self.SYNC_URL}` сохраняет порядок изменений.'
+        assert results[0]['data']['id'] == review.json()['id']
+        assert results[1]['data']['rating'] == 7
+        assert results[2]['id'] == titles[1]['id']
+        assert results[2]['data']['genre'] == [], (
+            'Проверьте, что удаление жанра записывает изменение его '
+            'произведений.'
+        )
+        assert results[3]['action'] == 'delete' and results[3]['data'] is None
+
+        cursor = response.json()['next']
+        admin_client.delete(f'/api/v1/categories/{categories[1]["slug"]}/')
+        results = admin_client.get(self.SYNC_URL,
+                                   {'since': cursor}).json()['results']
+        assert [(change['model'], change['id']) for change in results] == [
+            ('title', titles[1]['id']), ('category', results[1]['id'])
+        ], ('Проверьте, что удаление категории записывает изменение '
+            'ее произведений.')
+        assert results[0]['data']['category'] is None
@@ -0,0 +1,58 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ExportAPI:
+
+    EXPORT_URL_TEMPLATE = '/api/v1/export/{resource}/'
+
+    def test_01_export_permissions(self, client, user_client):
+        url = self.EXPORT_URL_TEMPLATE.format(resource='titles')
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{self.EXPORT_URL_TEMPLATE}` доступен только '
+            'администратору.'
+        )
+
+    def test_02_export_formats(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.EXPORT_URL_TEMPLATE.format(resource='titles')
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,name,year,category_id', (
+            'Проверьте, что выгрузка в CSV повторяет структуру файлов '
+            '`static/data/*.csv`.'
+        )
+        assert len(lines) == len(titles) + 1
+
+        response = admin_client.get(url, {'fmt': 'ndjson'})
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        assert [row['name'] for row in rows] == [
+            title['name'] for title in titles
+        ], 'Проверьте выгрузку произведений в формате NDJSON.'
+
+        response = admin_client.get(url, {'fmt': 'xml'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(resource='unknown')
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_export_command(self, admin_client, tmp_path):
+        create_titles(admin_client)
+        call_command('export_data', output=str(tmp_path))
+        assert (tmp_path / 'titles.csv').exists()
+        assert (tmp_path / 'genre_title.csv').read_text().count('\n') == 4
+        call_command('export_data', 'genres', format='ndjson',
+                     output=str(tmp_path))
+        assert (tmp_path / 'genre.ndjson').read_text().count('\n') == 3
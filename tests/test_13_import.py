@@ -0,0 +1,134 @@
+import csv
+import shutil
+from io import StringIO
+from itertools import groupby
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from reviews.models import ChangeLog, Review, TitleScoreCount
+from users.models import UserStats
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13IncrementalImport:
+
+    def run_import(self, data_dir, manifest_dir):
+        out = StringIO()
+        call_command('import_csv_data', data_dir=str(data_dir),
+                     manifest_dir=str(manifest_dir), stdout=out)
+        return out.getvalue()
+
+    def test_01_reimport_applies_only_changes(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        manifest_dir = tmp_path / 'manifest'
+        shutil.copytree(settings.BASE_DIR / 'static' / 'data', data_dir)
+
+        self.run_import(data_dir, manifest_dir)
+        reviews_count = Review.objects.count()
+        assert reviews_count > 0
+        assert TitleScoreCount.objects.exists(), (
+            'Проверьте, что после импорта пересчитываются счетчики оценок.'
+        )
+
+        output = self.run_import(data_dir, manifest_dir)
+        assert 'review.csv: 0 inserted, 0 updated, 0 deleted' in output, (
+            'Повторный импорт неизмененных файлов не должен применять строки.'
+        )
+
+        review_file = data_dir / 'review.csv'
+        with open(review_file, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        first_id = rows[0]['id']
+        deleted = rows.pop()
+        rows[0]['text'] = 'Девять звёзд!'
+        rows.append({**deleted, 'id': int(deleted['id']) + 1000,
+                     'text': 'new', 'score': 7})
+        with open(review_file, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        last_changelog_id = ChangeLog.objects.order_by('-id').first().id
+
+        output = self.run_import(data_dir, manifest_dir)
+        assert 'review.csv: 1 inserted, 1 updated, 1 deleted' in output
+        assert Review.objects.count() == reviews_count
+        assert Review.objects.get(id=first_id).text == 'Девять звёзд!'
+        assert ChangeLog.objects.filter(
+            id__gt=last_changelog_id, model_name='review'
+        ).count() == 3, (
+            'Проверьте, что изменения импорта попадают в журнал синхронизации.'
+        )
+
+    def test_02_stale_manifest(self, tmp_path):
+        manifest_dir = tmp_path / 'manifest'
+        data_dir = settings.BASE_DIR / 'static' / 'data'
+        self.run_import(data_dir, manifest_dir)
+        reviews_count = Review.objects.count()
+        Review.objects.all().delete()
+        output = self.run_import(data_dir, manifest_dir)
+        assert f'review.csv: {reviews_count} inserted' in output, (
+            'Проверьте, что манифест, строк которого нет в базе, '
+            'не мешает импорту.'
+        )
+        assert Review.objects.count() == reviews_count
+
+    def test_03_counters_of_changed_rows(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        manifest_dir = tmp_path / 'manifest'
+        shutil.copytree(settings.BASE_DIR / 'static' / 'data', data_dir)
+        self.run_import(data_dir, manifest_dir)
+
+        review_file = data_dir / 'review.csv'
+        with open(review_file, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        changed = rows[0]
+        changed['score'] = 1 if changed['score'] != '1' else 2
+        with open(review_file, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        other = TitleScoreCount.objects.exclude(
+            title_id=changed['title_id']).first()
+        TitleScoreCount.objects.filter(pk=other.pk).update(count=100)
+
+        self.run_import(data_dir, manifest_dir)
+        assert TitleScoreCount.objects.get(pk=other.pk).count == 100, (
+            'Проверьте, что импорт пересчитывает счетчики только '
+            'затронутых произведений.'
+        )
+        assert sorted(TitleScoreCount.objects.filter(
+            title_id=changed['title_id'], count__gt=0
+        ).values_list('score', 'count')) == sorted(
+            (score, len(list(group))) for score, group in groupby(sorted(
+                Review.objects.filter(title_id=changed['title_id'])
+                .values_list('score', flat=True))))
+        stats = UserStats.objects.get(user_id=changed['author_id'])
+        assert stats.score_sum == sum(Review.objects.filter(
+            author_id=changed['author_id']).values_list('score', flat=True))
+
+    def test_04_deleted_genre_links(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        manifest_dir = tmp_path / 'manifest'
+        shutil.copytree(settings.BASE_DIR / 'static' / 'data', data_dir)
+        self.run_import(data_dir, manifest_dir)
+
+        genre_title_file = data_dir / 'genre_title.csv'
+        with open(genre_title_file, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        deleted = rows.pop(0)
+        with open(genre_title_file, 'w', encoding='utf-8',
+                  newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(deleted))
+            writer.writeheader()
+            writer.writerows(rows)
+        last_changelog_id = ChangeLog.objects.order_by('-id').first().id
+
+        self.run_import(data_dir, manifest_dir)
+        assert ChangeLog.objects.filter(
+            id__gt=last_changelog_id, model_name='title',
+            object_id=deleted['title_id']).exists(), (
+            'Проверьте, что импорт записывает в журнал синхронизации '
+            'произведения, потерявшие жанр.'
+        )
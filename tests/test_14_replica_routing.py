@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from api.async_urls import LIST_ACTIONS
+from api.async_views import async_read_view
+from api.middleware import ReadReplicaMiddleware
+from api.views import TitleViewSet
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class Test14ReplicaRouting:
+
+    GENRES_URL = '/api/v1/genres/'
+
+    def make_middleware(self, status=200, view=None):
+        used = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            used.append(router.db_for_read(Title))
+            return HttpResponse(status=status)
+
+        view = view or TitleViewSet.as_view({'get': 'list', 'post': 'create'})
+        middleware = ReadReplicaMiddleware(get_response)
+        return middleware, used
+
+    def test_01_safe_requests_use_replica(self, settings):
+        settings.REPLICA_DATABASES = ['replica1']
+        middleware, used = self.make_middleware()
+        middleware(RequestFactory().get('/api/v1/titles/'))
+        assert used == ['replica1'], (
+            'GET-запросы к API должны направляться в реплику.'
+        )
+        assert router.db_for_read(Title) == DEFAULT_DB_ALIAS, (
+            'Вне запроса чтение должно идти в основную базу.'
+        )
+        assert router.db_for_write(Title) == DEFAULT_DB_ALIAS
+
+    def test_02_read_your_writes(self, settings):
+        settings.REPLICA_DATABASES = ['replica1']
+        middleware, used = self.make_middleware()
+        factory = RequestFactory()
+        auth = {'HTTP_AUTHORIZATION': 'Bearer writer'}
+        middleware(factory.post('/api/v1/titles/', **auth))
+        middleware(factory.get('/api/v1/titles/', **auth))
+        middleware(factory.get('/api/v1/titles/'))
+        assert used == [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS, 'replica1'], (
+            'После изменяющего запроса клиент должен читать из основной '
+            'базы, остальные клиенты — из реплики.'
+        )
+
+    def test_03_no_replicas(self, settings):
+        settings.REPLICA_DATABASES = []
+        middleware, used = self.make_middleware()
+        middleware(RequestFactory().get('/api/v1/titles/'))
+        assert used == [DEFAULT_DB_ALIAS]
+
+    def test_04_async_views(self, settings):
+        settings.REPLICA_DATABASES = ['replica1']
+        middleware, used = self.make_middleware(
+            view=async_read_view(TitleViewSet, LIST_ACTIONS))
+        middleware(RequestFactory().get('/api/v1/titles/'))
+        assert used == ['replica1'], (
+            'Асинхронные вьюхи чтения тоже должны направляться в реплику.'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_sticky_reads_with_replica_file(self, admin, admin_client,
+                                               client, settings, tmp_path,
+                                               monkeypatch):
+        replica_path = tmp_path / 'replica.sqlite3'
+        connection.ensure_connection()
+        replica = sqlite3.connect(replica_path)
+        connection.connection.backup(replica)
+        replica.close()
+        monkeypatch.setitem(connections.settings, 'replica1', {
+            **connections.settings[DEFAULT_DB_ALIAS],
+            'NAME': str(replica_path)})
+        settings.REPLICA_DATABASES = ['replica1']
+        try:
+            response = admin_client.post(
+                self.GENRES_URL, {'name': 'Драма', 'slug': 'drama'},
+                format='json')
+            assert response.status_code == 201
+            assert admin_client.get(self.GENRES_URL).json()['count'] == 1, (
+                'После записи клиент должен читать из основной базы.'
+            )
+            assert client.get(self.GENRES_URL).json()['count'] == 0, (
+                'Другие клиенты читают из реплики, а не из кеша ответа '
+                'основной базы.'
+            )
+            request = RequestFactory().get(
+                self.GENRES_URL, HTTP_AUTHORIZATION=admin_client._credentials[
+                    'HTTP_AUTHORIZATION'])
+            other_worker_cache = caches.create_connection('default')
+            assert other_worker_cache.get(
+                ReadReplicaMiddleware.get_pin_key(request)), (
+                'Закрепление за основной базой должно быть в общем кеше '
+                'и действовать в других процессах.'
+            )
+        finally:
+            connections['replica1'].close()
@@ -0,0 +1,63 @@
+import sqlite3
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from api_yamdb.backends.pool import ConnectionPool, PoolTimeout
+
+
+class Test15ConnectionPool:
+
+    def make_pool(self, **kwargs):
+        return ConnectionPool(lambda: sqlite3.connect(
+            ':memory:', check_same_thread=False), **kwargs)
+
+    def test_01_reuse_and_stats(self):
+        pool = self.make_pool(max_size=2)
+        conn = pool.acquire()
+        assert pool.stats()['in_use'] == 1
+        pool.release(conn)
+        assert pool.acquire() is conn, (
+            'Пул должен повторно выдавать освобожденное соединение.'
+        )
+        stats = pool.stats()
+        assert (stats['opened'], stats['in_use'], stats['idle']) == (1, 1, 0)
+
+    def test_02_wait_and_timeout(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        conn = pool.acquire()
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+        threading.Timer(0.01, pool.release, args=(conn,)).start()
+        pool.timeout = 5
+        assert pool.acquire() is conn
+        stats = pool.stats()
+        assert (stats['waits'], stats['timeouts']) == (2, 1), (
+            'Пул должен учитывать ожидания и таймауты выдачи соединений.'
+        )
+        assert stats['wait_time'] > 0
+
+    def test_03_lifetime_and_health_check(self):
+        pool = self.make_pool(max_lifetime=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        assert pool.stats()['closed'] == 1, (
+            'Соединение старше max_lifetime не должно возвращаться в пул.'
+        )
+        pool.max_lifetime = 3600
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.close()
+        assert pool.acquire() is not conn, (
+            'Неработающее соединение должно отбрасываться при выдаче.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_15_metrics_endpoint(admin_client, user_client):
+    response = user_client.get('/api/v1/metrics/')
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    response = admin_client.get('/api/v1/metrics/')
+    assert response.status_code == HTTPStatus.OK
+    assert 'db_pools' in response.json()
@@ -0,0 +1,95 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import SyncToAsync, async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.handlers.asgi import ASGIHandler
+from django.test import RequestFactory
+
+from api.async_urls import DETAIL_ACTIONS, LIST_ACTIONS
+from api.async_views import async_read_view
+from api.utils import get_tokens_for_user
+from api.views import GenreViewSet, ReviewViewSet, TitleViewSet
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16AsyncReadViews:
+
+    def call(self, viewset, actions, url, **kwargs):
+        request = RequestFactory().get(url, **kwargs.pop('headers', {}))
+        view = async_read_view(viewset, actions)
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_01_same_payload_as_sync_api(self, client, admin_client, admin,
+                                         user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        cases = (
+            (TitleViewSet, LIST_ACTIONS, '/api/v1/titles/?year=1984', {}),
+            (TitleViewSet, DETAIL_ACTIONS,
+             f'/api/v1/titles/{titles[0]["id"]}/', {'pk': titles[0]['id']}),
+            (GenreViewSet, LIST_ACTIONS, '/api/v1/genres/?search=Драма', {}),
+            (ReviewViewSet, LIST_ACTIONS,
+             f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+             {'title_id': titles[0]['id']}),
+            (ReviewViewSet, DETAIL_ACTIONS,
+             f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+             {'title_id': titles[0]['id'], 'pk': reviews[0]['id']}),
+        )
+        for viewset, actions, url, kwargs in cases:
+            response = self.call(viewset, actions, url, **kwargs)
+            expected = client.get(url)
+            assert response.status_code == expected.status_code
+            assert json.loads(response.content) == expected.json(), (
+                f'Асинхронное чтение `{url}` должно возвращать те же данные, '
+                'что и синхронное API.'
+            )
+
+    def test_02_errors(self):
+        response = self.call(TitleViewSet, DETAIL_ACTIONS,
+                             '/api/v1/titles/999/', pk=999)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = self.call(
+            TitleViewSet, LIST_ACTIONS, '/api/v1/titles/',
+            headers={'HTTP_AUTHORIZATION': 'Bearer invalid'}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Неверный токен должен отклоняться и в асинхронном пути чтения.'
+        )
+
+    def test_03_permissions_checked(self, user):
+        token = get_tokens_for_user(user)['token']
+        user.role = 'admin'
+        user.save()
+        response = self.call(
+            TitleViewSet, LIST_ACTIONS, '/api/v1/titles/',
+            headers={'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что асинхронное чтение выполняет аутентификацию '
+            'и проверку прав DRF.'
+        )
+
+    def test_04_async_middleware_chain(self):
+        handler = ASGIHandler()
+        assert not isinstance(handler._middleware_chain, SyncToAsync), (
+            'Проверьте, что middleware API поддерживают асинхронный вызов '
+            'и цепочка ASGI не переходит в синхронный поток.'
+        )
+
+        async def get():
+            communicator = ApplicationCommunicator(handler, {
+                'type': 'http', 'method': 'GET', 'path': '/api/v1/genres/',
+                'query_string': b'', 'headers': []})
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(5)
+            await communicator.receive_output(5)
+            return start
+
+        start = async_to_sync(get)()
+        assert start['status'] == HTTPStatus.OK
+        headers = dict(start['headers'])
+        assert b'queries' in headers[b'Server-Timing']
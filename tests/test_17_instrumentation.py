@@ -0,0 +1,46 @@
+import json
+import logging
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17RequestInstrumentation:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_server_timing_header(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get(self.TITLES_URL)
+        server_timing = response['Server-Timing']
+        for metric in ('db;dur=', 'queries"', 'auth;dur=', 'serialize;dur=',
+                       'total;dur='):
+            assert metric in server_timing, (
+                'Проверьте, что ответ содержит заголовок `Server-Timing` '
+                f'с метрикой `{metric}`.'
+            )
+
+    def test_02_structured_logs(self, client, settings, caplog):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        settings.COUNT_CACHE_TIMEOUT = 0
+        with caplog.at_level(logging.INFO, logger='api.requests'):
+            client.get(self.TITLES_URL)
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['path'] == self.TITLES_URL
+        assert record['queries'] >= 1
+        assert 'sql' not in record
+
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        caplog.clear()
+        with caplog.at_level(logging.INFO, logger='api.requests'):
+            client.get(self.TITLES_URL)
+        record = caplog.records[-1]
+        assert record.levelno == logging.WARNING, (
+            'Медленные запросы должны журналироваться с уровнем WARNING.'
+        )
+        sql = json.loads(record.getMessage())['sql']
+        assert any('reviews_title' in query['sql'] for query in sql), (
+            'Журнал медленного запроса должен содержать его SQL-запросы.'
+        )
@@ -0,0 +1,87 @@
+import logging
+
+import pytest
+
+from api.instrumentation import (NPlusOneError, RequestMetrics,
+                                 get_query_shape)
+
+
+def create_catalogue(django_user_model, count=5):
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+              for number in range(2)]
+    title = None
+    for number in range(count):
+        title = Title.objects.create(name=f'Title {number}', year=2000,
+                                     category=category)
+        title.genre.set(genres)
+    for number in range(count):
+        author = django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake')
+        review = Review.objects.create(title=title, author=author,
+                                       text='Текст', score=5)
+        Comment.objects.create(review=review, author=author, text='Текст')
+    return title, review
+
+
+class Test18NPlusOneDetection:
+
+    def test_01_query_shape(self):
+        assert (get_query_shape('SELECT 1 WHERE id IN (%s, %s, %s)')
+                == get_query_shape('SELECT 1 WHERE id IN (%s)')), (
+            'Запросы с разной длиной списка IN должны иметь одну форму.'
+        )
+        metrics = RequestMetrics(track_shapes=True)
+        for _ in range(3):
+            metrics.add_query('SELECT 1 WHERE id = %s', 0.001)
+        metrics.add_query('SELECT 2', 0.001)
+        assert metrics.get_repeated_queries(2) == [
+            ('SELECT 1 WHERE id = %s', 3)
+        ]
+        assert RequestMetrics().get_repeated_queries(0) == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_catalogue_reads_without_nplusone(self, client,
+                                                 django_user_model):
+        title, review = create_catalogue(django_user_model)
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        )
+        for url in urls:
+            try:
+                response = client.get(url)
+            except NPlusOneError as exc:
+                raise AssertionError(
+                    f'Проверьте, что `{url}` не выполняет N+1 запросов: '
+                    f'{exc}'
+                )
+            assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_detection_modes(self, client, django_user_model, settings,
+                                caplog):
+        create_catalogue(django_user_model, count=1)
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        settings.NPLUSONE_THRESHOLD = 0
+        with pytest.raises(NPlusOneError):
+            client.get('/api/v1/titles/')
+
+        settings.NPLUSONE_DETECTION = 'log'
+        with caplog.at_level(logging.WARNING, logger='api.requests'):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert any('N+1 queries' in record.getMessage()
+                   for record in caplog.records), (
+            'В режиме `log` повторяющиеся запросы должны журналироваться.'
+        )
+
+        settings.NPLUSONE_DETECTION = ''
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger='api.requests'):
+            client.get('/api/v1/titles/')
+        assert not any('N+1 queries' in record.getMessage()
+                       for record in caplog.records)
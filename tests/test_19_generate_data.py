@@ -0,0 +1,71 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+
+from reviews.models import Comment, Review, Title, TitleScoreCount
+from users.models import User
+
+COUNTS = {'users': 30, 'titles': 20, 'reviews': 200, 'comments': 100}
+
+
+def generate(**options):
+    call_command('generate_data', **COUNTS, **options, stdout=StringIO())
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19GenerateData:
+
+    def test_01_csv_deterministic_by_seed(self, tmp_path):
+        generate(seed=1, output_dir=str(tmp_path / 'first'))
+        generate(seed=1, output_dir=str(tmp_path / 'second'))
+        generate(seed=2, output_dir=str(tmp_path / 'other'))
+        for path in sorted((tmp_path / 'first').iterdir()):
+            assert path.read_bytes() == (
+                tmp_path / 'second' / path.name).read_bytes(), (
+                'Проверьте, что при одном seed генерируются одинаковые данные.'
+            )
+        assert ((tmp_path / 'first' / 'review.csv').read_bytes()
+                != (tmp_path / 'other' / 'review.csv').read_bytes()), (
+            'Проверьте, что при разных seed генерируются разные данные.'
+        )
+
+    def test_02_csv_compatible_with_import(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        generate(output_dir=str(data_dir))
+        call_command('import_csv_data', data_dir=str(data_dir),
+                     manifest_dir=str(tmp_path / 'manifest'),
+                     stdout=StringIO())
+        with open(data_dir / 'review.csv', encoding='utf-8') as file:
+            csv_reviews = sum(1 for _ in file) - 1
+        assert Review.objects.count() == csv_reviews > 0, (
+            'Проверьте, что файлы `generate_data` загружаются '
+            '`import_csv_data`.'
+        )
+        assert Title.objects.count() == COUNTS['titles']
+
+    def test_03_database(self):
+        generate()
+        assert User.objects.count() == COUNTS['users']
+        assert Title.objects.count() == COUNTS['titles']
+        reviews = Review.objects.count()
+        assert COUNTS['reviews'] * 0.7 < reviews <= COUNTS['reviews'] * 1.3
+        assert Comment.objects.exists()
+        assert not (Review.objects.values('title', 'author')
+                    .annotate(count=Count('id')).filter(count__gt=1)
+                    .exists()), (
+            'Один автор не может оставить два отзыва на произведение.'
+        )
+        assert sum(TitleScoreCount.objects.values_list('count', flat=True)
+                   ) == reviews, (
+            'Проверьте, что после генерации пересчитываются счетчики оценок.'
+        )
+        assert Review.objects.order_by('pub_date').first().pub_date.year < (
+            Review.objects.order_by('pub_date').last().pub_date.year), (
+            'Даты публикации отзывов должны быть распределены во времени.'
+        )
+
+        with pytest.raises(CommandError):
+            generate()
@@ -0,0 +1,113 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+from reviews.slugs import SlugMap, category_slugs, genre_slugs
+
+
+def count_lookups(queries, table):
+    """Запросы к таблице без JOIN: поиск по slug, а не чтение связей."""
+    return sum(1 for query in queries
+               if query['sql'].startswith('SELECT')
+               and f'FROM "{table}"' in query['sql']
+               and 'JOIN' not in query['sql'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SlugCache:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def create_catalogue(self):
+        Category.objects.create(name='Фильм', slug='movie')
+        for number in range(5):
+            Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+
+    def post_title(self, admin_client, genres, category='movie'):
+        return admin_client.post(self.TITLES_URL, data={
+            'name': 'Поворот не туда', 'year': 2000,
+            'genre': genres, 'category': category,
+        }, format='json')
+
+    def test_01_genre_slugs_resolved_without_per_slug_queries(
+            self, admin_client):
+        self.create_catalogue()
+        genres = [f'g{number}' for number in range(5)]
+        self.post_title(admin_client, genres)
+        with CaptureQueriesContext(connection) as context:
+            response = self.post_title(admin_client, genres)
+        assert response.status_code == 201
+        assert sorted(genre['slug'] for genre in response.json()['genre']
+                      ) == genres
+        assert response.json()['category']['slug'] == 'movie'
+        assert count_lookups(context.captured_queries, 'reviews_genre') == 0, (
+            'Проверьте, что slug жанров проверяются без запроса на каждый '
+            'slug.'
+        )
+        assert count_lookups(context.captured_queries,
+                             'reviews_category') <= 1
+
+    def test_02_invalid_slugs(self, admin_client):
+        self.create_catalogue()
+        title_count = Title.objects.count()
+        with CaptureQueriesContext(connection) as context:
+            response = self.post_title(admin_client, ['g0', 'unknown', 'g1'])
+        assert response.status_code == 400
+        assert 'genre' in response.json()
+        assert count_lookups(context.captured_queries,
+                             'reviews_genre') <= 2, (
+            'Неизвестные slug должны проверяться одним запросом.'
+        )
+        response = self.post_title(admin_client, ['g0'], category='unknown')
+        assert response.status_code == 400
+        assert 'category' in response.json()
+        response = self.post_title(admin_client, 'g0')
+        assert response.status_code == 400
+        assert Title.objects.count() == title_count
+
+    def test_03_invalidation(self, admin_client):
+        self.create_catalogue()
+        assert genre_slugs.resolve(['new']) == [None]
+        genre = Genre.objects.create(name='Новый', slug='new')
+        assert genre_slugs.resolve(['new']) == [genre.id]
+
+        genre.slug = 'renamed'
+        genre.save()
+        assert genre_slugs.resolve(['new', 'renamed']) == [None, genre.id]
+        genre.delete()
+        response = self.post_title(admin_client, ['renamed'])
+        assert response.status_code == 400, (
+            'Проверьте, что словарь slug сбрасывается при удалении жанра.'
+        )
+
+        category_slugs.get_map()
+        Category.objects.filter(slug='movie').delete()
+        assert category_slugs.resolve(['movie']) == [None]
+
+    def test_04_invalidation_in_other_process(self):
+        self.create_catalogue()
+        other_process = SlugMap(Genre)
+        genre = Genre.objects.get(slug='g0')
+        assert other_process.resolve(['g0']) == [genre.id]
+        Genre.objects.filter(slug='g0').update(slug='renamed')
+        genre_slugs.invalidate()
+        assert other_process.resolve(['g0', 'renamed']) == [None, genre.id], (
+            'Проверьте, что сброс словаря через общий кеш виден '
+            'другим процессам.'
+        )
+
+    def test_05_invalidation_after_commit(self):
+        self.create_catalogue()
+        other_thread = SlugMap(Genre)
+        genre_id = Genre.objects.get(slug='g0').id
+        with transaction.atomic():
+            Genre.objects.get(id=genre_id).delete()
+            # Другой поток читает словарь до фиксации удаления.
+            other_thread.slugs = {'g0': genre_id}
+            other_thread.version = cache.get(genre_slugs.version_key)
+        assert other_thread.resolve(['g0']) == [None], (
+            'Проверьте, что версия словаря slug меняется после фиксации '
+            'транзакции.'
+        )
@@ -0,0 +1,123 @@
+import pytest
+from rest_framework.test import APIClient
+
+from reviews.models import (Category, ChangeLog, Genre, Title, TitleGenre)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21TitlesBulk:
+
+    BULK_URL = '/api/v1/titles/bulk/'
+
+    def create_catalogue(self):
+        Category.objects.create(name='Фильм', slug='movie')
+        Category.objects.create(name='Книга', slug='book')
+        for slug in ('drama', 'comedy', 'horror'):
+            Genre.objects.create(name=slug, slug=slug)
+
+    def get_titles(self, count, start=0):
+        return [{'name': f'Произведение {number}', 'year': 1950 + number,
+                 'description': 'Описание',
+                 'genre': ['drama', 'comedy'] if number % 2 else ['horror'],
+                 'category': 'movie'}
+                for number in range(start, start + count)]
+
+    def test_01_bulk_create(self, admin_client, django_assert_max_num_queries):
+        self.create_catalogue()
+        with django_assert_max_num_queries(15):
+            response = admin_client.post(self.BULK_URL, self.get_titles(50),
+                                         format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что администратор может создать произведения '
+            'списком через `/api/v1/titles/bulk/`.'
+        )
+        data = response.json()
+        assert len(data) == 50
+        assert Title.objects.count() == 50
+        assert TitleGenre.objects.count() == 75
+        first = data[1]
+        assert first['name'] == 'Произведение 1'
+        assert sorted(genre['slug'] for genre in first['genre']) == [
+            'comedy', 'drama']
+        assert first['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert ChangeLog.objects.filter(model_name='title').count() == 50, (
+            'Проверьте, что изменения записываются в журнал синхронизации.'
+        )
+
+        response = admin_client.post(self.BULK_URL, self.get_titles(2, 50),
+                                     format='json')
+        assert response.status_code == 201
+        assert len({title['id'] for title in response.json()}) == 2
+        assert Title.objects.count() == 52
+
+    def test_02_bulk_update(self, admin_client):
+        self.create_catalogue()
+        response = admin_client.post(self.BULK_URL, self.get_titles(3),
+                                     format='json')
+        ids = [title['id'] for title in response.json()]
+        items = self.get_titles(1, 10)
+        items[0].update(id=ids[0], genre=['comedy'], category='book')
+        response = admin_client.post(self.BULK_URL, items, format='json')
+        assert response.status_code == 201
+        title = Title.objects.get(id=ids[0])
+        assert title.name == 'Произведение 10'
+        assert title.category.slug == 'book'
+        assert list(title.genre.values_list('slug', flat=True)) == ['comedy']
+        assert Title.objects.count() == 3
+
+    def test_03_bulk_validation(self, admin_client, settings):
+        self.create_catalogue()
+        invalid = (
+            {'name': 'Без жанра', 'year': 2000, 'genre': [],
+             'category': 'movie'},
+            {'name': 'Неизвестный жанр', 'year': 2000,
+             'genre': ['unknown'], 'category': 'movie'},
+            {'name': 'Из будущего', 'year': 3000, 'genre': ['drama'],
+             'category': 'movie'},
+            {'id': 999, 'name': 'Нет такого', 'year': 2000,
+             'genre': ['drama'], 'category': 'movie'},
+        )
+        for item in invalid:
+            response = admin_client.post(
+                self.BULK_URL, self.get_titles(2) + [item], format='json')
+            assert response.status_code == 400, (
+                'Проверьте, что при ошибке в любом элементе списка '
+                'возвращается статус 400.'
+            )
+        assert not Title.objects.exists(), (
+            'При ошибке не должно создаваться ни одно произведение.'
+        )
+        response = admin_client.post(self.BULK_URL, self.get_titles(1)[0],
+                                     format='json')
+        assert response.status_code == 400
+
+        settings.TITLES_BULK_MAX_SIZE = 2
+        response = admin_client.post(self.BULK_URL, self.get_titles(3),
+                                     format='json')
+        assert response.status_code == 400
+
+    def test_04_bulk_permissions(self, user_client, moderator_client):
+        self.create_catalogue()
+        for request_client in (APIClient(), user_client, moderator_client):
+            response = request_client.post(self.BULK_URL, self.get_titles(1),
+                                           format='json')
+            assert response.status_code in (401, 403), (
+                'Создавать произведения списком может только администратор.'
+            )
+        assert not Title.objects.exists()
+
+    def test_05_bulk_ids_not_reused(self, admin_client):
+        self.create_catalogue()
+        response = admin_client.post(self.BULK_URL, self.get_titles(3),
+                                     format='json')
+        last_id = max(title['id'] for title in response.json())
+        Title.objects.filter(id=last_id).delete()
+        response = admin_client.post(self.BULK_URL, self.get_titles(2, 3),
+                                     format='json')
+        assert response.status_code == 201
+        for title in response.json():
+            assert title['id'] > last_id, (
+                'Проверьте, что id удаленных произведений не используются '
+                'повторно.'
+            )
+            assert Title.objects.get(id=title['id']).name == title['name']
@@ -0,0 +1,189 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.deletion import delete_object
+from reviews.models import (Category, ChangeLog, Comment, DeletionJob, Genre,
+                            Review, Title, TitleScoreCount)
+from users.models import User, UserStats
+
+
+def get_counters():
+    score_counts = set(TitleScoreCount.objects.filter(count__gt=0)
+                       .values_list('title_id', 'score', 'count'))
+    user_stats = set(UserStats.objects.exclude(review_count=0,
+                                               comment_count=0)
+                     .values_list('user_id', 'review_count',
+                                  'comment_count', 'score_sum'))
+    return score_counts, user_stats
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22DeferredDeletion:
+
+    TITLE_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    USER_URL_TEMPLATE = '/api/v1/users/{username}/'
+
+    def create_reviews(self, authors):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        titles = []
+        for number in range(2):
+            title = Title.objects.create(name=f'Произведение {number}',
+                                         year=2000, category=category)
+            title.genre.add(genre)
+            titles.append(title)
+        for title in titles:
+            for score, author in enumerate(authors, 3):
+                review = Review.objects.create(title=title, author=author,
+                                               text='Отзыв', score=score)
+                for comment_author in authors:
+                    Comment.objects.create(review=review, text='Комментарий',
+                                           author=comment_author)
+        return titles
+
+    def test_01_deferred_title_deletion(self, admin_client, admin, user,
+                                        moderator, settings):
+        settings.DELETION_MODE = 'deferred'
+        title, other_title = self.create_reviews((admin, user, moderator))
+        url = self.TITLE_URL_TEMPLATE.format(title_id=title.id)
+        response = admin_client.delete(url)
+        assert response.status_code == 204
+        assert Title.objects.filter(id=title.id).exists(), (
+            'В режиме отложенного удаления произведение удаляется '
+            'командой purge_deleted.'
+        )
+        assert admin_client.get(url).status_code == 404, (
+            'Проверьте, что удаленное произведение сразу скрывается из API.'
+        )
+        response = admin_client.get('/api/v1/titles/')
+        assert [item['id'] for item in response.json()['results']] == [
+            other_title.id]
+        response = admin_client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id))
+        assert response.json()['count'] == 0
+        assert admin_client.delete(url).status_code == 404
+        job = DeletionJob.objects.get()
+        assert (job.model_name, job.object_id, job.status) == (
+            'title', title.id, DeletionJob.PENDING)
+
+        call_command('purge_deleted', batch_size=2)
+        assert not Title.objects.filter(id=title.id).exists()
+        assert not Review.objects.filter(title_id=title.id).exists()
+        assert Comment.objects.count() == 9
+        job.refresh_from_db()
+        assert job.status == DeletionJob.DONE
+        assert job.deleted_count == 12, (
+            'Проверьте, что задача удаления учитывает удаленные отзывы и '
+            'комментарии.'
+        )
+        assert ChangeLog.objects.filter(
+            model_name='comment', action=ChangeLog.DELETE).count() == 9
+        counters = get_counters()
+        call_command('rebuild_counters')
+        assert counters == get_counters(), (
+            'Проверьте, что счетчики оценок и активности пользователей '
+            'обновляются при очистке.'
+        )
+
+    def test_02_deferred_user_deletion(self, admin_client, admin, user,
+                                       user_client, moderator, settings):
+        settings.DELETION_MODE = 'deferred'
+        titles = self.create_reviews((admin, user, moderator))
+        url = self.USER_URL_TEMPLATE.format(username=user.username)
+        response = admin_client.delete(url)
+        assert response.status_code == 204
+        assert admin_client.get(url).status_code == 404
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что удаленный пользователь не может авторизоваться.'
+        )
+        response = admin_client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0].id))
+        assert response.json()['count'] == 2, (
+            'Проверьте, что отзывы удаленного пользователя скрываются.'
+        )
+
+        call_command('purge_deleted', batch_size=3)
+        assert not User.objects.filter(id=user.id).exists()
+        assert Review.objects.count() == 4
+        assert Comment.objects.count() == 8
+        assert DeletionJob.objects.get().status == DeletionJob.DONE
+        counters = get_counters()
+        call_command('rebuild_counters')
+        assert counters == get_counters()
+
+    def test_03_immediate_deletion(self, admin_client, admin, user,
+                                   moderator):
+        titles = self.create_reviews((admin, user, moderator))
+        for review in Review.objects.filter(title=titles[1]):
+            for _ in range(5):
+                Comment.objects.create(review=review, text='Комментарий',
+                                       author=user)
+        query_counts = []
+        for title in titles:
+            with CaptureQueriesContext(connection) as queries:
+                response = admin_client.delete(
+                    self.TITLE_URL_TEMPLATE.format(title_id=title.id))
+            assert response.status_code == 204
+            assert not Title.objects.filter(id=title.id).exists()
+            query_counts.append(len(queries))
+        assert not DeletionJob.objects.exists(), (
+            'По умолчанию произведение удаляется сразу.'
+        )
+        assert query_counts[1] <= query_counts[0], (
+            'Проверьте, что число запросов при удалении произведения не '
+            'зависит от числа его отзывов и комментариев.'
+        )
+        assert not Review.objects.exists() and not Comment.objects.exists()
+        assert ChangeLog.objects.filter(
+            model_name='comment', action=ChangeLog.DELETE).count() == 33
+        assert ChangeLog.objects.filter(
+            model_name='review', action=ChangeLog.DELETE).count() == 6
+        counters = get_counters()
+        call_command('rebuild_counters')
+        assert counters == get_counters(), (
+            'Проверьте, что немедленное удаление обновляет счетчики оценок '
+            'и активности пользователей.'
+        )
+
+    def test_04_immediate_review_deletion(self, admin, user, moderator,
+                                          user_client):
+        title, _ = self.create_reviews((admin, user, moderator))
+        review = Review.objects.get(title=title, author=user)
+        response = user_client.delete(
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)}'
+            f'{review.id}/')
+        assert response.status_code == 204
+        assert not Comment.objects.filter(review_id=review.id).exists()
+        assert ChangeLog.objects.filter(
+            model_name='comment', action=ChangeLog.DELETE).count() == 3
+        counters = get_counters()
+        call_command('rebuild_counters')
+        assert counters == get_counters(), (
+            'Проверьте, что удаление отзыва обновляет счетчики его '
+            'комментариев.'
+        )
+
+    def test_05_large_purge_batch(self, admin, user, settings):
+        settings.DELETION_MODE = 'deferred'
+        count = 1200
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number}', year=2000)
+            for number in range(count))
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='Отзыв',
+                   score=title.id % 10 + 1)
+            for title in Title.objects.all() for author in (admin, user))
+        call_command('rebuild_counters')
+        delete_object(user)
+
+        call_command('purge_deleted', batch_size=count)
+        assert DeletionJob.objects.get().status == DeletionJob.DONE, (
+            'Проверьте, что очистка пачкой из многих записей завершается.'
+        )
+        assert Review.objects.count() == count
+        counters = get_counters()
+        call_command('rebuild_counters')
+        assert counters == get_counters()
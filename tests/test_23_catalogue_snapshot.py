@@ -0,0 +1,126 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.catalogue import catalogue
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.fixture
+def snapshot_settings(settings):
+    settings.CATALOGUE_SNAPSHOT = True
+    catalogue.invalidate()
+    return settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23CatalogueSnapshot:
+
+    TITLES_URL = '/api/v1/titles/'
+    QUERIES = (
+        '', '?page=2', '?genre=drama', '?genre__slug=comedy',
+        '?category=book', '?category__slug=movie&genre=drama',
+        '?year=2001', '?name=Произведение 3', '?genre=unknown',
+        '?category=book&year=2001', '?page=2&genre=drama',
+    )
+
+    def create_catalogue(self, admin):
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        book = Category.objects.create(name='Книга', slug='book')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        titles = []
+        for number in range(14):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000 + number % 3,
+                description=f'Описание {number}',
+                category=book if number % 4 else movie)
+            title.genre.set([drama, comedy] if number % 2 else [drama])
+            titles.append(title)
+        Title.objects.create(name='Без категории', year=2001)
+        for score, title in enumerate(titles[:10], 1):
+            Review.objects.create(title=title, author=admin, text='Отзыв',
+                                  score=score)
+        return titles
+
+    def get_responses(self, settings):
+        client = APIClient()
+        responses = {}
+        for snapshot in (False, True):
+            settings.CATALOGUE_SNAPSHOT = snapshot
+            for query in self.QUERIES:
+                response = client.get(self.TITLES_URL + query)
+                responses.setdefault(query, []).append(
+                    (response.status_code, response.json()))
+        return responses
+
+    def assert_same_responses(self, settings):
+        for query, (expected, actual) in self.get_responses(
+                settings).items():
+            assert actual == expected, (
+                'Проверьте, что список произведений из снимка каталога '
+                f'совпадает с ответом из базы данных для `{query}`.'
+            )
+
+    def test_01_snapshot_matches_database(self, admin, snapshot_settings):
+        self.create_catalogue(admin)
+        self.assert_same_responses(snapshot_settings)
+        response = APIClient().get(self.TITLES_URL + '?year=year')
+        assert response.status_code == 400
+
+    def test_02_no_filter_queries(self, admin, snapshot_settings):
+        self.create_catalogue(admin)
+        client = APIClient()
+        client.get(self.TITLES_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL + '?genre=drama&page=2')
+        assert response.status_code == 200
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что фильтрация и пагинация выполняются по снимку: '
+            'из базы читаются только описания произведений страницы.'
+        )
+
+    def test_03_incremental_refresh(self, admin, admin_client,
+                                    snapshot_settings):
+        titles = self.create_catalogue(admin)
+        APIClient().get(self.TITLES_URL)
+
+        titles[0].name = 'Новое название'
+        titles[0].save()
+        titles[1].genre.clear()
+        titles[2].delete()
+        Review.objects.create(title=titles[12], author=admin, text='Отзыв',
+                              score=7)
+        Genre.objects.filter(slug='comedy').update(name='Комедии')
+        Genre.objects.get(slug='comedy').save()
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Новое', 'year': 2001, 'genre': ['comedy'],
+            'category': 'book'}, format='json')
+        self.assert_same_responses(snapshot_settings)
+        assert catalogue.memory_usage()['titles'] == 15
+
+    def test_04_memory_metrics(self, admin, admin_client,
+                               snapshot_settings):
+        self.create_catalogue(admin)
+        APIClient().get(self.TITLES_URL)
+        response = admin_client.get('/api/v1/metrics/')
+        usage = response.json()['catalogue']
+        assert usage['titles'] == 15
+        assert usage['bytes'] > 0
+        assert usage['bytes_per_100k_titles'] == round(
+            usage['bytes'] * 100000 / 15)
+
+    def test_05_ids_between_calls(self, admin, snapshot_settings):
+        titles = self.create_catalogue(admin)
+        catalogue.refresh()
+        ids = catalogue.filter([('genre', 'comedy')])
+        catalogue.remove(titles[1].id)
+        catalogue.set(0, 'Первое', 2000, None, (), 0, 0)
+        rows = catalogue.get_titles(ids)
+        assert [row.id for row in rows] == ids[1:], (
+            'Проверьте, что filter возвращает id, а не позиции: обновление '
+            'снимка между вызовами не должно подменять произведения.'
+        )
+        assert [row.name for row in rows] == [
+            title.name for title in titles if title.id in ids[1:]]
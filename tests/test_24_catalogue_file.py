@@ -0,0 +1,104 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from reviews.catalogue import MappedCatalogue, catalogue_file
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24CatalogueFile:
+
+    TITLES_URL = '/api/v1/titles/'
+    QUERIES = (
+        '', '?page=2', '?genre=drama', '?genre=comedy&category=book',
+        '?year=2001', '?name=Произведение 3', '?name=Произведение',
+        '?name=Фильм «Ё»', '?genre=unknown', '?page=2&genre=drama',
+    )
+
+    def create_catalogue(self, admin):
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        book = Category.objects.create(name='Книга', slug='book')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        names = [f'Произведение {number}' for number in range(13)]
+        names[5] = 'Фильм «Ё»'
+        titles = []
+        for number, name in enumerate(names):
+            title = Title.objects.create(
+                name=name, year=2000 + number % 3,
+                description=f'Описание {number}',
+                category=book if number % 4 else movie)
+            title.genre.set([drama, comedy] if number % 2 else [comedy])
+            titles.append(title)
+        Title.objects.create(name='Без жанра', year=2001)
+        for score, title in enumerate(titles[:6], 3):
+            Review.objects.create(title=title, author=admin, text='Отзыв',
+                                  score=score)
+        return titles
+
+    def build(self, path):
+        call_command('build_catalogue_snapshot', output=path,
+                     stdout=io.StringIO())
+
+    def get_responses(self, settings, snapshot):
+        settings.CATALOGUE_SNAPSHOT = snapshot
+        client = APIClient()
+        return {query: client.get(self.TITLES_URL + query).json()
+                for query in self.QUERIES}
+
+    def test_01_file_matches_database(self, admin, settings, tmp_path):
+        path = tmp_path / 'catalogue.snapshot'
+        settings.CATALOGUE_SNAPSHOT_FILE = str(path)
+        titles = self.create_catalogue(admin)
+        assert self.get_responses(settings, True) == self.get_responses(
+            settings, False), (
+            'Проверьте, что без файла снимка список читается из базы.'
+        )
+        self.build(path)
+        expected = self.get_responses(settings, False)
+        assert self.get_responses(settings, True) == expected, (
+            'Проверьте, что список произведений из файла снимка совпадает '
+            'с ответом из базы данных.'
+        )
+
+        snapshot = catalogue_file.refresh(str(path))
+        titles[0].delete()
+        assert self.get_responses(settings, True)['']['count'] == (
+            expected['']['count']), (
+            'Файл снимка обновляется только пересборкой.'
+        )
+        self.build(path)
+        assert catalogue_file.refresh(str(path)) is not snapshot
+        assert self.get_responses(settings, True) == self.get_responses(
+            settings, False), (
+            'Проверьте, что процесс подменяет снимок при пересборке файла.'
+        )
+        assert len(snapshot.ids) == 14, (
+            'Старый снимок должен оставаться доступным до освобождения.'
+        )
+
+    def test_02_file_format(self, admin, tmp_path):
+        self.create_catalogue(admin)
+        path = tmp_path / 'catalogue.snapshot'
+        self.build(path)
+        snapshot = MappedCatalogue(path)
+        usage = snapshot.memory_usage()
+        assert usage['titles'] == 14
+        assert usage['bytes'] == path.stat().st_size
+        assert usage['shared'] is True
+        assert snapshot.get_name(5) == 'Фильм «Ё»'
+        assert snapshot.filter([('name', 'Фильм «Ё»')]) == [
+            snapshot.ids[5]]
+        assert snapshot.filter([('genre', 'drama'), ('year', 2001)]) == [
+            snapshot.ids[1], snapshot.ids[7]]
+
+        invalid = tmp_path / 'invalid.snapshot'
+        invalid.write_bytes(b'0' * 64)
+        with pytest.raises(ValueError):
+            MappedCatalogue(invalid)
+        assert not list(tmp_path.glob('*.tmp')), (
+            'Временный файл должен заменять снимок атомарно.'
+        )
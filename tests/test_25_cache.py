@@ -0,0 +1,175 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import SingleFlight, cache_layer
+from api_yamdb.backends.filebased import FileBasedCache
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Cache:
+
+    TITLES_URL = '/api/v1/titles/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_response_cache(self, client):
+        Title.objects.create(name='Произведение', year=2000)
+        expected = client.get(self.TITLES_URL).json()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL)
+        assert response.json() == expected
+        assert not context.captured_queries, (
+            'Проверьте, что повторный запрос списка читается из кеша '
+            'без запросов к базе данных.'
+        )
+
+        Title.objects.create(name='Новое произведение', year=2001)
+        assert client.get(self.TITLES_URL).json()['count'] == 2, (
+            'Проверьте, что изменение каталога сбрасывает кеш ответов.'
+        )
+
+    def test_02_auth_cache(self, user, user_client, admin_client):
+        assert user_client.get(self.USERS_URL).status_code == 403
+        with CaptureQueriesContext(connection) as context:
+            user_client.get(self.USERS_URL)
+        assert not context.captured_queries, (
+            'Проверьте, что пользователь из токена читается из кеша.'
+        )
+        response = admin_client.patch(f'{self.USERS_URL}{user.username}/',
+                                      {'role': 'admin'}, format='json')
+        assert response.status_code == 200
+        assert user_client.get(self.USERS_URL).status_code == 200, (
+            'Проверьте, что изменение пользователя сбрасывает его в кеше '
+            'аутентификации.'
+        )
+
+    def test_03_users_count(self, admin, admin_client, django_user_model):
+        assert admin_client.get(self.USERS_URL).json()['count'] == 1
+        for number in range(5):
+            django_user_model.objects.create_user(
+                username=f'user{number}', email=f'user{number}@yamdb.fake')
+        data = admin_client.get(self.USERS_URL).json()
+        assert data['count'] == 6 and data['next'], (
+            'Проверьте, что число пользователей в пагинации не берется '
+            'из кеша, который не сбрасывают изменения пользователей.'
+        )
+        assert admin_client.get(f'{self.USERS_URL}?page=2').status_code == 200
+
+    def test_04_tiered_cache(self, settings):
+        cache_layer.set('key', [1], 60)
+        cache_layer.shared.delete('key')
+        assert cache_layer.get('key') == [1], (
+            'Проверьте, что значение читается из кеша процесса (L1).'
+        )
+        settings.CACHE_L1_TIMEOUT = 0
+        cache_layer.local.clear()
+        cache_layer.set('key', [2], 60)
+        assert not cache_layer.local
+        assert cache_layer.get('key') == [2]
+        assert cache_layer.get_or_set('other', lambda: 3, 60) == 3
+        assert cache_layer.get_or_set('other', lambda: 4, 60) == 3
+
+    def test_05_links_of_other_host(self, client, settings):
+        for number in range(settings.PAGE_SIZE_PAGINATION + 1):
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+        client.get(self.TITLES_URL, HTTP_HOST='old.yamdb.fake')
+        response = client.get(self.TITLES_URL, HTTP_HOST='yamdb.fake',
+                              secure=True)
+        assert response.json()['next'].startswith('https://yamdb.fake/'), (
+            'Проверьте, что кеш ответов учитывает схему и хост: ссылки '
+            'пагинации в ответе абсолютные.'
+        )
+
+    def test_06_author_username_change(self, client, user, user_client,
+                                       admin_client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'{self.TITLES_URL}{title.id}/reviews/'
+        user_client.post(url, {'text': 'Отзыв', 'score': 5}, format='json')
+        assert client.get(url).json()['results'][0]['author'] == (
+            user.username)
+        response = admin_client.patch(f'{self.USERS_URL}{user.username}/',
+                                      {'username': 'renamed'}, format='json')
+        assert response.status_code == 200
+        assert client.get(url).json()['results'][0]['author'] == 'renamed', (
+            'Проверьте, что смена имени пользователя сбрасывает кеш ответов '
+            'с его отзывами.'
+        )
+
+
+class Test25AtomicAdd:
+
+    def test_01_concurrent_add(self, tmp_path):
+        cache = FileBasedCache(str(tmp_path), {})
+        barrier = threading.Barrier(8)
+        added = []
+
+        def add(number):
+            barrier.wait()
+            added.append(cache.add('key', number, 60))
+
+        threads = [threading.Thread(target=add, args=(number,))
+                   for number in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        assert added.count(True) == 1, (
+            'Проверьте, что из одновременных add в файловом кеше '
+            'проходит один.'
+        )
+        assert cache.add('expired', 1, -1)
+        assert cache.add('expired', 2, 60)
+        assert cache.get('expired') == 2
+        assert not list(tmp_path.glob('tmp*'))
+
+
+class Test25SingleFlight:
+
+    def test_01_coalescing(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        def call():
+            results.append(flight.do('key', compute))
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        for _ in range(500):
+            if flight.shared == 4:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert len(calls) == 1, (
+            'Проверьте, что одновременные вызовы вычисляют значение один раз.'
+        )
+        assert results == ['result'] * 5
+
+    def test_02_errors(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            flight.do('key', fail)
+        assert flight.do('key', lambda: 1) == 1, (
+            'Ошибка не должна оставлять ключ занятым.'
+        )
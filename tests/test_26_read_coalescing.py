@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connections
+from django.test import RequestFactory
+from rest_framework import mixins
+from rest_framework.test import APIClient
+
+from api.async_urls import DETAIL_ACTIONS
+from api.async_views import async_read_view
+from api.cache import cache_layer
+from api.utils import get_tokens_for_user
+from api.views import TitleViewSet
+from reviews.models import Review, Title
+
+
+def wait_followers(flight, count):
+    for _ in range(500):
+        if flight.shared >= count:
+            return
+        time.sleep(0.01)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ReadCoalescing:
+
+    REQUESTS = 5
+
+    def read_title(self, title_id):
+        view = async_read_view(TitleViewSet, DETAIL_ACTIONS)
+        url = f'/api/v1/titles/{title_id}/'
+
+        async def read_all():
+            return await asyncio.gather(*(
+                view(RequestFactory().get(url), pk=title_id)
+                for _ in range(self.REQUESTS)))
+
+        return async_to_sync(read_all)()
+
+    def count_calls(self, monkeypatch, cls, name, wait=None):
+        calls = []
+        method = getattr(cls, name)
+
+        def counted(*args, **kwargs):
+            calls.append(1)
+            if wait is not None:
+                wait()
+            return method(*args, **kwargs)
+
+        monkeypatch.setattr(cls, name, counted)
+        return calls
+
+    def test_01_async_title(self, admin, monkeypatch, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=admin, text='Отзыв',
+                              score=7)
+        calls = self.count_calls(monkeypatch, mixins.RetrieveModelMixin,
+                                 'retrieve')
+        responses = self.read_title(title.id)
+        assert len(calls) == 1, (
+            'Проверьте, что одновременные одинаковые запросы произведения '
+            'вычисляются один раз.'
+        )
+        assert len({id(response) for response in responses}) == (
+            self.REQUESTS), 'Каждый запрос должен получать свой ответ.'
+        assert {response.content for response in responses} == {
+            responses[0].content}
+        assert b'"rating":7' in responses[0].content.replace(b' ', b'')
+
+        settings.READ_COALESCING = False
+        calls.clear()
+        self.read_title(title.id)
+        assert len(calls) == self.REQUESTS
+
+    def test_02_read_after_write(self, monkeypatch, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        title = Title.objects.create(name='Произведение', year=2000)
+        release = threading.Event()
+        calls = self.count_calls(monkeypatch, mixins.RetrieveModelMixin,
+                                 'retrieve', wait=lambda: release.wait(5))
+        view = async_read_view(TitleViewSet, DETAIL_ACTIONS)
+        url = f'/api/v1/titles/{title.id}/'
+
+        def rename():
+            try:
+                renamed = Title.objects.get(pk=title.pk)
+                renamed.name = 'Новое'
+                renamed.save()
+            finally:
+                connections.close_all()
+
+        async def read_write_read():
+            first = asyncio.ensure_future(
+                view(RequestFactory().get(url), pk=title.id))
+            while not calls:
+                await asyncio.sleep(0.01)
+            await sync_to_async(rename, thread_sensitive=False)()
+            second = asyncio.ensure_future(
+                view(RequestFactory().get(url), pk=title.id))
+            await asyncio.sleep(0.1)
+            release.set()
+            return await first, await second
+
+        _, response = async_to_sync(read_write_read)()
+        assert len(calls) == 2, (
+            'Проверьте, что запрос после записи не ждет вычисления, '
+            'начатого до нее: в ключе должна быть версия данных.'
+        )
+        assert 'Новое' in response.content.decode()
+
+    def test_03_authentication_per_request(self, user, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        title = Title.objects.create(name='Произведение', year=2000)
+        token = get_tokens_for_user(user)['token']
+        user.role = 'admin'
+        user.save()
+        view = async_read_view(TitleViewSet, DETAIL_ACTIONS)
+        url = f'/api/v1/titles/{title.id}/'
+        revoked = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+        async def read_all():
+            return await asyncio.gather(*(
+                view(RequestFactory().get(url, **headers), pk=title.id)
+                for headers in (revoked, {}, revoked, {})))
+
+        statuses = [response.status_code
+                    for response in async_to_sync(read_all)()]
+        assert statuses == [401, 200, 401, 200], (
+            'Проверьте, что аутентификация и права проверяются для каждого '
+            'из одновременных запросов, а не только для первого.'
+        )
+
+    def test_04_sync_reviews(self, admin, monkeypatch, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=admin, text='Отзыв',
+                              score=7)
+        flight = cache_layer.flight
+        followers = flight.shared + self.REQUESTS - 1
+        calls = self.count_calls(
+            monkeypatch, mixins.ListModelMixin, 'list',
+            wait=lambda: wait_followers(flight, followers))
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        responses = []
+
+        def read():
+            try:
+                responses.append(APIClient().get(url))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=read)
+                   for _ in range(self.REQUESTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        assert len(calls) == 1, (
+            'Проверьте, что одновременные одинаковые запросы отзывов '
+            'вычисляются один раз.'
+        )
+        assert [response.json()['count'] for response in responses] == (
+            [1] * self.REQUESTS)
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import AuthIPThrottle, SlidingWindowThrottle
+from api.views import RegisterUser
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Throttling:
+
+    SIGNUP_URL = '/api/v1/auth/signup/'
+    TOKEN_URL = '/api/v1/auth/token/'
+
+    def signup(self, client, username, **extra):
+        return client.post(self.SIGNUP_URL, {
+            'username': username, 'email': f'{username}@yamdb.fake'},
+            **extra)
+
+    def test_01_user_limit(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {'auth_user': '3/m'}
+        for _ in range(3):
+            assert self.signup(client, 'user').status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            response = self.signup(client, 'USER')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что регистрация ограничена по имени пользователя.'
+        )
+        assert int(response['Retry-After']) > 0
+        assert not context.captured_queries, (
+            'Ограничение частоты не должно обращаться к базе данных.'
+        )
+        assert self.signup(client, 'other').status_code == HTTPStatus.OK
+        response = client.post(self.TOKEN_URL, {
+            'username': 'user', 'confirmation_code': 'invalid'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Счетчики эндпоинтов должны быть раздельными.'
+        )
+
+    def test_02_ip_and_endpoint_limits(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {'auth_ip': '2/m'}
+        for number in range(2):
+            assert self.signup(client, f'user{number}').status_code == (
+                HTTPStatus.OK)
+        assert self.signup(client, 'user2').status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS), (
+            'Проверьте, что регистрация ограничена по IP-адресу.'
+        )
+        assert self.signup(client, 'user3',
+                           REMOTE_ADDR='10.0.0.1').status_code == HTTPStatus.OK
+
+        settings.AUTH_THROTTLE_RATES = {'auth_endpoint': '1/m'}
+        assert self.signup(client, 'user4',
+                           REMOTE_ADDR='10.0.0.2').status_code == HTTPStatus.OK
+        assert self.signup(client, 'user5',
+                           REMOTE_ADDR='10.0.0.3').status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS), (
+            'Проверьте общий лимит эндпоинта.'
+        )
+
+    def test_03_sliding_window(self, monkeypatch, settings):
+        settings.AUTH_THROTTLE_RATES = {'auth_ip': '4/m'}
+        now = [630.0]
+        monkeypatch.setattr(SlidingWindowThrottle, 'timer',
+                            staticmethod(lambda: now[0]))
+        request = APIRequestFactory().post('/')
+        view = RegisterUser()
+
+        def allow():
+            return AuthIPThrottle().allow_request(request, view)
+
+        assert [allow() for _ in range(5)] == [True] * 4 + [False]
+        now[0] = 661.0
+        assert allow()
+        throttle = AuthIPThrottle()
+        assert not throttle.allow_request(request, view), (
+            'Запросы прошлого окна должны учитываться с весом.'
+        )
+        assert throttle.wait() == pytest.approx(14)
+        now[0] = 676.0
+        assert allow()
+        assert not allow()
+        now[0] = 780.0
+        assert all(allow() for _ in range(4))
+
+    def test_04_rejected_requests_not_counted(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {'auth_ip': '1/m',
+                                        'auth_endpoint': '3/m'}
+        assert self.signup(client, 'user0').status_code == HTTPStatus.OK
+        for number in range(1, 5):
+            assert self.signup(client, f'user{number}').status_code == (
+                HTTPStatus.TOO_MANY_REQUESTS)
+        for number in range(2):
+            response = self.signup(client, f'other{number}',
+                                   REMOTE_ADDR=f'10.0.0.{number}')
+            assert response.status_code == HTTPStatus.OK, (
+                'Запросы, отклоненные по IP, не должны расходовать '
+                'общий лимит эндпоинта.'
+            )
+
+    def test_05_forwarded_for_ignored(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {'auth_ip': '1/m'}
+        assert self.signup(client, 'user0').status_code == HTTPStatus.OK
+        response = self.signup(client, 'user1',
+                               HTTP_X_FORWARDED_FOR='10.0.0.1')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Без прокси IP клиента не должен браться из X-Forwarded-For.'
+        )
+
+    def test_06_not_a_dictionary(self, client):
+        for url in (self.SIGNUP_URL, self.TOKEN_URL):
+            response = client.post(url, [], content_type='application/json')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что POST-запрос к `{url}` со списком в теле '
+                'возвращает ответ со статусом 400.'
+            )
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.utils import get_tokens_for_user
+from reviews.models import Review, Title
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user)["token"]}')
+    return client
+
+
+def user_queries(context):
+    return [query['sql'] for query in context.captured_queries
+            if '"users_user"' in query['sql']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28TokenClaims:
+
+    GENRES_URL = '/api/v1/genres/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_claims(self, admin, user):
+        token = AccessToken(get_tokens_for_user(admin)['token'])
+        assert token['role'] == 'admin'
+        assert token['is_superuser'] is False
+        assert token['token_version'] == admin.token_version
+
+        admin_client = get_client(admin)
+        user_client = get_client(user)
+        admin_client.get(self.GENRES_URL)
+        user_client.get(self.GENRES_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                self.GENRES_URL, {'name': 'Драма', 'slug': 'drama'},
+                format='json')
+            assert response.status_code == HTTPStatus.CREATED
+            response = user_client.post(
+                self.GENRES_URL, {'name': 'Комедия', 'slug': 'comedy'},
+                format='json')
+            assert response.status_code == HTTPStatus.FORBIDDEN
+        assert not user_queries(context), (
+            'Проверьте, что права проверяются по утверждениям токена, '
+            f'а пользователь не загружается из базы: {user_queries(context)}'
+        )
+
+    def test_02_author_from_token(self, admin, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client = get_client(user)
+        response = client.post(f'/api/v1/titles/{title.id}/reviews/',
+                               {'text': 'Отзыв', 'score': 7}, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        review = Review.objects.get()
+        assert review.author == user
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+            {'text': 'Новый отзыв'}, format='json')
+        assert response.status_code == HTTPStatus.OK
+        response = get_client(admin).get(f'{self.USERS_URL}me/')
+        assert response.json()['username'] == admin.username
+
+    def test_03_role_change_revokes_tokens(self, admin, user):
+        admin_client = get_client(admin)
+        user_client = get_client(user)
+        assert user_client.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN)
+        response = admin_client.patch(f'{self.USERS_URL}{user.username}/',
+                                      {'role': 'admin'}, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.USERS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED), (
+            'Проверьте, что смена роли отзывает выданные токены.'
+        )
+        user.refresh_from_db()
+        assert get_client(user).get(self.USERS_URL).status_code == (
+            HTTPStatus.OK)
+
+        response = admin_client.patch(f'{self.USERS_URL}{user.username}/',
+                                      {'bio': 'Биография'}, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert get_client(user).get(self.USERS_URL).status_code == (
+            HTTPStatus.OK), 'Другие поля не должны отзывать токены.'
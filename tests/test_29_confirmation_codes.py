@@ -0,0 +1,80 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import User
+
+CODE_RE = re.compile(r'<(\w+)>')
+
+
+def get_writes(context):
+    return [query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE'))]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29ConfirmationCodes:
+
+    SIGNUP_URL = '/api/v1/auth/signup/'
+    TOKEN_URL = '/api/v1/auth/token/'
+    DATA = {'username': 'valid_username', 'email': 'valid@yamdb.fake'}
+
+    def signup(self, client):
+        mail.outbox.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.SIGNUP_URL, self.DATA)
+        assert response.status_code == HTTPStatus.OK
+        return CODE_RE.search(mail.outbox[-1].body).group(1), context
+
+    def get_token(self, client, code):
+        return client.post(self.TOKEN_URL, {
+            'username': self.DATA['username'], 'confirmation_code': code})
+
+    def test_01_signup_writes(self, client):
+        code, context = self.signup(client)
+        writes = get_writes(context)
+        assert len(writes) == 1 and writes[0].startswith('INSERT'), (
+            'Проверьте, что регистрация нового пользователя выполняет одну '
+            f'запись в базу: {writes}'
+        )
+        assert not any(field.name == 'confirmation_code'
+                       for field in User._meta.fields), (
+            'Код подтверждения не должен храниться в строке пользователя.'
+        )
+        new_code, context = self.signup(client)
+        assert not get_writes(context), (
+            'Проверьте, что повторная регистрация не пишет в базу данных.'
+        )
+        assert self.get_token(client, code).status_code == (
+            HTTPStatus.BAD_REQUEST), (
+            'Новый код подтверждения должен заменять прежний.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_token(client, new_code)
+        assert response.status_code == HTTPStatus.OK
+        assert 'token' in response.json()
+        user_queries = [query['sql'] for query in context.captured_queries
+                        if '"users_user"' in query['sql']]
+        assert len(user_queries) == 1
+        assert '"password"' not in user_queries[0], (
+            'Проверьте, что выдача токена читает только нужные поля '
+            'пользователя.'
+        )
+        assert self.get_token(client, new_code).status_code == (
+            HTTPStatus.BAD_REQUEST), (
+            'Проверьте, что код подтверждения одноразовый.'
+        )
+
+    def test_02_code_expiry(self, client, settings):
+        settings.CONFIRMATION_CODE_TIMEOUT = 0
+        code, _ = self.signup(client)
+        assert self.get_token(client, code).status_code == (
+            HTTPStatus.BAD_REQUEST), (
+            'Проверьте, что код подтверждения действует ограниченное время.'
+        )
+        assert self.get_token(client, 'код').status_code == (
+            HTTPStatus.BAD_REQUEST)